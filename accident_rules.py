@@ -0,0 +1,451 @@
+"""
+📋 ACCIDENT RULES - VERSIONED, COMPILED, HOT-RELOADED
+====================================================
+The physics rules of WorkingAccidentDetector and the synthetic training
+labels of MLAccidentDetector, written down once in accident_rules.json
+instead of as if/elif cascades and chained pandas comparisons.
+
+- A rule is a conjunction of [feature, op, threshold] clauses
+- detection_rules: groups of scored rules; within a group only the first
+  matching rule fires (the old if/elif cascades), groups add up
+- label_rules: a sample is labelled as an accident if ANY rule matches
+- The config is compiled once into a RuleSet; both tables are evaluated
+  over the same derived features (FEATURES) in fixed-size row chunks with
+  preallocated buffers, so labelling tens of millions of rows allocates
+  no full-length temporaries
+- RuleEngine re-reads the file when it changes, so thresholds can be tuned
+  without restarting the server
+
+Environment variables (read by default_engine):
+    ACCIDENT_RULES_PATH  rules config file (default accident_rules.json)
+"""
+
+import json
+import operator
+import os
+import threading
+import time
+import numpy as np
+from detector_logging import get_logger
+
+logger = get_logger('rules')
+
+# Versioned rules config, shipped next to this module
+RULES_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'accident_rules.json')
+CONFIG_SCHEMA = 1
+
+# Raw sensor columns the derived features are built from
+RAW_COLUMNS = ['acc_x', 'acc_y', 'acc_z', 'gyro_x', 'gyro_y', 'gyro_z', 'speed']
+
+# Every feature a rule clause may reference
+FEATURES = RAW_COLUMNS + [f'abs_{col}' for col in RAW_COLUMNS[:6]] + [
+    'acc_magnitude', 'gyro_magnitude', 'total_magnitude',
+    'max_acc_axis', 'max_gyro_axis', 'forward_decel', 'speed_factor',
+]
+
+OPERATORS = {
+    '>': (operator.gt, np.greater),
+    '>=': (operator.ge, np.greater_equal),
+    '<': (operator.lt, np.less),
+    '<=': (operator.le, np.less_equal),
+}
+
+# Rows evaluated per chunk (bounds the size of every temporary buffer)
+CHUNK_SIZE = 1 << 16
+
+class FeatureColumns:
+    """
+    Derived features of a block of rows, computed on first use.
+
+    Wraps a mapping of column name -> 1-D array (the raw sensor columns,
+    plus any precomputed feature such as the model's acc_magnitude) and
+    derives the rest with the same arithmetic as the scalar detector.
+    """
+
+    def __init__(self, columns):
+        self._columns = dict(columns)
+
+    def __getitem__(self, name):
+        column = self._columns.get(name)
+        if column is None:
+            column = self._columns[name] = self._derive(name)
+        return column
+
+    def _derive(self, name):
+        if name.startswith('abs_'):
+            return np.abs(self[name[4:]])
+        if name in ('acc_magnitude', 'gyro_magnitude'):
+            prefix = name.split('_')[0]
+            x, y, z = (self[f'{prefix}_{axis}'] for axis in 'xyz')
+            return np.sqrt(x * x + y * y + z * z)
+        if name == 'total_magnitude':
+            return self['acc_magnitude'] + self['gyro_magnitude']
+        if name in ('max_acc_axis', 'max_gyro_axis'):
+            prefix = name.split('_')[1]
+            x, y, z = (self[f'abs_{prefix}_{axis}'] for axis in 'xyz')
+            return np.maximum(np.maximum(x, y), z)
+        if name == 'forward_decel':
+            return -self['acc_x']  # Negative X = deceleration
+        if name == 'speed_factor':
+            # Bikes reach peak danger at lower speeds than cars
+            return 1.0 + (self['speed'] / 60.0)
+        raise KeyError(f"Unknown feature: {name}")
+
+
+def scalar_features(sensor_data):
+    """Every entry of FEATURES for a single reading dict (speed defaults to 0)."""
+    features = {col: sensor_data.get(col, 0) if col == 'speed' else sensor_data[col] for col in RAW_COLUMNS}
+    for col in RAW_COLUMNS[:6]:
+        features[f'abs_{col}'] = abs(features[col])
+    features['acc_magnitude'] = np.sqrt(features['acc_x']**2 + features['acc_y']**2 + features['acc_z']**2)
+    features['gyro_magnitude'] = np.sqrt(features['gyro_x']**2 + features['gyro_y']**2 + features['gyro_z']**2)
+    features['total_magnitude'] = features['acc_magnitude'] + features['gyro_magnitude']
+    features['max_acc_axis'] = max(features['abs_acc_x'], features['abs_acc_y'], features['abs_acc_z'])
+    features['max_gyro_axis'] = max(features['abs_gyro_x'], features['abs_gyro_y'], features['abs_gyro_z'])
+    features['forward_decel'] = -features['acc_x']
+    features['speed_factor'] = 1.0 + (features['speed'] / 60.0)
+    return features
+
+
+def reason_text(messages):
+    """Reason string of a rule-based result: its messages, or "Normal riding"."""
+    return " | ".join(messages) if messages else "Normal riding"
+
+
+def _compile_clauses(clauses):
+    compiled = []
+    for feature, op, threshold in clauses:
+        if feature not in FEATURES:
+            raise ValueError(f"Unknown feature in rule clause: {feature}")
+        if op not in OPERATORS:
+            raise ValueError(f"Unknown operator in rule clause: {op}")
+        compiled.append((feature, OPERATORS[op], float(threshold)))
+    return tuple(compiled)
+
+
+def _match(columns, clauses, out, scratch):
+    """out = AND of all clauses, computed in place."""
+    (feature, (_, ufunc), threshold), *rest = clauses
+    ufunc(columns[feature], threshold, out=out)
+    for feature, (_, ufunc), threshold in rest:
+        ufunc(columns[feature], threshold, out=scratch)
+        out &= scratch
+    return out
+
+
+def _chunks(n_rows, chunk_size):
+    for start in range(0, n_rows, chunk_size):
+        yield start, min(start + chunk_size, n_rows)
+
+
+def _clause_text(clauses):
+    return " and ".join(f"{feature} {op} {float(threshold):g}" for feature, op, threshold in clauses)
+
+
+class RuleSet:
+    """
+    One validated, compiled version of the rules config (immutable).
+
+    Compiling resolves every clause to its NumPy/operator function up
+    front, so evaluating a request does no parsing or lookups.
+    """
+
+    def __init__(self, config, source=None):
+        """
+        Args:
+            config: parsed rules config (see accident_rules.json)
+            source: where the config came from, for logs and reports
+
+        Raises:
+            ValueError: unsupported schema or an invalid rule
+        """
+        if config.get('schema') != CONFIG_SCHEMA:
+            raise ValueError(f"Unsupported rules config schema: {config.get('schema')!r}")
+        try:
+            self.version = str(config['version'])
+            self.accident_threshold = float(config['accident_threshold'])
+            self.detection = self._compile_detection(config['detection_rules'])
+            self.labels = tuple(_compile_clauses(clauses)
+                                for group in config['label_rules'] for clauses in group['any'])
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Invalid rules config: {e!r}") from e
+
+        self.config = config
+        self.source = source
+        self.flags = [rule['flag'] for group in config['detection_rules'] for rule in group['rules']]
+        if len(set(self.flags)) != len(self.flags):
+            raise ValueError("Detection rule flags must be unique")
+        self.summary = self._summarize(config)
+        # Flag -> severity rank (0 = least severe): severity multiplier, then score
+        ordered = sorted(((rule[4] or 1.0, rule[2], i) for i, rule in
+                          enumerate(rule for rules in self.detection for rule in rules)))
+        self.severity_ranks = {self.flags[i]: rank for rank, (_, _, i) in enumerate(ordered)}
+
+    @staticmethod
+    def _compile_detection(detection_rules):
+        compiled = []
+        bit = 0
+        for group in detection_rules:
+            rules = []
+            for rule in group['rules']:
+                if bit >= 32:
+                    raise ValueError("At most 32 detection rules fit the uint32 reason mask")
+                severity = rule.get('severity')
+                rules.append((
+                    np.uint32(1 << bit),
+                    _compile_clauses(rule['when']),
+                    float(rule['score']),
+                    bool(rule.get('speed_scaled', False)),
+                    float(severity) if severity is not None else None,
+                    str(rule['message']),
+                ))
+                bit += 1
+            compiled.append(tuple(rules))
+        return tuple(compiled)
+
+    def _summarize(self, config):
+        """Human-readable thresholds, as reported by the API and save_rules."""
+        return {
+            'version': self.version,
+            'accident_threshold': self.accident_threshold,
+            'detection_rules': {
+                group['group']: {rule['flag']: _clause_text(rule['when']) for rule in group['rules']}
+                for group in config['detection_rules']
+            },
+            'label_rules': {
+                group['group']: [_clause_text(clauses) for clauses in group['any']]
+                for group in config['label_rules']
+            },
+        }
+
+    def detect(self, columns, n_rows, chunk_size=CHUNK_SIZE):
+        """
+        Score many readings.
+
+        Scores are accumulated rule by rule in config order, exactly like
+        score, so both paths give bit-identical confidences.
+
+        Args:
+            columns: mapping of column name -> 1-D array (RAW_COLUMNS at least)
+            n_rows: number of readings
+            chunk_size: rows per evaluation chunk
+
+        Returns:
+            tuple: (is_accident: bool array, confidence: float array,
+                    reasons: uint32 bitmask array, bit i <-> flags[i])
+        """
+        confidence = np.zeros(n_rows)
+        reasons = np.zeros(n_rows, dtype=np.uint32)
+        buffer = min(chunk_size, n_rows)
+        mask, remaining, scratch = (np.empty(buffer, dtype=bool) for _ in range(3))
+        severity, scaled = np.empty(buffer), np.empty(buffer)
+
+        for start, end in _chunks(n_rows, chunk_size):
+            m = end - start
+            block = FeatureColumns({name: col[start:end] for name, col in columns.items()})
+            score, chunk_reasons = confidence[start:end], reasons[start:end]
+            chunk_severity = severity[:m]
+            chunk_severity.fill(1.0)
+            chunk_mask, chunk_remaining, chunk_scratch = mask[:m], remaining[:m], scratch[:m]
+
+            for rules in self.detection:
+                chunk_remaining.fill(True)
+                for bit, clauses, rule_score, speed_scaled, rule_severity, _ in rules:
+                    _match(block, clauses, chunk_mask, chunk_scratch)
+                    # First match wins inside a group (if/elif)
+                    chunk_mask &= chunk_remaining
+                    chunk_remaining &= ~chunk_mask
+                    np.bitwise_or(chunk_reasons, bit, out=chunk_reasons, where=chunk_mask)
+                    if speed_scaled:
+                        rule_score = np.multiply(rule_score, block['speed_factor'], out=scaled[:m])
+                    np.add(score, rule_score, out=score, where=chunk_mask)
+                    if rule_severity is not None:
+                        np.multiply(chunk_severity, rule_severity, out=chunk_severity, where=chunk_mask)
+
+            score *= chunk_severity
+            np.minimum(score, 1.0, out=score)
+
+        return confidence > self.accident_threshold, confidence, reasons
+
+    def score(self, features, with_mask=False):
+        """
+        Score one reading (the scalar twin of detect).
+
+        Args:
+            features: output of scalar_features
+            with_mask: also return the reason bitmask
+
+        Returns:
+            tuple: (confidence: float, reason messages: list of str), plus
+            the reason bitmask (bit i <-> flags[i]) when with_mask=True
+        """
+        reasons = []
+        reason_mask = 0
+        confidence_score = 0.0
+        severity_multiplier = 1.0
+        for rules in self.detection:
+            for bit, clauses, rule_score, speed_scaled, rule_severity, message in rules:
+                if all(op(features[feature], threshold) for feature, (op, _), threshold in clauses):
+                    reasons.append(message.format(**features))
+                    reason_mask |= int(bit)
+                    confidence_score += rule_score * features['speed_factor'] if speed_scaled else rule_score
+                    if rule_severity is not None:
+                        severity_multiplier *= rule_severity
+                    break
+        confidence = min(confidence_score * severity_multiplier, 1.0)
+        if with_mask:
+            return confidence, reasons, reason_mask
+        return confidence, reasons
+
+    def label(self, columns, n_rows, chunk_size=CHUNK_SIZE):
+        """
+        Synthetic training labels: 1 where any label rule matches.
+
+        Args:
+            columns: mapping of column name -> 1-D array (works on memmaps;
+                     only one chunk of every column is touched at a time)
+            n_rows: number of rows
+            chunk_size: rows per evaluation chunk
+
+        Returns:
+            uint8 array of 0/1 labels
+        """
+        labels = np.zeros(n_rows, dtype=np.uint8)
+        buffer = min(chunk_size, n_rows)
+        hit, mask, scratch = (np.empty(buffer, dtype=bool) for _ in range(3))
+
+        for start, end in _chunks(n_rows, chunk_size):
+            m = end - start
+            block = FeatureColumns({name: col[start:end] for name, col in columns.items()})
+            chunk_hit = hit[:m]
+            chunk_hit.fill(False)
+            for clauses in self.labels:
+                chunk_hit |= _match(block, clauses, mask[:m], scratch[:m])
+            labels[start:end] = chunk_hit
+
+        return labels
+
+    def describe(self, reason_mask):
+        """Decode a reason bitmask from detect into a list of flag names."""
+        reason_mask = int(reason_mask)
+        return [name for i, name in enumerate(self.flags) if reason_mask & (1 << i)]
+
+    def messages(self, reason_mask, features):
+        """
+        The reason messages score would give for a reason bitmask from detect.
+
+        Args:
+            reason_mask: integer bitmask (bit i <-> flags[i])
+            features: output of scalar_features for the same reading
+        """
+        reason_mask = int(reason_mask)
+        return [message.format(**features)
+                for rules in self.detection
+                for bit, _, _, _, _, message in rules
+                if reason_mask & int(bit)]
+
+    def most_severe(self, flags):
+        """
+        The most severe of some reason flags (see severity_ranks).
+
+        Returns:
+            tuple: (flag, rank), or (None, -1) for no flags
+        """
+        ranked = [(self.severity_ranks[flag], flag) for flag in flags]
+        if not ranked:
+            return None, -1
+        rank, flag = max(ranked)
+        return flag, rank
+
+
+def load_rules_config(path=RULES_CONFIG_PATH):
+    """Read and compile a rules config file."""
+    with open(path, encoding='utf-8') as f:
+        return RuleSet(json.load(f), source=path)
+
+
+class RuleEngine:
+    """
+    The current RuleSet of a config file, hot-reloaded when the file changes.
+
+    The file is stat()ed at most once per check_interval seconds. A changed
+    file is recompiled and swapped in with one reference assignment, so a
+    caller that reads .rules once per request always sees one consistent
+    version. A broken edit is logged and the previous rules stay active.
+    """
+
+    def __init__(self, path=RULES_CONFIG_PATH, check_interval=1.0):
+        """
+        Args:
+            path: rules config file
+            check_interval: seconds between file checks (0 = every access)
+
+        Raises:
+            OSError, ValueError: the initial config cannot be loaded
+        """
+        self.path = path
+        self.check_interval = float(check_interval)
+        self._lock = threading.Lock()
+        self._stamp = self._file_stamp()
+        self._rules = load_rules_config(path)
+        self._next_check = time.monotonic() + self.check_interval
+        self.loaded_at = time.time()
+        logger.info("📋 Rules v%s loaded from %s (%d detection rules)",
+                    self._rules.version, path, len(self._rules.flags))
+
+    def _file_stamp(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    @property
+    def rules(self):
+        """Current RuleSet (checks the file for changes when due)."""
+        now = time.monotonic()
+        if now >= self._next_check and self._lock.acquire(blocking=False):
+            try:
+                self._next_check = now + self.check_interval
+                self._reload_if_changed()
+            finally:
+                self._lock.release()
+        return self._rules
+
+    def _reload_if_changed(self):
+        try:
+            stamp = self._file_stamp()
+        except OSError as e:
+            logger.error("⚠️ Rules config unavailable, keeping v%s: %s", self._rules.version, e)
+            return
+        if stamp == self._stamp:
+            return
+        self._stamp = stamp
+        try:
+            self._swap(load_rules_config(self.path))
+        except (OSError, ValueError) as e:
+            logger.error("⚠️ Invalid rules config %s, keeping v%s: %s", self.path, self._rules.version, e)
+
+    def reload(self):
+        """Recompile the config now (errors propagate, old rules stay active)."""
+        with self._lock:
+            stamp = self._file_stamp()
+            self._swap(load_rules_config(self.path))
+            self._stamp = stamp
+        return self._rules
+
+    def _swap(self, rules):
+        previous, self._rules = self._rules, rules
+        self.loaded_at = time.time()
+        logger.info("🔁 Rules reloaded: v%s -> v%s", previous.version, rules.version)
+
+
+_default_engine = None
+_default_engine_lock = threading.Lock()
+
+
+def default_engine():
+    """Process-wide RuleEngine for ACCIDENT_RULES_PATH (or accident_rules.json)."""
+    global _default_engine
+    if _default_engine is None:
+        with _default_engine_lock:
+            if _default_engine is None:
+                _default_engine = RuleEngine(os.environ.get('ACCIDENT_RULES_PATH', RULES_CONFIG_PATH))
+    return _default_engine
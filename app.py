@@ -1,19 +1,29 @@
 
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 import numpy as np
+import json
+import math
 import sys
 import os
-from working_accident_system import WorkingAccidentDetector
+import time
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from working_accident_system import WorkingAccidentDetector, SENSOR_COLUMNS
+from accident_rules import reason_text, scalar_features
+from sensor_codec import is_sensor_record_type, decode_readings
+from detector_logging import configure_logging, get_logger
+from model_backends import MODEL_BACKENDS, mmap_model_dir, describe_prediction
+from prediction_cache import PredictionCache
+from explanations import generate_human_explanation
+from micro_batcher import MicroBatcher
+from rider_sessions import SessionStore, validate_device_id
+from live_channel import LiveChannel, UpgradedResponse, is_websocket_request
 
-# Try to import ML detector
-try:
-    from ml_accident_detector import MLAccidentDetector
-    ML_AVAILABLE = True
-except ImportError:
-    ML_AVAILABLE = False
-    print("⚠️ ML model not available. Install scikit-learn or train the model first.")
+configure_logging()
+logger = get_logger('server')
 
 app = Flask(__name__)
 CORS(app)
@@ -21,126 +31,141 @@ CORS(app)
 # Initialize the rule-based detector
 detector = WorkingAccidentDetector()
 
-# Try to load ML model if available
-ml_detector = None
-if ML_AVAILABLE and os.path.exists('ml_accident_model.pkl'):
-    try:
-        ml_detector = MLAccidentDetector()
-        ml_detector.load_model('ml_accident_model.pkl')
-        print("✅ ML model loaded successfully!")
-    except Exception as e:
-        print(f"⚠️ Could not load ML model: {e}")
-        ml_detector = None
+# Finished /api/detect responses for repeated readings (see prediction_cache.py)
+prediction_cache = PredictionCache.from_env()
+
+def log_incident(incident):
+    """Closed crash incidents go to the log (one record per crash)."""
+    logger.warning("🚨 Incident %d on device %s: %.1fs, %d positive readings, peak %.0f%%, %s",
+                   incident['incident_id'], incident['device_id'], incident['duration'],
+                   incident['readings'], incident['peak_confidence'] * 100, incident['reason'],
+                   extra={'incident': incident})
+
+# Per-device state and crash incidents of riders that send a device_id
+# (see rider_sessions.py)
+rider_sessions = SessionStore.from_env(on_incident=log_incident)
+
+# WebSocket connections of /api/live (see live_channel.py)
+live_channel = LiveChannel.from_env()
+
+# model_type values for the ML backends -> MODEL_BACKENDS key
+ML_MODEL_TYPES = {
+    'ml': 'random_forest',
+    'ml-hgb': 'hist_gradient_boosting',
+}
+
+# ML detectors are loaded on the first request that needs one, so the
+# server starts without importing scikit-learn or reading any model.
+# model_type -> detector, or None if it could not be loaded
+ml_detectors = {}
+_ml_detectors_lock = threading.Lock()
+
+# model_type -> MicroBatcher coalescing concurrent /api/detect calls
+# (None when ACCIDENT_BATCH_MAX disables batching)
+ml_batchers = {}
+
+def ml_model_path(model_type):
+    return MODEL_BACKENDS[ML_MODEL_TYPES[model_type]]['path']
+
+def ml_model_available(model_type):
+    """True if model_type has a trained model on disk (loaded or not)."""
+    if model_type not in ML_MODEL_TYPES:
+        return False
+    if model_type in ml_detectors:
+        return ml_detectors[model_type] is not None
+    path = ml_model_path(model_type)
+    return os.path.exists(path) or os.path.isdir(mmap_model_dir(path))
 
-def generate_human_explanation(sensor_data, is_accident, confidence, technical_reason, metrics):
+def load_ml_detector(model_type):
     """
-    Generate easy-to-understand explanation for non-technical users.
-    Explains what happened in everyday language.
+    Load the model for model_type.
+
+    Random Forests are mapped from their compiled export (read-only pages
+    shared by forked workers, no sklearn import); other backends, or a
+    missing/stale export, fall back to unpickling the model file.
     """
-    speed = sensor_data.get('speed', 0)
-    acc_x = sensor_data.get('acc_x', 0)
-    acc_y = sensor_data.get('acc_y', 0)
-    acc_z = sensor_data.get('acc_z', 0)
-    acc_mag = metrics['acc_magnitude']
-    gyro_mag = metrics['gyro_magnitude']
-    
-    explanation = {
-        'simple_status': '',
-        'what_happened': '',
-        'why_detected': '',
-        'analogy': '',
-        'safety_tip': ''
-    }
-    
-    if is_accident:
-        # Determine accident type from sensor values
-        if speed < 5 and acc_mag > 15:
-            # Stationary impact
-            explanation['simple_status'] = "Your bike was hit while stopped"
-            explanation['what_happened'] = f"Your bike wasn't moving ({speed:.0f} km/h), but the sensors detected a significant impact force of {acc_mag:.1f}G. This indicates something collided with your parked bike, or you were rear-ended while stopped at a traffic light."
-            explanation['why_detected'] = "When a bike is stationary, it should only experience gravity pulling downward (approximately 10G). Any force exceeding 15G indicates an external collision has occurred."
-            explanation['analogy'] = "Imagine you're standing completely still, and someone suddenly pushes you hard from behind. You haven't moved from your position, but you definitely felt that strong impact."
-            explanation['safety_tip'] = "Even when stopped, accidents can happen. Always stay aware of traffic around you, especially at intersections and traffic lights."
-            
-        elif acc_x < -15 and speed > 30:
-            # Sudden braking / Endo
-            explanation['simple_status'] = "Sudden emergency stop detected - risk of flipping"
-            explanation['what_happened'] = f"You were riding at {speed:.0f} km/h and suddenly experienced extreme backward force ({abs(acc_x):.1f}G). This is characteristic of very hard braking."
-            explanation['why_detected'] = "When you brake too hard on a bike, the front wheel stops abruptly but your body continues moving forward due to momentum. This can cause you to flip over the handlebars, which cyclists call an 'endo'."
-            explanation['analogy'] = "Think about running at full speed and suddenly grabbing onto a fixed pole. Your legs stop immediately, but your upper body keeps moving forward because of inertia."
-            explanation['safety_tip'] = "Practice gradual, controlled braking. Always use both front and rear brakes together for safer stops, and shift your weight backward when braking hard."
-            
-        elif gyro_mag > 25:
-            # Tumbling/flipping
-            explanation['simple_status'] = "Bike is tumbling or flipping"
-            explanation['what_happened'] = f"The bike is rotating at {gyro_mag:.1f} degrees per second, which is extremely fast. Your bike is likely rolling over or flipping through the air."
-            explanation['why_detected'] = "During normal riding, bikes rotate slowly through turns (typically 1-5 degrees per second). Rotation speeds above 25 degrees per second indicate the bike is completely out of control and tumbling."
-            explanation['analogy'] = "Compare doing a controlled turn while walking versus doing an uncontrolled somersault. One is smooth and predictable, the other is chaotic spinning motion."
-            explanation['safety_tip'] = "This type of rotation usually happens after a collision or when hitting a significant obstacle. Always wear a helmet and protective gear when cycling."
-            
-        elif acc_mag > 25:
-            # Extreme impact
-            explanation['simple_status'] = "Severe crash detected - extreme impact"
-            explanation['what_happened'] = f"Your bike experienced {acc_mag:.1f}G of force. Normal riding typically produces around 10G. This level of force indicates a serious collision has occurred."
-            explanation['why_detected'] = "Forces exceeding 25G mean something hit your bike with tremendous force. This could be a vehicle collision, hitting a solid wall, or a major fall at speed."
-            explanation['analogy'] = "Consider the difference between gently placing a book on a table versus throwing it violently against a wall. The impact force is dramatically different."
-            explanation['safety_tip'] = "This represents a serious accident. Immediately check yourself and any passengers for injuries. Seek medical attention if you experience any pain or disorientation."
-            
-        elif speed > 60 and acc_mag > 8:
-            # High-speed collision
-            explanation['simple_status'] = f"High-speed accident at {speed:.0f} km/h"
-            explanation['what_happened'] = f"You were riding fast ({speed:.0f} km/h - that's highway speed) and hit something with {acc_mag:.1f}G of force. At high speeds, even small impacts are dangerous."
-            explanation['why_detected'] = "Speed increases danger exponentially. An 8G impact at 60 km/h is much more dangerous than 8G at 20 km/h because of the kinetic energy involved."
-            explanation['analogy'] = "Think of falling off a chair versus falling off a roof - the same motion, but vastly different outcomes because of the height."
-            explanation['safety_tip'] = "High-speed cycling requires full protective gear. Always wear a helmet and consider body armor for speeds above 50 km/h."
-            
-        elif abs(acc_y) > 20:
-            # Side impact
-            explanation['simple_status'] = "Side impact - something hit you from the side"
-            explanation['what_happened'] = f"Your bike was hit from the left or right with {abs(acc_y):.1f}G of sideways force. This often happens when a vehicle doesn't see you and turns into your path."
-            explanation['why_detected'] = "Side impacts (Y-axis) are particularly dangerous for cyclists because you can't see them coming and they often knock you off balance."
-            explanation['analogy'] = "Picture someone opening a door into you when you're walking past - you don't expect it and get knocked sideways."
-            explanation['safety_tip'] = "Always be visible! Use lights, wear bright colors, and avoid vehicle blind spots, especially at intersections."
-            
-        else:
-            # General accident
-            explanation['simple_status'] = "Accident detected - abnormal forces"
-            explanation['what_happened'] = f"Sensors detected unusual forces: {acc_mag:.1f}G impact while riding at {speed:.0f} km/h with {gyro_mag:.1f}°/s rotation. These readings are outside normal riding patterns."
-            explanation['why_detected'] = "During normal cycling, forces stay relatively low and predictable. These readings indicate something unexpected happened."
-            explanation['analogy'] = "It's like walking on a smooth path (predictable) versus stumbling over an unseen obstacle (sudden change)."
-            explanation['safety_tip'] = "Stay alert and anticipate potential hazards. Defensive cycling can prevent accidents before they happen."
-            
-    else:
-        # No accident - safe riding
-        if speed < 5:
-            explanation['simple_status'] = "All good - bike is stationary and safe"
-            explanation['what_happened'] = f"Your bike is parked or stopped ({speed:.0f} km/h) with normal forces ({acc_mag:.1f}G). Everything looks normal."
-            explanation['why_detected'] = "When parked, your bike should only feel gravity pulling down (about 10G). The sensors show normal readings with no unusual impacts."
-            explanation['analogy'] = "It's like sitting quietly on a bench - peaceful and stable."
-            explanation['safety_tip'] = "You're safe! Take your time before starting to ride."
-            
-        elif speed > 50:
-            explanation['simple_status'] = f"High-speed cruising - riding fast but safely at {speed:.0f} km/h"
-            explanation['what_happened'] = f"You're riding fast ({speed:.0f} km/h) but all forces are normal: {acc_mag:.1f}G acceleration and {gyro_mag:.1f}°/s rotation. This is smooth, controlled high-speed riding."
-            explanation['why_detected'] = "High speed alone isn't dangerous if everything is controlled. Your bike is stable with no sudden impacts or loss of control."
-            explanation['analogy'] = "It's like riding a smooth elevator going fast - speed without chaos."
-            explanation['safety_tip'] = "Great! Maintain this smooth control. Stay focused and anticipate obstacles ahead."
-            
-        elif acc_mag > 12:
-            explanation['simple_status'] = "Minor bump or acceleration - normal riding"
-            explanation['what_happened'] = f"You felt {acc_mag:.1f}G of force at {speed:.0f} km/h. This could be from pedaling hard, going over a small bump, or turning."
-            explanation['why_detected'] = "Normal cycling involves some forces from pedaling, bumps, and turns. These readings are within the safe range for regular riding."
-            explanation['analogy'] = "It's like jogging over slightly uneven ground - you feel it, but you're not falling."
-            explanation['safety_tip'] = "You're riding normally. Keep your eyes on the road and hands on the handlebars."
-            
-        else:
-            explanation['simple_status'] = f"Smooth cycling - everything is perfect at {speed:.0f} km/h"
-            explanation['what_happened'] = f"You're riding smoothly at {speed:.0f} km/h with minimal forces ({acc_mag:.1f}G) and stable balance ({gyro_mag:.1f}°/s rotation). This is ideal cycling."
-            explanation['why_detected'] = "All sensor readings are in the normal, safe range. Your riding is smooth and controlled."
-            explanation['analogy'] = "It's like gliding on ice or a smooth road - effortless and safe."
-            explanation['safety_tip'] = "Perfect! You're cycling safely. Enjoy your ride."
+    path = ml_model_path(model_type)
+    if ML_MODEL_TYPES[model_type] == 'random_forest':
+        try:
+            from compiled_forest import CompiledForest
+            forest = CompiledForest.load_mmap(mmap_model_dir(path),
+                                              source=path if os.path.exists(path) else None)
+            logger.info("✅ ML model '%s' (%s) mapped from %s", model_type, forest.backend_name, mmap_model_dir(path))
+            return forest
+        except (OSError, ValueError) as e:
+            logger.info("Memory-mapped model unavailable (%s), unpickling %s", e, path)
+
+    from ml_accident_detector import MLAccidentDetector
+    loaded = MLAccidentDetector()
+    loaded.load_model(path)
+    logger.info("✅ ML model '%s' (%s) loaded successfully!", model_type, loaded.backend_name)
+    return loaded
+
+def get_ml_detector(model_type):
+    """ML detector for a model_type ('ml', 'ml-hgb'), loaded on first use; None if unavailable."""
+    if model_type not in ML_MODEL_TYPES:
+        return None
+    try:
+        return ml_detectors[model_type]
+    except KeyError:
+        pass
+    with _ml_detectors_lock:
+        if model_type not in ml_detectors:
+            loaded = None
+            if ml_model_available(model_type):
+                try:
+                    loaded = load_ml_detector(model_type)
+                except ImportError:
+                    logger.warning("⚠️ ML model not available. Install scikit-learn or train the model first.")
+                except Exception as e:
+                    logger.warning("⚠️ Could not load ML model %s: %s", ml_model_path(model_type), e)
+            ml_detectors[model_type] = loaded
+    return ml_detectors[model_type]
+
+def get_ml_batcher(model_type):
+    """MicroBatcher in front of model_type's detector, or None (not loaded / disabled)."""
+    try:
+        return ml_batchers[model_type]
+    except KeyError:
+        pass
+    ml_model = get_ml_detector(model_type)
+    with _ml_detectors_lock:
+        if model_type not in ml_batchers:
+            ml_batchers[model_type] = (MicroBatcher.from_env(ml_model.predict_batch, name=model_type)
+                                       if ml_model is not None else None)
+    return ml_batchers[model_type]
+
+def preload_models():
+    """
+    Load every available ML model now instead of on first use.
     
-    return explanation
+    Production servers call this before forking workers (see serve.py), so
+    the models are read once and their pages are shared by all workers.
+    """
+    detector.rules
+    loaded = {model_type: get_ml_detector(model_type) for model_type in ML_MODEL_TYPES}
+    for model_type in ML_MODEL_TYPES:
+        get_ml_batcher(model_type)  # Its thread starts on first use, in each worker
+    return loaded
+
+def model_display_name(model_type):
+    """model_used text for a model_type (falls back to the rules like /api/detect)."""
+    ml_model = get_ml_detector(model_type)
+    if ml_model is not None:
+        return f"Machine Learning ({ml_model.backend_name})"
+    return "Rule-Based (Physics)"
+
+_thresholds_memo = (None, None)
+
+def response_thresholds(rules):
+    """/api/detect thresholds for a RuleSet, built once per rules version."""
+    global _thresholds_memo
+    memo_rules, thresholds = _thresholds_memo
+    if memo_rules is not rules:
+        thresholds = dict(rules.summary['detection_rules'],
+                          confidence_threshold=rules.accident_threshold * 100)
+        _thresholds_memo = (rules, thresholds)
+    return thresholds
 
 # Preset scenarios for quick testing
 PRESET_SCENARIOS = {
@@ -211,20 +236,201 @@ def index():
     """Render the main simulation page."""
     return render_template('index_with_vehicle_speed.html')
 
+def model_status_info():
+    """Which models are available (also sent to /api/live clients)."""
+    return {
+        'rule_based_available': True,
+        'ml_available': ml_model_available('ml'),
+        'ml_model_path': ml_model_path('ml') if ml_model_available('ml') else None,
+        'ml_models': {
+            ml_model_type: {
+                'backend': backend,
+                'name': MODEL_BACKENDS[backend]['name'],
+                'path': ml_model_path(ml_model_type),
+                'loaded': ml_detectors.get(ml_model_type) is not None
+            }
+            for ml_model_type, backend in ML_MODEL_TYPES.items()
+            if ml_model_available(ml_model_type)
+        }
+    }
+
 @app.route('/api/model_status')
 def model_status():
     """Check which models are available."""
-    return jsonify({
-        'rule_based_available': True,
-        'ml_available': ml_detector is not None,
-        'ml_model_path': 'ml_accident_model.pkl' if ml_detector else None
-    })
+    return jsonify(model_status_info())
+
+@app.route('/api/cache_stats')
+def cache_stats():
+    """Prediction cache size and hit rate."""
+    return jsonify(prediction_cache.stats())
+
+@app.route('/api/batch_stats')
+def batch_stats():
+    """Micro-batcher queue depth and batch size histograms per ML model_type."""
+    return jsonify({model_type: batcher.stats()
+                    for model_type, batcher in ml_batchers.items() if batcher is not None})
+
+@app.route('/api/sessions')
+def sessions_stats():
+    """Active rider sessions and eviction counters."""
+    return jsonify(rider_sessions.stats())
+
+@app.route('/api/sessions/<device_id>')
+def session_state(device_id):
+    """One rider's session, including its buffered readings."""
+    state = rider_sessions.session_dict(device_id)
+    if state is None:
+        return jsonify({'error': f'No session for device {device_id}'}), 404
+    return jsonify(state)
+
+@app.route('/api/incidents')
+def incidents():
+    """Open crash incidents and the most recently closed ones (?limit=N, default 100)."""
+    rider_sessions.close_expired()
+    return jsonify(rider_sessions.incidents(limit=request.args.get('limit', 100, type=int)))
 
 @app.route('/api/presets')
 def get_presets():
     """Get all preset scenarios."""
     return jsonify(PRESET_SCENARIOS)
 
+def with_session(response, device_id, sensor_data, rules):
+    """
+    The response with the device's session state added (unchanged without
+    a device_id). Cached responses are shared, so the session goes on a copy.
+    """
+    if device_id is None or not rider_sessions.enabled:
+        return response
+    if response['reason_flags']:
+        reason, severity = rules.most_severe(response['reason_flags'])
+    else:
+        reason, severity = response['reason'], -1  # ML results rank below every rule
+    session = rider_sessions.record(device_id, sensor_data, response['is_accident'], response['confidence'],
+                                    reason=reason, severity=severity)
+    return dict(response, session=session)
+
+def sessions_unavailable(environ):
+    """
+    Why this process keeps no rider sessions, or None if it does.
+
+    serve.py settles this before forking; other servers are checked here.
+    A WSGI server that reports several worker processes (wsgi.multiprocess,
+    e.g. gunicorn -w 4) would spread a device's readings over per-process
+    stores, so the store is disabled on the first such request.
+    """
+    if rider_sessions.enabled and environ.get('wsgi.multiprocess'):
+        logger.warning("⚠️ Rider sessions are per process: disabled in worker %d of a multi-process server "
+                       "(run one worker to keep sessions)", os.getpid())
+        rider_sessions.disable("the server runs several worker processes (run one worker to keep sessions)")
+    return rider_sessions.disabled_reason
+
+def parse_flag(value):
+    """A boolean option from JSON or a query string ("1", "true" and "yes" are true)."""
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes')
+    return bool(value)
+
+def check_finite(sensor_data):
+    """Raise ValueError unless every value of a reading is a finite number."""
+    if not all(math.isfinite(value) for value in sensor_data.values()):
+        raise ValueError('Values must be finite numbers')
+    return sensor_data
+
+def evaluate_reading(sensor_data, model_type='rule-based', explain=False, device_id=None):
+    """
+    Score one reading and build the /api/detect response body.
+
+    Shared by /api/detect and the live channel (/api/live).
+
+    Returns:
+        tuple: (response: dict, cache status: 'HIT' or 'MISS')
+    """
+    # The model and rules objects are the cache version: a reload or
+    # a newly loaded model never reuses older results
+    ml_model = get_ml_detector(model_type)
+    rules = detector.rules
+    cache_key = None
+    if prediction_cache.enabled:
+        cache_key = prediction_cache.key(sensor_data, (ml_model or detector, rules, explain))
+        cached = prediction_cache.get(cache_key)
+        if cached is not None:
+            return with_session(cached, device_id, sensor_data, rules), 'HIT'
+    
+    # Calculate magnitudes for response
+    acc_magnitude = np.sqrt(sensor_data['acc_x']**2 + sensor_data['acc_y']**2 + sensor_data['acc_z']**2)
+    gyro_magnitude = np.sqrt(sensor_data['gyro_x']**2 + sensor_data['gyro_y']**2 + sensor_data['gyro_z']**2)
+    total_magnitude = acc_magnitude + gyro_magnitude
+    
+    # Choose detection method
+    if ml_model is not None:
+        # Use ML model ('ml' = Random Forest, 'ml-hgb' = gradient boosting),
+        # batched with concurrent requests when the batcher is enabled
+        batcher = get_ml_batcher(model_type)
+        if batcher is not None:
+            is_accident, confidence = batcher.predict(sensor_data)
+            reason = describe_prediction(is_accident, confidence)
+        else:
+            is_accident, confidence, reason = ml_model.predict(sensor_data)
+        reason_flags = []
+        model_used = model_display_name(model_type)
+    else:
+        # Use rule-based model
+        is_accident, confidence, reason, reason_mask = detector.detect_accident(sensor_data, with_mask=True)
+        reason_flags = rules.describe(reason_mask)
+        model_used = "Rule-Based (Physics)"
+    
+    # Convert confidence to percentage for better display
+    confidence_percent = confidence * 100
+    
+    # Determine severity level based on confidence
+    if confidence_percent >= 90:
+        severity = "CRITICAL"
+        severity_color = "#DC2626"  # Red
+    elif confidence_percent >= 70:
+        severity = "HIGH"
+        severity_color = "#EA580C"  # Orange
+    elif confidence_percent >= 50:
+        severity = "MODERATE"
+        severity_color = "#F59E0B"  # Amber
+    elif confidence_percent >= 40:
+        severity = "LOW"
+        severity_color = "#EAB308"  # Yellow
+    else:
+        severity = "MINIMAL"
+        severity_color = "#22C55E"  # Green
+    
+    # Calculate metrics
+    metrics = {
+        'speed': float(sensor_data['speed']),
+        'acc_magnitude': float(acc_magnitude),
+        'gyro_magnitude': float(gyro_magnitude),
+        'total_magnitude': float(total_magnitude),
+        'max_acc_axis': float(max(abs(sensor_data['acc_x']), abs(sensor_data['acc_y']), abs(sensor_data['acc_z']))),
+        'max_gyro_axis': float(max(abs(sensor_data['gyro_x']), abs(sensor_data['gyro_y']), abs(sensor_data['gyro_z'])))
+    }
+    
+    # Prepare response (thresholds straight from the active rules config)
+    response = {
+        'is_accident': bool(is_accident),
+        'confidence': float(confidence),
+        'confidence_percent': float(confidence_percent),
+        'severity': severity,
+        'severity_color': severity_color,
+        'reason': reason,
+        'reason_flags': reason_flags,
+        'model_used': model_used,
+        'metrics': metrics,
+        'rules_version': rules.version,
+        'thresholds': response_thresholds(rules)
+    }
+    if explain:
+        # Easy-to-understand explanation, only for clients that show it
+        response['explanation'] = generate_human_explanation(sensor_data, is_accident, confidence, reason, metrics)
+    
+    if cache_key is not None:
+        prediction_cache.put(cache_key, response)
+    return with_session(response, device_id, sensor_data, rules), 'MISS'
+
 @app.route('/api/detect', methods=['POST'])
 def detect_accident():
     """
@@ -238,106 +444,362 @@ def detect_accident():
         "gyro_x": float,
         "gyro_y": float,
         "gyro_z": float,
-        "speed": float (optional, defaults to 0)
+        "speed": float (optional, defaults to 0),
+        "model_type": "rule-based" | "ml" | "ml-hgb" (optional, default rule-based),
+        "explain": bool (optional, default false: adds the plain-language
+                   "explanation" object shown by the simulator; the
+                   strings "true", "1" and "yes" also count as true),
+        "device_id": str (optional: adds the reading to that rider's
+                     session and a "session" object to the response; its
+                     "alert" is true only for the reading that opens a
+                     crash incident, see /api/incidents; answered with
+                     503 when this server keeps no sessions)
     }
+    
+    'ml' is the Random Forest, 'ml-hgb' the histogram gradient boosting
+    model (smaller and faster; train it with: python ml_accident_detector.py --hgb).
+    An ML model_type whose model is not loaded falls back to the rules.
+    
+    Binary uploads: send one 28-byte packed record (see sensor_codec.py) with
+    Content-Type: application/vnd.bike-sensor.f32 and pass model_type (and
+    explain=1, device_id) as query parameters.
+    
+    Repeated readings are answered from the prediction cache; the
+    X-Cache response header says HIT or MISS.
+    
+    The response "thresholds" object comes from the active rules config:
+    one object per rule group ("acceleration", "rotation", ...) mapping
+    rule name -> condition, plus "confidence_threshold" (percent). It
+    replaces the old flat keys (acc_severe, gyro_high, ...).
     """
     try:
-        data = request.get_json()
-        
-        # Validate input
-        required_keys = ['acc_x', 'acc_y', 'acc_z', 'gyro_x', 'gyro_y', 'gyro_z']
-        for key in required_keys:
-            if key not in data:
-                return jsonify({'error': f'Missing parameter: {key}'}), 400
-        
-        # Convert to float (speed is optional)
-        sensor_data = {key: float(data[key]) for key in required_keys}
-        sensor_data['speed'] = float(data.get('speed', 0))  # Default speed to 0 if not provided
-        
-        # Get model choice (default to rule-based)
-        model_type = data.get('model_type', 'rule-based')
-        
-        # Calculate magnitudes for response
-        acc_magnitude = np.sqrt(sensor_data['acc_x']**2 + sensor_data['acc_y']**2 + sensor_data['acc_z']**2)
-        gyro_magnitude = np.sqrt(sensor_data['gyro_x']**2 + sensor_data['gyro_y']**2 + sensor_data['gyro_z']**2)
-        total_magnitude = acc_magnitude + gyro_magnitude
-        
-        # Choose detection method
-        if model_type == 'ml' and ml_detector is not None:
-            # Use ML model
-            is_accident, confidence, reason = ml_detector.predict(sensor_data)
-            model_used = "Machine Learning (Random Forest)"
-        else:
-            # Use rule-based model
-            is_accident, confidence, reason = detector.detect_accident(sensor_data)
-            model_used = "Rule-Based (Physics)"
-        
-        # Convert confidence to percentage for better display
-        confidence_percent = confidence * 100
-        
-        # Determine severity level based on confidence
-        if confidence_percent >= 90:
-            severity = "CRITICAL"
-            severity_color = "#DC2626"  # Red
-        elif confidence_percent >= 70:
-            severity = "HIGH"
-            severity_color = "#EA580C"  # Orange
-        elif confidence_percent >= 50:
-            severity = "MODERATE"
-            severity_color = "#F59E0B"  # Amber
-        elif confidence_percent >= 40:
-            severity = "LOW"
-            severity_color = "#EAB308"  # Yellow
+        if is_sensor_record_type(request.content_type):
+            records = decode_readings(request.get_data())
+            if len(records) != 1:
+                return jsonify({'error': 'Expected exactly one record (use /api/detect/bulk for more)'}), 400
+            sensor_data = dict(zip(SENSOR_COLUMNS, records[0].tolist()))
+            model_type = request.args.get('model_type', 'rule-based')
+            explain = parse_flag(request.args.get('explain', ''))
+            device_id = request.args.get('device_id')
         else:
-            severity = "MINIMAL"
-            severity_color = "#22C55E"  # Green
-        
-        # Calculate metrics
-        metrics = {
-            'speed': float(sensor_data['speed']),
-            'acc_magnitude': float(acc_magnitude),
-            'gyro_magnitude': float(gyro_magnitude),
-            'total_magnitude': float(total_magnitude),
-            'max_acc_axis': float(max(abs(sensor_data['acc_x']), abs(sensor_data['acc_y']), abs(sensor_data['acc_z']))),
-            'max_gyro_axis': float(max(abs(sensor_data['gyro_x']), abs(sensor_data['gyro_y']), abs(sensor_data['gyro_z'])))
-        }
-        
-        # Generate human-readable explanation
-        explanation = generate_human_explanation(sensor_data, is_accident, confidence, reason, metrics)
-        
-        # Prepare response
-        response = {
-            'is_accident': bool(is_accident),
-            'confidence': float(confidence),
-            'confidence_percent': float(confidence_percent),
-            'severity': severity,
-            'severity_color': severity_color,
-            'reason': reason,
-            'model_used': model_used,
-            'explanation': explanation,  # New: Easy-to-understand explanation
-            'metrics': metrics,
-            'thresholds': {
-                'acc_severe': 20,
-                'acc_high': 15,
-                'acc_moderate': 10,
-                'gyro_severe': 30,
-                'gyro_high': 20,
-                'gyro_moderate': 10,
-                'total_severe': 60,
-                'total_moderate': 40,
-                'confidence_threshold': 40,  # Updated to 40%
-                'speed_high': 80,
-                'speed_moderate': 50
-            }
-        }
+            data = request.get_json()
+            
+            # Validate input
+            required_keys = ['acc_x', 'acc_y', 'acc_z', 'gyro_x', 'gyro_y', 'gyro_z']
+            for key in required_keys:
+                if key not in data:
+                    return jsonify({'error': f'Missing parameter: {key}'}), 400
+            
+            # Convert to float (speed is optional)
+            sensor_data = {key: float(data[key]) for key in required_keys}
+            sensor_data['speed'] = float(data.get('speed', 0))  # Default speed to 0 if not provided
+            
+            # Get model choice (default to rule-based)
+            model_type = data.get('model_type', 'rule-based')
+            explain = parse_flag(data.get('explain', False))
+            device_id = data.get('device_id')
+        check_finite(sensor_data)
+        if device_id is not None:
+            device_id = validate_device_id(device_id)
+            unavailable = sessions_unavailable(request.environ)
+            if unavailable:
+                return jsonify({'error': f'Rider sessions are unavailable: {unavailable}'}), 503
         
-        return jsonify(response)
+        response, cache_status = evaluate_reading(sensor_data, model_type, explain, device_id)
+        return jsonify(response), {'X-Cache': cache_status}
         
     except ValueError as e:
         return jsonify({'error': f'Invalid parameter value: {str(e)}'}), 400
     except Exception as e:
+        logger.exception("Unhandled error in %s", request.path)
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
+# Readings accepted in one /api/live message
+MAX_LIVE_READINGS = 1024
+
+def live_readings(message, options):
+    """
+    Readings of one /api/live message, with the options that apply to them.
+
+    A text message is a JSON object with the /api/detect keys (its
+    model_type, explain and device_id override the connection's for that
+    reading) or a list of such objects; a binary message is one or more
+    28-byte packed records (sensor_codec.py).
+    """
+    if isinstance(message, bytes):
+        records = decode_readings(message)
+        return [(check_finite(dict(zip(SENSOR_COLUMNS, row))), options, None) for row in records.tolist()]
+    data = json.loads(message)
+    items = data if isinstance(data, list) else [data]
+    readings = []
+    for item in items:
+        if not isinstance(item, dict):
+            raise ValueError('Expected a JSON object per reading')
+        missing = [key for key in SENSOR_COLUMNS[:6] if key not in item]
+        if missing:
+            raise ValueError(f'Missing parameter: {missing[0]}')
+        sensor_data = {key: float(item[key]) for key in SENSOR_COLUMNS[:6]}
+        sensor_data['speed'] = float(item.get('speed', 0))
+        check_finite(sensor_data)
+        readings.append((sensor_data, live_options(item, options), item.get('seq')))
+    return readings
+
+def live_options(data, options):
+    """Connection options updated from a config message or the query string."""
+    options = dict(options)
+    if 'model_type' in data:
+        options['model_type'] = str(data['model_type'])
+    if 'explain' in data:
+        options['explain'] = parse_flag(data['explain'])
+    if 'device_id' in data:
+        options['device_id'] = validate_device_id(data['device_id'])
+        if rider_sessions.disabled_reason:
+            raise ValueError(f'Rider sessions are unavailable: {rider_sessions.disabled_reason}')
+    return options
+
+@app.route('/api/live')
+@app.route('/api/live', websocket=True)  # Werkzeug routes upgrade requests to websocket rules only
+def live():
+    """
+    Live telemetry over one WebSocket: stream readings, receive results.
+    Needs Werkzeug's server (python app.py or serve.py); other WSGI servers
+    such as gunicorn answer 501 (see live_channel.py).
+    
+    Connect with ws://host/api/live (optionally ?model_type=...&explain=1
+    &device_id=...). The server first sends
+        {"type": "hello", "model_status": {...}, "max_message_bytes": ...,
+         "max_readings": ...}
+    then answers every client message in order:
+        reading(s) as JSON (object or list, /api/detect keys, optional
+        "seq") or packed binary records
+            -> one {"type": "result", "seq": ..., ...} per reading, the
+               body of the matching /api/detect response
+        {"type": "config", "model_type"/"explain"/"device_id": ...}
+            -> {"type": "config", ...} with the connection's options
+        {"type": "status"} -> {"type": "status", "model_status": {...}}
+    A bad message gets {"type": "error", "error": ...} and the connection
+    stays open.
+    
+    The next message is read only after the previous one was answered, so
+    a client sending faster than it is served is slowed down by TCP flow
+    control (see live_channel.py for the limits).
+    """
+    if not is_websocket_request(request.environ):
+        return jsonify({'error': 'Expected a WebSocket upgrade request'}), 426, {'Upgrade': 'websocket'}
+    unavailable = 'device_id' in request.args and sessions_unavailable(request.environ)
+    if unavailable:
+        return jsonify({'error': f'Rider sessions are unavailable: {unavailable}'}), 503
+    try:
+        state = {'options': live_options(request.args, {'model_type': 'rule-based', 'explain': False,
+                                                        'device_id': None}),
+                 'seq': 0}
+    except ValueError as e:
+        return jsonify({'error': f'Invalid parameter value: {str(e)}'}), 400
+
+    def handle_message(message):
+        try:
+            if isinstance(message, str) and message.lstrip().startswith('{'):
+                data = json.loads(message)
+                if data.get('type') == 'config':
+                    state['options'] = live_options(data, state['options'])
+                    return [dict(state['options'], type='config')]
+                if data.get('type') == 'status':
+                    return [{'type': 'status', 'model_status': model_status_info()}]
+            readings = live_readings(message, state['options'])
+            if len(readings) > MAX_LIVE_READINGS:
+                raise ValueError(f'Too many readings in one message (max {MAX_LIVE_READINGS})')
+            replies = []
+            for sensor_data, options, seq in readings:
+                response, cache_status = evaluate_reading(
+                    sensor_data, options['model_type'], options['explain'], options['device_id'])
+                state['seq'] += 1
+                replies.append(dict(response, type='result', seq=state['seq'] if seq is None else seq,
+                                    cache=cache_status))
+            return replies
+        except (ValueError, TypeError) as e:
+            return [{'type': 'error', 'error': f'Invalid message: {str(e)}'}]
+
+    hello = {'type': 'hello', 'model_status': model_status_info(),
+             'max_message_bytes': live_channel.max_message, 'max_readings': MAX_LIVE_READINGS}
+    error = live_channel.serve(request.environ, handle_message, hello=hello)
+    if error is not None:
+        status, message = error
+        return jsonify({'error': message}), status
+    return UpgradedResponse()
+
+@app.route('/api/live_stats')
+def live_stats():
+    """Open live connections, message counters and disconnected slow consumers."""
+    return jsonify(live_channel.stats())
+
+# Bulk ingest limits
+MAX_BULK_READINGS = 100000
+BULK_CHUNK_SIZE = 4096
+
+def first_non_finite_row(matrix):
+    """Index of the first row holding NaN, an infinity or a JSON null, or None."""
+    bad = ~np.isfinite(matrix).all(axis=1)
+    return int(np.argmax(bad)) if bad.any() else None
+
+def parse_ndjson_readings(body):
+    """
+    Parse a newline-delimited JSON body into an (N, 7) sensor matrix.
+    
+    Each line is either an object with the /api/detect keys (speed optional)
+    or a list of 6-7 numbers in SENSOR_COLUMNS order. Every value must be a
+    finite number.
+    """
+    lines = [line for line in body.splitlines() if line.strip()]
+    if not lines:
+        return np.zeros((0, len(SENSOR_COLUMNS)))
+    if len(lines) > MAX_BULK_READINGS:
+        raise ValueError(f'Too many readings (max {MAX_BULK_READINGS})')
+    
+    # One json.loads call for the whole body instead of one per line
+    rows = json.loads('[' + ','.join(lines) + ']')
+    
+    if isinstance(rows[0], dict):
+        for key in SENSOR_COLUMNS[:6]:
+            missing = next((i for i, row in enumerate(rows) if key not in row), None)
+            if missing is not None:
+                raise ValueError(f'Missing parameter: {key} (line {missing + 1})')
+        matrix = np.array([[row[key] for key in SENSOR_COLUMNS[:6]] + [row.get('speed', 0)]
+                           for row in rows], dtype=np.float64)
+    else:
+        matrix = np.array(rows, dtype=np.float64)
+        if matrix.ndim != 2 or matrix.shape[1] not in (6, 7):
+            raise ValueError('Each line must be an object or a list of 6-7 numbers')
+        if matrix.shape[1] == 6:
+            matrix = np.column_stack([matrix, np.zeros(len(matrix))])
+    
+    # null becomes NaN above; NaN and Infinity literals pass json.loads
+    bad = first_non_finite_row(matrix)
+    if bad is not None:
+        raise ValueError(f'Values must be finite numbers (line {bad + 1})')
+    
+    return matrix
+
+def use_ml_model(model_type):
+    """True if model_type selects an ML model and it is loaded."""
+    return get_ml_detector(model_type) is not None
+
+def run_batch_detection(readings, model_type, rules=None):
+    """
+    Score an (N, 7) matrix with the vectorized detector for model_type
+    (rule-based scores use rules, default the currently loaded ones).
+    
+    Returns:
+        tuple: (is_accident array, confidence array, reasons bitmask array or None)
+    """
+    if use_ml_model(model_type):
+        is_accident, confidence = get_ml_detector(model_type).predict_batch(readings)
+        return is_accident, confidence, None
+    return detector.detect_batch(readings, rules)
+
+def stream_bulk_results(readings, model_type, rules):
+    """Yield NDJSON result lines, scoring one chunk at a time."""
+    for start in range(0, len(readings), BULK_CHUNK_SIZE):
+        chunk = readings[start:start + BULK_CHUNK_SIZE]
+        is_accident, confidence, reasons = run_batch_detection(chunk, model_type, rules)
+        if reasons is None:
+            lines = [f'[{int(a)},{c:.4f}]' for a, c in zip(is_accident.tolist(), confidence.tolist())]
+        else:
+            lines = [f'[{int(a)},{c:.4f},{r}]' for a, c, r in
+                     zip(is_accident.tolist(), confidence.tolist(), reasons.tolist())]
+        yield '\n'.join(lines) + '\n'
+
+@app.route('/api/detect/bulk', methods=['POST'])
+def detect_bulk():
+    """
+    Detect accidents for many readings in one request.
+    
+    Body: newline-delimited JSON, one reading per line, either
+        {"acc_x": .., "acc_y": .., "acc_z": .., "gyro_x": .., "gyro_y": .., "gyro_z": .., "speed": ..}
+    or
+        [acc_x, acc_y, acc_z, gyro_x, gyro_y, gyro_z, speed]
+    or, with Content-Type: application/vnd.bike-sensor.f32, packed 28-byte
+    float32 records (see sensor_codec.py), decoded without copying.
+    
+    Query parameters:
+        model_type: 'rule-based' (default), 'ml' or 'ml-hgb'
+    
+    Response (streamed, application/x-ndjson): one line per reading, in order,
+        [is_accident (0/1), confidence (0-1), reasons bitmask]   (rule-based)
+        [is_accident (0/1), confidence (0-1)]                    (ml, ml-hgb)
+    Bit i of the reasons bitmask is the i-th name in the X-Reason-Flags
+    response header (comma-separated) of the rules version in
+    X-Rules-Version; the whole response is scored with that one version,
+    even if the rules are reloaded while it streams.
+    """
+    try:
+        if is_sensor_record_type(request.content_type):
+            readings = decode_readings(request.get_data())
+            if len(readings) > MAX_BULK_READINGS:
+                raise ValueError(f'Too many readings (max {MAX_BULK_READINGS})')
+            bad = first_non_finite_row(readings)
+            if bad is not None:
+                raise ValueError(f'Values must be finite numbers (record {bad + 1})')
+        else:
+            readings = parse_ndjson_readings(request.get_data(as_text=True))
+    except ValueError as e:
+        return jsonify({'error': f'Invalid bulk body: {str(e)}'}), 400
+    
+    model_type = request.args.get('model_type', 'rule-based')
+    model_used = model_display_name(model_type)
+    rules = detector.rules
+    
+    response = Response(stream_with_context(stream_bulk_results(readings, model_type, rules)),
+                        mimetype='application/x-ndjson')
+    response.headers['X-Model-Used'] = model_used
+    response.headers['X-Reading-Count'] = str(len(readings))
+    if not use_ml_model(model_type):
+        response.headers['X-Rules-Version'] = str(rules.version)
+        response.headers['X-Reason-Flags'] = ','.join(rules.flags)
+    return response
+
+# Batch test worker pool (threads: NumPy and the tree traversal release the GIL,
+# and the loaded models are shared instead of copied into each worker)
+BATCH_TEST_CHUNK_SIZE = 2048
+BATCH_TEST_WORKERS = min(8, os.cpu_count() or 1)
+batch_pool = None
+_batch_pool_lock = threading.Lock()
+
+def get_batch_pool():
+    """Create the batch test worker pool on first use (once per process)."""
+    global batch_pool
+    if batch_pool is None:
+        with _batch_pool_lock:
+            if batch_pool is None:
+                batch_pool = ThreadPoolExecutor(max_workers=BATCH_TEST_WORKERS, thread_name_prefix='batch-test')
+    return batch_pool
+
+def _reset_batch_pool():
+    # A forked worker does not inherit the parent's pool threads
+    global batch_pool, _batch_pool_lock
+    batch_pool = None
+    _batch_pool_lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_batch_pool)
+
+def run_batch_detection_chunked(readings, model_type, rules=None):
+    """Run run_batch_detection over fixed-size chunks spread across the worker pool."""
+    if len(readings) <= BATCH_TEST_CHUNK_SIZE:
+        return run_batch_detection(readings, model_type, rules)
+    
+    chunks = [readings[i:i + BATCH_TEST_CHUNK_SIZE] for i in range(0, len(readings), BATCH_TEST_CHUNK_SIZE)]
+    parts = list(get_batch_pool().map(lambda chunk: run_batch_detection(chunk, model_type, rules), chunks))
+    is_accident = np.concatenate([part[0] for part in parts])
+    confidence = np.concatenate([part[1] for part in parts])
+    reasons = None if parts[0][2] is None else np.concatenate([part[2] for part in parts])
+    return is_accident, confidence, reasons
+
+def batch_reason_text(model, is_accident, confidence, reasons, sensor_data, rules):
+    """Reason string for one batch result, as the scalar detectors word it."""
+    if model in ML_MODEL_TYPES:
+        return describe_prediction(is_accident, confidence)
+    return reason_text(rules.messages(reasons, scalar_features(sensor_data)) if reasons else [])
+
 @app.route('/api/batch_test', methods=['POST'])
 def batch_test():
     """
@@ -345,80 +807,144 @@ def batch_test():
     
     Expected JSON format:
     {
+        "model_type": "rule-based" | "ml" | "ml-hgb" | "both"   (optional, default rule-based),
         "scenarios": [
             {"name": "Test 1", "data": {...}, "expected": true/false},
             ...
         ]
     }
+    
+    Scenarios are scored through the batched detectors in chunks spread over
+    a worker pool. Statistics include per-model accuracy and timing and,
+    with "both" (rule-based plus every loaded ML model), the rate at which
+    each ML model agrees with the rule-based detector.
     """
     try:
         data = request.get_json()
         scenarios = data.get('scenarios', [])
+        model_type = data.get('model_type', 'rule-based')
         
-        results = []
-        for scenario in scenarios:
+        if model_type == 'both':
+            models = ['rule-based'] + [model for model in ML_MODEL_TYPES if get_ml_detector(model) is not None]
+        elif model_type in ML_MODEL_TYPES:
+            if get_ml_detector(model_type) is None:
+                return jsonify({'error': 'ML model not available'}), 400
+            models = [model_type]
+        else:
+            models = ['rule-based']
+        
+        # Build the (N, 7) reading matrix once for all models
+        readings = np.zeros((len(scenarios), len(SENSOR_COLUMNS)))
+        for i, scenario in enumerate(scenarios):
             sensor_data = scenario.get('data', {})
-            is_accident, confidence, reason = detector.detect_accident(sensor_data)
+            for j, key in enumerate(SENSOR_COLUMNS):
+                if key in sensor_data:
+                    value = sensor_data[key]
+                    if value is None or isinstance(value, bool) or not isinstance(value, (int, float, str)):
+                        return jsonify({'error': f"Invalid parameter value: {key} (scenario {i})"}), 400
+                    readings[i, j] = float(value)
+                elif key != 'speed':
+                    return jsonify({'error': f"Missing parameter: {key} (scenario {i})"}), 400
+        
+        expected = [scenario.get('expected') for scenario in scenarios]
+        has_expected = np.array([value is not None for value in expected], dtype=bool)
+        expected_array = np.array([bool(value) for value in expected], dtype=bool)
+        
+        # Rules snapshot for both the batch scores and their reason messages
+        rules = detector.rules
+        predictions = {}
+        model_stats = {}
+        for model in models:
+            start = time.perf_counter()
+            is_accident, confidence, reasons = run_batch_detection_chunked(readings, model, rules)
+            elapsed = time.perf_counter() - start
+            predictions[model] = (is_accident, confidence, reasons)
             
+            correct = int((is_accident == expected_array)[has_expected].sum())
+            model_stats[model] = {
+                'correct': correct,
+                'accuracy': (correct / int(has_expected.sum())) if has_expected.any() else None,
+                'accidents_detected': int(is_accident.sum()),
+                'seconds': elapsed,
+                'samples_per_second': (len(readings) / elapsed) if elapsed > 0 else None
+            }
+        
+        results = []
+        for i, scenario in enumerate(scenarios):
             result = {
                 'name': scenario.get('name', 'Unnamed'),
-                'is_accident': bool(is_accident),
-                'confidence': float(confidence),
-                'reason': reason,
-                'expected': scenario.get('expected', None),
-                'correct': is_accident == scenario.get('expected') if 'expected' in scenario else None
+                'expected': expected[i]
             }
+            for model in models:
+                is_accident, confidence, reasons = predictions[model]
+                model_result = {
+                    'is_accident': bool(is_accident[i]),
+                    'confidence': float(confidence[i]),
+                    'reason': batch_reason_text(model, is_accident[i], confidence[i],
+                                                None if reasons is None else int(reasons[i]),
+                                                dict(zip(SENSOR_COLUMNS, readings[i].tolist())), rules),
+                    'correct': bool(is_accident[i] == expected_array[i]) if has_expected[i] else None
+                }
+                if model == models[0]:
+                    # Primary model keeps the original flat response fields
+                    result.update(model_result)
+                if len(models) > 1:
+                    result.setdefault('models', {})[model] = model_result
             results.append(result)
         
         # Calculate statistics
-        total = len(results)
-        with_expectations = [r for r in results if r['expected'] is not None]
-        correct = sum(1 for r in with_expectations if r['correct'])
-        accuracy = (correct / len(with_expectations)) if with_expectations else None
+        primary = model_stats[models[0]]
+        statistics = {
+            'total': len(results),
+            'correct': primary['correct'],
+            'accuracy': primary['accuracy'],
+            'model_type': model_type,
+            'models': model_stats,
+            'chunk_size': BATCH_TEST_CHUNK_SIZE,
+            'workers': BATCH_TEST_WORKERS
+        }
+        if len(models) > 1:
+            # Agreement of every ML model with the rule-based detector
+            agreement = {}
+            for model in models[1:]:
+                agree = predictions['rule-based'][0] == predictions[model][0]
+                agreement[model] = float(agree.mean()) if len(agree) else None
+            statistics['agreement'] = agreement
+            statistics['agreement_rate'] = agreement[models[1]]
         
         return jsonify({
             'results': results,
-            'statistics': {
-                'total': total,
-                'correct': correct,
-                'accuracy': accuracy
-            }
+            'statistics': statistics
         })
         
+    except ValueError as e:
+        return jsonify({'error': f'Invalid parameter value: {str(e)}'}), 400
     except Exception as e:
+        logger.exception("Unhandled error in %s", request.path)
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
 @app.route('/api/system_info')
 def system_info():
-    """Get information about the detection system."""
+    """Get information about the detection system (from the active rules config)."""
+    rules = detector.rules
+    thresholds = dict(rules.summary['detection_rules'])
+    thresholds['confidence'] = {
+        'threshold': f'{rules.accident_threshold:.0%}',
+        'description': 'Minimum confidence to classify as accident'
+    }
     return jsonify({
         'system_type': 'Rule-Based Physics Detection',
-        'version': '1.0',
+        'version': rules.version,
+        'rules_loaded_at': datetime.fromtimestamp(detector.rule_engine.loaded_at).isoformat(),
         'features': [
             'Acceleration magnitude detection',
             'Gyroscope rotation analysis',
             'Combined system shock detection',
             'Individual axis extreme detection',
+            'Speed-based collision detection',
             'Confidence scoring'
         ],
-        'thresholds': {
-            'acceleration': {
-                'severe': '20G+',
-                'high': '15-20G',
-                'moderate': '10-15G',
-                'normal': '<10G'
-            },
-            'rotation': {
-                'severe': '30°/s+',
-                'high': '20-30°/s',
-                'moderate': '10-20°/s',
-                'normal': '<10°/s'
-            },
-            'confidence': {
-                'threshold': '30%',
-                'description': 'Minimum confidence to classify as accident'
-            }
-        }
+        'thresholds': thresholds
     })
 
 if __name__ == '__main__':
@@ -426,11 +952,13 @@ if __name__ == '__main__':
     print("🚀 ACCIDENT DETECTION SIMULATION SERVER")
     print("=" * 70)
     print("✅ Rule-based model loaded successfully")
-    if ml_detector:
-        print("✅ ML model (Random Forest) loaded successfully")
-    else:
+    for ml_model_type, backend in ML_MODEL_TYPES.items():
+        if ml_model_available(ml_model_type):
+            print(f"✅ ML model '{ml_model_type}' ({MODEL_BACKENDS[backend]['name']}) found, loads on first use")
+    if not ml_model_available('ml'):
         print("⚠️  ML model not available (run: python ml_accident_detector.py)")
     print("🌐 Starting web server...")
     print("📱 Open http://localhost:5000 in your browser")
+    print("🏭 Development server; for production run: python serve.py --workers N")
     print("=" * 70)
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,738 @@
+"""
+⚡ COMPILED RANDOM FOREST - FLAT ARRAY INFERENCE ENGINE
+======================================================
+Flattens the trained RandomForest from ml_accident_model.pkl into a handful
+of contiguous NumPy arrays and walks all trees for all samples at once.
+
+- The StandardScaler is folded into the split thresholds, so raw features
+  are compared directly (no per-call scaling or sklearn validation).
+- Folded thresholds are searched bit-exactly, so predictions are identical
+  to MLAccidentDetector.predict, not just close.
+- The runtime needs only NumPy; scikit-learn is needed to export.
+
+Compaction (--compact) shrinks the forest for serving: trees are cut at a
+depth limit, trees that add nothing on validation data are dropped, and
+the file stores thresholds as float16 and leaf probabilities as uint8.
+The accuracy delta against the full model is reported on held-out data.
+
+Usage:
+    python compiled_forest.py                       # export + verify
+    python compiled_forest.py --compact --max-depth 12
+    python compiled_forest.py --mmap                # ml_accident_model.mmap/
+    python compiled_forest.py --benchmark           # single-reading latency
+    forest = CompiledForest.load('ml_accident_model_compiled.npz')
+    forest = CompiledForest.load_mmap('ml_accident_model.mmap')
+    is_accident, confidence, reason = forest.predict(sensor_data)
+"""
+
+import argparse
+import json
+import math
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+from sensor_features import FeaturePipeline
+from model_backends import MODEL_BACKENDS, mmap_model_dir, describe_prediction
+from working_accident_system import SENSOR_COLUMNS
+
+COMPILED_MODEL_PATH = 'ml_accident_model_compiled.npz'
+COMPACT_MODEL_PATH = 'ml_accident_model_compact.npz'
+
+# Version of the save_mmap directory layout
+MMAP_FORMAT_VERSION = 1
+_MMAP_ARRAYS = ('feature2', 'threshold2', 'children2', 'roots2', 'value', 'classes')
+
+# Levels walked between two looks at the remaining subtree heights in
+# single-sample traversal (each look costs about as much as one level)
+HEIGHT_CHECK_INTERVAL = 4
+
+_SIGN_MASK = np.int64(0x7FFFFFFFFFFFFFFF)
+
+
+def _ordered_keys(values):
+    """Map float64 values to int64 keys with the same ordering (an involution)."""
+    bits = np.asarray(values, dtype=np.float64).view(np.int64)
+    return bits ^ ((bits >> 63) & _SIGN_MASK)
+
+
+def _from_ordered_keys(keys):
+    """Inverse of _ordered_keys."""
+    keys = np.asarray(keys, dtype=np.int64)
+    return (keys ^ ((keys >> 63) & _SIGN_MASK)).view(np.float64)
+
+
+def fold_scaler_thresholds(thresholds, mean, scale):
+    """
+    Move split thresholds from scaled space into raw feature space.
+
+    sklearn splits on float32((x - mean) / scale) <= t. That map is monotone
+    in x, so the samples going left are exactly x <= t_raw for the largest
+    float64 t_raw that still goes left. We find it with a vectorized
+    bisection over the ordered bit patterns of float64.
+
+    Args:
+        thresholds: scaled-space thresholds (one per node)
+        mean, scale: per-node scaler statistics for the split feature
+
+    Returns:
+        float64 array of raw-space thresholds
+    """
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    mean = np.asarray(mean, dtype=np.float64)
+    scale = np.asarray(scale, dtype=np.float64)
+
+    def goes_left(keys):
+        x = _from_ordered_keys(keys)
+        with np.errstate(over='ignore', invalid='ignore'):
+            scaled = ((x - mean) / scale).astype(np.float32).astype(np.float64)
+        return scaled <= thresholds
+
+    # Invariant: goes_left(lo) is True, goes_left(hi) is False
+    lo = np.full(thresholds.shape, _ordered_keys(-np.inf), dtype=np.int64)
+    hi = np.full(thresholds.shape, _ordered_keys(np.inf), dtype=np.int64)
+    for _ in range(66):
+        mid = (lo >> 1) + (hi >> 1) + (lo & hi & 1)
+        left = goes_left(mid)
+        lo = np.where(left, mid, lo)
+        hi = np.where(left, hi, mid)
+    return _from_ordered_keys(lo)
+
+
+class CompiledForest:
+    """A RandomForest flattened into contiguous node arrays."""
+
+    # Drop-in for a Random Forest MLAccidentDetector (see app.py)
+    backend = 'random_forest'
+    backend_name = MODEL_BACKENDS['random_forest']['name']
+
+    def __init__(self, feature, threshold, left, right, value, roots, classes,
+                 max_depth, feature_names):
+        # Node arrays span all trees; child indices are absolute. Leaves point
+        # to themselves with an infinite threshold so traversal needs no masks.
+        feature = np.ascontiguousarray(feature, dtype=np.intp)
+        threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        children = np.stack([np.asarray(left, dtype=np.intp), np.asarray(right, dtype=np.intp)], axis=1)
+
+        # Runtime layout: node i owns slots 2i (go left) and 2i+1 (go right),
+        # so one level of traversal is child[slot + (x > threshold)]
+        self._init_runtime(np.repeat(feature, 2), np.repeat(threshold, 2), 2 * children.ravel(),
+                           2 * np.asarray(roots, dtype=np.intp),
+                           np.ascontiguousarray(value, dtype=np.float64),
+                           classes, max_depth, feature_names)
+
+    def _init_runtime(self, feature2, threshold2, children2, roots2, value, classes,
+                      max_depth, feature_names):
+        """Set up from the runtime arrays (shared by __init__ and load_mmap)."""
+        self._feature2 = feature2
+        self._threshold2 = threshold2
+        self._children2 = children2
+        self._roots2 = roots2
+        self.value = value
+        self.classes = np.asarray(classes)
+        self.max_depth = int(max_depth)
+        self.feature_names = list(feature_names)
+        self._accident_column = int(np.flatnonzero(self.classes == 1)[0])
+        self._heights2 = None  # Built on the first single-sample prediction
+        self.pipeline = FeaturePipeline.from_feature_names(self.feature_names, dtype=np.float64)
+
+    # Per-node views of the runtime arrays
+    @property
+    def feature(self):
+        return self._feature2[::2]
+
+    @property
+    def threshold(self):
+        return self._threshold2[::2]
+
+    @property
+    def left(self):
+        return self._children2[0::2] >> 1
+
+    @property
+    def right(self):
+        return self._children2[1::2] >> 1
+
+    @property
+    def roots(self):
+        return self._roots2 >> 1
+
+    @classmethod
+    def from_sklearn(cls, model, scaler, feature_names):
+        """
+        Compile a fitted RandomForestClassifier and its StandardScaler.
+
+        Args:
+            model: fitted RandomForestClassifier
+            scaler: fitted StandardScaler applied before the model
+            feature_names: model input columns
+
+        Returns:
+            CompiledForest
+        """
+        n_features = len(feature_names)
+        mean = getattr(scaler, 'mean_', None)
+        scale = getattr(scaler, 'scale_', None)
+        mean = np.zeros(n_features) if mean is None else np.asarray(mean, dtype=np.float64)
+        scale = np.ones(n_features) if scale is None else np.asarray(scale, dtype=np.float64)
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            is_leaf = tree.children_left < 0
+            node_ids = np.arange(n_nodes) + offset
+
+            feature = np.where(is_leaf, 0, tree.feature)
+            threshold = np.where(is_leaf, np.inf, tree.threshold)
+            internal = ~is_leaf
+            threshold[internal] = fold_scaler_thresholds(
+                threshold[internal], mean[feature[internal]], scale[feature[internal]])
+
+            # Older sklearn stores weighted counts in value; newer stores fractions
+            value = tree.value[:, 0, :len(model.classes_)].astype(np.float64)
+            totals = value.sum(axis=1, keepdims=True)
+            if not np.allclose(totals, 1.0):
+                totals[totals == 0] = 1.0
+                value = value / totals
+
+            features.append(feature)
+            thresholds.append(threshold)
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset))
+            rights.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+            values.append(value)
+            roots.append(offset)
+            offset += n_nodes
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(np.concatenate(features), np.concatenate(thresholds),
+                   np.concatenate(lefts), np.concatenate(rights),
+                   np.concatenate(values), np.array(roots), model.classes_,
+                   max_depth, feature_names)
+
+    @classmethod
+    def from_detector(cls, ml_detector):
+        """Compile the model held by a loaded MLAccidentDetector."""
+        if ml_detector.model is None:
+            raise ValueError("No model loaded! Train or load a model first.")
+        if getattr(ml_detector, 'backend', 'random_forest') != 'random_forest':
+            raise ValueError(f"Only Random Forest models can be compiled, not {ml_detector.backend_name}")
+        return cls.from_sklearn(ml_detector.model, ml_detector.scaler, ml_detector.feature_names)
+
+    def save(self, filepath=COMPILED_MODEL_PATH, compact=False):
+        """
+        Save the node arrays to an .npz file.
+
+        Args:
+            filepath: output path
+            compact: store thresholds as float16, leaf probabilities as
+                     uint8 and indices as uint8/int32 (binary models only).
+                     Lossy unless the forest is already quantized().
+        """
+        if not compact:
+            np.savez(filepath, feature=self.feature, threshold=self.threshold,
+                     left=self.left, right=self.right, value=self.value,
+                     roots=self.roots, classes=self.classes,
+                     max_depth=np.array(self.max_depth),
+                     feature_names=np.array(self.feature_names))
+        else:
+            if len(self.classes) != 2 or len(self.feature_names) > 256 or len(self.feature) >= 2**31:
+                raise ValueError("Compact format needs a binary forest with < 256 features and < 2^31 nodes")
+            np.savez(filepath, feature=self.feature.astype(np.uint8),
+                     threshold=self.threshold.astype(np.float16),
+                     left=self.left.astype(np.int32), right=self.right.astype(np.int32),
+                     leaf_proba=self._quantized_proba(),
+                     roots=self.roots.astype(np.int32), classes=self.classes,
+                     max_depth=np.array(self.max_depth),
+                     feature_names=np.array(self.feature_names))
+        print(f"💾 Compiled forest saved to: {filepath} ({os.path.getsize(filepath) / 1024:.0f} KB)")
+
+    @classmethod
+    def load(cls, filepath=COMPILED_MODEL_PATH):
+        """Load a compiled forest saved with save() (full or compact)."""
+        with np.load(filepath, allow_pickle=False) as data:
+            classes = data['classes']
+            if 'leaf_proba' in data:
+                value = cls._dequantize_proba(data['leaf_proba'], classes)
+            else:
+                value = data['value']
+            return cls(data['feature'], data['threshold'], data['left'],
+                       data['right'], value, data['roots'],
+                       classes, int(data['max_depth']),
+                       [str(name) for name in data['feature_names']])
+
+    def save_mmap(self, dirpath, source=None):
+        """
+        Save the runtime arrays as a directory of .npy files for load_mmap.
+
+        Args:
+            dirpath: output directory (replaced atomically)
+            source: model file this was compiled from; its size and mtime
+                    are recorded so load_mmap can reject a stale export
+        """
+        parent = os.path.dirname(os.path.abspath(dirpath))
+        tmp_dir = tempfile.mkdtemp(prefix='.mmap-', dir=parent)
+        try:
+            arrays = {'feature2': self._feature2, 'threshold2': self._threshold2,
+                      'children2': self._children2, 'roots2': self._roots2,
+                      'value': self.value, 'classes': self.classes}
+            for name in _MMAP_ARRAYS:
+                np.save(os.path.join(tmp_dir, f'{name}.npy'), np.ascontiguousarray(arrays[name]))
+            manifest = {
+                'format': MMAP_FORMAT_VERSION,
+                'max_depth': self.max_depth,
+                'feature_names': self.feature_names,
+                'source': self._source_stamp(source) if source else None,
+            }
+            with open(os.path.join(tmp_dir, 'manifest.json'), 'w') as f:
+                json.dump(manifest, f, indent=1)
+            # Workers that mapped the old files keep reading them until they reload
+            if os.path.isdir(dirpath):
+                shutil.rmtree(dirpath)
+            os.replace(tmp_dir, dirpath)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        print(f"💾 Memory-mappable forest saved to: {dirpath}")
+
+    @classmethod
+    def load_mmap(cls, dirpath, source=None):
+        """
+        Map a save_mmap directory read-only.
+
+        Nothing is unpickled or copied: the node arrays are file-backed
+        pages the OS shares between every process mapping them (e.g.
+        forked server workers).
+
+        Args:
+            dirpath: directory written by save_mmap
+            source: model file the export must still match (size, mtime)
+
+        Raises:
+            FileNotFoundError: no export at dirpath
+            ValueError: unknown format version or stale export
+        """
+        manifest_path = os.path.join(dirpath, 'manifest.json')
+        if not os.path.exists(manifest_path):
+            raise FileNotFoundError(f"Memory-mapped model not found: {dirpath}")
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest.get('format') != MMAP_FORMAT_VERSION:
+            raise ValueError(f"Unsupported memory-mapped model format: {manifest.get('format')}")
+        if source is not None and manifest.get('source') != cls._source_stamp(source):
+            raise ValueError(f"{dirpath} is stale: {source} changed since it was exported")
+
+        arrays = {name: np.asarray(np.load(os.path.join(dirpath, f'{name}.npy'), mmap_mode='r'))
+                  for name in _MMAP_ARRAYS}
+        forest = cls.__new__(cls)
+        forest._init_runtime(arrays['feature2'], arrays['threshold2'], arrays['children2'],
+                             arrays['roots2'], arrays['value'], arrays['classes'],
+                             manifest['max_depth'], manifest['feature_names'])
+        return forest
+
+    @staticmethod
+    def _source_stamp(path):
+        stat = os.stat(path)
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def _quantized_proba(self):
+        """Accident probability of every node in 1/255 steps."""
+        return np.rint(self.value[:, self._accident_column] * 255).astype(np.uint8)
+
+    @staticmethod
+    def _dequantize_proba(leaf_proba, classes):
+        accident = (np.asarray(leaf_proba, dtype=np.float64) / 255)[:, None]
+        return np.where(np.asarray(classes)[None, :] == 1, accident, 1.0 - accident)
+
+    def quantized(self):
+        """
+        The forest exactly as save(compact=True) stores it: float16
+        thresholds and uint8 leaf probabilities.
+        """
+        return CompiledForest(self.feature, self.threshold.astype(np.float16),
+                              self.left, self.right,
+                              self._dequantize_proba(self._quantized_proba(), self.classes),
+                              self.roots, self.classes, self.max_depth, self.feature_names)
+
+    def subforest(self, trees=None, max_depth=None):
+        """
+        A new forest with only the given trees, each cut at max_depth.
+
+        Nodes at the depth limit become leaves holding their training class
+        distribution (stored for every node by from_sklearn). Unreachable
+        nodes are dropped and each tree is laid out breadth-first.
+
+        Args:
+            trees: tree indices to keep (default: all)
+            max_depth: depth limit (default: none)
+
+        Returns:
+            CompiledForest
+        """
+        trees = range(self.n_trees) if trees is None else trees
+        node_feature, node_threshold, node_left, node_right, roots = (
+            self.feature, self.threshold, self.left, self.right, self.roots)
+        features, thresholds, lefts, rights, values, new_roots = [], [], [], [], [], []
+        offset = 0
+        depth_reached = 0
+        for tree in trees:
+            levels, leaf_flags = [], []
+            level = roots[tree:tree + 1]
+            depth = 0
+            while len(level):
+                is_leaf = node_left.take(level) == level
+                if max_depth is not None and depth >= max_depth:
+                    is_leaf = np.ones(len(level), dtype=bool)
+                levels.append(level)
+                leaf_flags.append(is_leaf)
+                internal = level[~is_leaf]
+                level = np.stack([node_left.take(internal), node_right.take(internal)], axis=1).ravel()
+                depth += 1
+            depth_reached = max(depth_reached, depth - 1)
+
+            old = np.concatenate(levels)
+            is_leaf = np.concatenate(leaf_flags)
+            internal = ~is_leaf
+            order = np.argsort(old)
+            new_ids = np.arange(len(old)) + offset
+
+            def renumber(nodes):
+                return new_ids[order[np.searchsorted(old, nodes, sorter=order)]]
+
+            left = new_ids.copy()
+            right = new_ids.copy()
+            left[internal] = renumber(node_left.take(old[internal]))
+            right[internal] = renumber(node_right.take(old[internal]))
+            features.append(np.where(is_leaf, 0, node_feature.take(old)))
+            thresholds.append(np.where(is_leaf, np.inf, node_threshold.take(old)))
+            lefts.append(left)
+            rights.append(right)
+            values.append(self.value.take(old, axis=0))
+            new_roots.append(offset)
+            offset += len(old)
+
+        return CompiledForest(np.concatenate(features), np.concatenate(thresholds),
+                              np.concatenate(lefts), np.concatenate(rights),
+                              np.concatenate(values), np.array(new_roots), self.classes,
+                              depth_reached, self.feature_names)
+
+    @property
+    def n_trees(self):
+        return len(self._roots2)
+
+    def _block_leaves(self, block, n_features):
+        """(n_trees, n) leaf node ids for one block of raw feature rows."""
+        n = len(block) // n_features
+        # Tree-major cursors: slot of (tree t, sample i) at t * n + i
+        slots = np.repeat(self._roots2, n)
+        row_offsets = np.tile(np.arange(n) * n_features, self.n_trees)
+        for _ in range(self.max_depth):
+            x = block.take(self._feature2.take(slots) + row_offsets)
+            slots = self._children2.take(slots + (x > self._threshold2.take(slots)))
+        return (slots >> 1).reshape(self.n_trees, n)
+
+    def apply(self, features, block_size=1024):
+        """(n_trees, N) leaf node id reached by each sample in each tree."""
+        X = np.asarray(features, dtype=np.float64)
+        n_samples, n_features = X.shape
+        leaves = np.empty((self.n_trees, n_samples), dtype=np.intp)
+        for start in range(0, n_samples, block_size):
+            block = np.ascontiguousarray(X[start:start + block_size]).ravel()
+            leaves[:, start:start + block_size] = self._block_leaves(block, n_features)
+        return leaves
+
+    def predict_proba_features(self, features, block_size=1024):
+        """
+        Class probabilities for raw (unscaled) (N, 9) feature rows.
+
+        All trees are walked in lock-step for a block of samples: one gather
+        per level, max_depth levels. Leaf values are summed tree by tree in
+        the same order as RandomForestClassifier.predict_proba.
+        """
+        X = np.asarray(features, dtype=np.float64)
+        n_samples, n_features = X.shape
+        proba = np.empty((n_samples, self.value.shape[1]), dtype=np.float64)
+
+        for start in range(0, n_samples, block_size):
+            block = np.ascontiguousarray(X[start:start + block_size]).ravel()
+            leaves = self._block_leaves(block, n_features)
+            proba[start:start + leaves.shape[1]] = self.value.take(leaves, axis=0).sum(axis=0)
+
+        proba /= self.n_trees
+        return proba
+
+    def _subtree_heights2(self):
+        """Per slot: levels from the node down to its deepest leaf."""
+        left, right = self.left, self.right
+        leaf = left == np.arange(len(left))
+        heights = np.zeros(len(left), dtype=np.intp)
+        for _ in range(self.max_depth):
+            heights = np.where(leaf, 0, 1 + np.maximum(heights.take(left), heights.take(right)))
+        return np.repeat(heights, 2)
+
+    def _predict_proba_row(self, x):
+        """
+        Single-sample traversal (x is one raw feature row).
+
+        Every HEIGHT_CHECK_INTERVAL levels the walk looks up the tallest
+        subtree still below the current nodes and stops after exactly that
+        many more levels, instead of always walking max_depth levels.
+        """
+        if self._heights2 is None:
+            self._heights2 = self._subtree_heights2()
+        slots = self._roots2
+        remaining = self.max_depth
+        while remaining > 0:
+            for _ in range(min(remaining, HEIGHT_CHECK_INTERVAL)):
+                slots = self._children2.take(slots + (x.take(self._feature2.take(slots)) > self._threshold2.take(slots)))
+            remaining = int(self._heights2.take(slots).max())
+        proba = self.value.take(slots >> 1, axis=0).sum(axis=0)
+        proba /= self.n_trees
+        return proba
+
+    def predict_batch(self, data, groups=None):
+        """
+        Predict many raw sensor readings at once.
+
+        Args:
+            data: (N, 7) array or DataFrame of raw sensor readings
+            groups: optional per-row stream id (temporal feature models only)
+
+        Returns:
+            tuple: (is_accident: bool array, confidence: float array)
+        """
+        proba = self.predict_proba_features(self.pipeline.transform(data, groups=groups))
+        labels = self.classes.take(np.argmax(proba, axis=1))
+        return labels == 1, proba[:, self._accident_column]
+
+    def predict(self, sensor_data):
+        """
+        Drop-in replacement for MLAccidentDetector.predict.
+
+        Args:
+            sensor_data: dict with keys acc_x, acc_y, acc_z, gyro_x, gyro_y, gyro_z, speed
+
+        Returns:
+            tuple: (is_accident: bool, confidence: float, reason: str)
+        """
+        if self.pipeline.temporal:
+            is_accident, confidence = self.predict_batch([[sensor_data.get(col, 0) for col in SENSOR_COLUMNS]])
+            return self._result(bool(is_accident[0]), float(confidence[0]))
+
+        # Same arithmetic as FeaturePipeline, without the array round-trip
+        acc = [float(sensor_data[key]) for key in ('acc_x', 'acc_y', 'acc_z')]
+        gyro = [float(sensor_data[key]) for key in ('gyro_x', 'gyro_y', 'gyro_z')]
+        acc_magnitude = math.sqrt(acc[0] * acc[0] + acc[1] * acc[1] + acc[2] * acc[2])
+        gyro_magnitude = math.sqrt(gyro[0] * gyro[0] + gyro[1] * gyro[1] + gyro[2] * gyro[2])
+        x = np.array(acc + gyro + [acc_magnitude, gyro_magnitude, float(sensor_data.get('speed', 0))])
+
+        proba = self._predict_proba_row(x)
+        return self._result(bool(self.classes[np.argmax(proba)] == 1), float(proba[self._accident_column]))
+
+    @staticmethod
+    def _result(prediction, confidence):
+        """(is_accident, confidence, reason) in MLAccidentDetector.predict form."""
+        return prediction, confidence, describe_prediction(prediction, confidence)
+
+
+def evaluate(forest, features, labels):
+    """Accuracy and accident recall of a forest on raw (N, 9) feature rows."""
+    proba = forest.predict_proba_features(features)
+    predicted = forest.classes.take(np.argmax(proba, axis=1)) == 1
+    actual = np.asarray(labels) == 1
+    return {
+        'accuracy': float((predicted == actual).mean()),
+        'recall': float((predicted & actual).sum() / max(actual.sum(), 1)),
+    }
+
+
+def prune_trees(forest, features, labels, max_accuracy_drop=0.002, min_trees=10):
+    """
+    Greedily drop the trees that contribute least on validation data.
+
+    Each round removes the tree whose removal keeps validation accuracy
+    highest, as long as accuracy and accident recall stay within
+    max_accuracy_drop of the full forest.
+
+    Args:
+        forest: binary CompiledForest
+        features, labels: validation rows (raw features) and 0/1 labels
+        max_accuracy_drop: allowed loss in accuracy and in recall
+        min_trees: never keep fewer trees
+
+    Returns:
+        sorted list of kept tree indices
+    """
+    if len(forest.classes) != 2:
+        raise ValueError("Tree pruning supports binary forests only")
+    actual = np.asarray(labels) == 1
+    n_accidents = max(int(actual.sum()), 1)
+    # Accident probability of every tree for every sample; a sample is an
+    # accident when the summed probability beats the summed normal one
+    per_tree = forest.value[:, forest._accident_column].take(forest.apply(features)).astype(np.float64)
+    total = per_tree.sum(axis=0)
+
+    def scores(sums, n_trees):
+        predicted = 2 * sums > n_trees
+        accuracy = (predicted == actual).mean(axis=-1)
+        recall = (predicted & actual).sum(axis=-1) / n_accidents
+        return accuracy, recall
+
+    base_accuracy, base_recall = scores(total, forest.n_trees)
+    kept = list(range(forest.n_trees))
+    while len(kept) > min_trees:
+        accuracy, recall = scores(total[None, :] - per_tree[kept], len(kept) - 1)
+        allowed = ((accuracy >= base_accuracy - max_accuracy_drop) &
+                   (recall >= base_recall - max_accuracy_drop))
+        if not allowed.any():
+            break
+        best = int(np.argmax(np.where(allowed, accuracy, -1.0)))
+        total -= per_tree[kept[best]]
+        del kept[best]
+    return sorted(kept)
+
+
+def compact_forest(forest, features, labels, max_depth=12, max_accuracy_drop=0.002, min_trees=10):
+    """
+    Depth-limit, prune and quantize a forest for serving.
+
+    Args:
+        forest: full CompiledForest
+        features, labels: validation rows used to choose the trees
+        max_depth: depth limit applied to every tree
+        max_accuracy_drop: allowed validation loss from pruning trees
+        min_trees: never keep fewer trees
+
+    Returns:
+        tuple: (quantized CompiledForest ready for save(compact=True),
+                list of (stage, n_trees, n_nodes, max_depth) rows)
+    """
+    stages = [('original', forest.n_trees, len(forest.feature), forest.max_depth)]
+    shallow = forest.subforest(max_depth=max_depth)
+    stages.append((f'depth <= {max_depth}', shallow.n_trees, len(shallow.feature), shallow.max_depth))
+    kept = prune_trees(shallow, features, labels, max_accuracy_drop, min_trees)
+    pruned = shallow.subforest(kept)
+    stages.append(('pruned', pruned.n_trees, len(pruned.feature), pruned.max_depth))
+    return pruned.quantized(), stages
+
+
+def compact_main(detector, forest, args):
+    """Compact a compiled forest on held-out data and report the cost."""
+    from sklearn.model_selection import train_test_split
+
+    X, y = detector.load_dataset_cached(args.dataset)
+    # The same hold-out split as MLAccidentDetector.train: rows the forest
+    # never saw. Half chooses the trees, the other half measures the delta.
+    _, X_test, _, y_test = train_test_split(X.to_numpy(), np.asarray(y), test_size=0.2,
+                                            random_state=42, stratify=y)
+    X_select, X_report, y_select, y_report = train_test_split(
+        X_test, y_test, test_size=0.5, random_state=42, stratify=y_test)
+
+    compact, stages = compact_forest(forest, X_select, y_select, args.max_depth,
+                                     args.max_accuracy_drop, args.min_trees)
+    for stage, n_trees, n_nodes, depth in stages:
+        print(f"   {stage:12s} {n_trees:4d} trees {n_nodes:8d} nodes  depth {depth}")
+
+    compact.save(args.output, compact=True)
+    start = time.perf_counter()
+    loaded = CompiledForest.load(args.output)
+    load_ms = (time.perf_counter() - start) * 1e3
+
+    before = evaluate(forest, X_report, y_report)
+    after = evaluate(loaded, X_report, y_report)
+    print(f"📊 Held-out ({len(y_report)} samples): "
+          f"accuracy {before['accuracy']:.4f} -> {after['accuracy']:.4f} "
+          f"({(after['accuracy'] - before['accuracy']) * 100:+.2f} pts), "
+          f"recall {before['recall']:.4f} -> {after['recall']:.4f} "
+          f"({(after['recall'] - before['recall']) * 100:+.2f} pts)")
+    print(f"📦 {os.path.getsize(args.model) / 1024:.0f} KB -> {os.path.getsize(args.output) / 1024:.0f} KB, "
+          f"loads in {load_ms:.1f} ms")
+
+
+def benchmark(detector, forest, samples, repeats=5, sklearn_samples=100):
+    """
+    Print the single-reading predict latency of sklearn and of the compiled forest.
+
+    Each figure is the best of `repeats` passes over the readings (sklearn
+    gets the first sklearn_samples only, it is ~100x slower).
+
+    Returns:
+        dict: model name -> seconds per reading
+    """
+    readings = [dict(zip(SENSOR_COLUMNS, row)) for row in np.asarray(samples, dtype=np.float64).tolist()]
+    forest.predict(readings[0])  # Builds the subtree heights
+    timings = {}
+    for name, predict, batch in (('sklearn', detector.predict, readings[:sklearn_samples]),
+                                 ('compiled', forest.predict, readings)):
+        best = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            for reading in batch:
+                predict(reading)
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best / len(batch)
+        print(f"⏱ {name:9s} predict: {timings[name] * 1e6:8.1f} µs per reading "
+              f"(best of {repeats} x {len(batch)} readings)")
+    return timings
+
+
+def main(argv=None):
+    """Export ml_accident_model.pkl to the flat array format and verify it."""
+    from ml_accident_detector import MLAccidentDetector
+
+    parser = argparse.ArgumentParser(description="Compile (and optionally compact) the Random Forest")
+    parser.add_argument('--model', default='ml_accident_model.pkl')
+    parser.add_argument('--mmap', action='store_true',
+                        help="export the memory-mappable directory the server loads")
+    parser.add_argument('--compact', action='store_true',
+                        help="depth-limit, prune and quantize into a compact model file")
+    parser.add_argument('--dataset', default=r"Bike&Safe Dataset\Bike&Safe Dataset\Bike&Safe Dataset",
+                        help="Bike&Safe Dataset folder (validation data for --compact)")
+    parser.add_argument('--max-depth', type=int, default=12)
+    parser.add_argument('--max-accuracy-drop', type=float, default=0.002)
+    parser.add_argument('--min-trees', type=int, default=10)
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--benchmark', action='store_true',
+                        help="time single-reading predict against sklearn instead of saving")
+    args = parser.parse_args(argv)
+
+    print("⚡ COMPILING RANDOM FOREST")
+    print("=" * 60)
+    detector = MLAccidentDetector()
+    detector.load_model(args.model)
+
+    forest = CompiledForest.from_detector(detector)
+    print(f"🌲 Trees: {forest.n_trees} | Nodes: {len(forest.feature)} | Max depth: {forest.max_depth}")
+
+    # Verify against the sklearn path on random readings
+    rng = np.random.default_rng(42)
+    n = 10000
+    samples = np.column_stack([
+        rng.normal(0, 12, (n, 3)),
+        rng.normal(0, 6, (n, 3)),
+        rng.uniform(0, 100, n),
+    ])
+    expected_accident, expected_confidence = detector.predict_batch(samples)
+    is_accident, confidence = forest.predict_batch(samples)
+    mismatches = int((is_accident != expected_accident).sum())
+    max_error = float(np.abs(confidence - expected_confidence).max())
+    print(f"🔍 Verified {n} samples: {mismatches} label mismatches, max confidence error {max_error:.2e}")
+    if mismatches:
+        raise ValueError("Compiled forest does not match the sklearn model")
+
+    if args.benchmark:
+        benchmark(detector, forest, samples[:1000])
+    elif args.compact:
+        args.output = args.output or COMPACT_MODEL_PATH
+        compact_main(detector, forest, args)
+    elif args.mmap:
+        forest.save_mmap(args.output or mmap_model_dir(args.model), source=args.model)
+    else:
+        forest.save(args.output or COMPILED_MODEL_PATH)
+
+
+if __name__ == "__main__":
+    main()
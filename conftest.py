@@ -0,0 +1,3 @@
+# pytest configuration: the modules live at the repository root, and
+# test_ml_sensitivity.py is a manual script against a running server
+collect_ignore = ['test_ml_sensitivity.py']
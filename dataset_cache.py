@@ -0,0 +1,188 @@
+"""
+🗄️ DATASET CACHE - MEMORY-MAPPED TRAINING ARRAYS
+===============================================
+Parsing the nine route/lap CSVs dominates every training run. This cache
+writes the merged, feature-engineered arrays once as .npy files and maps
+them back read-only (np.load(mmap_mode='r')) on later runs, so nothing is
+re-parsed or copied.
+
+Cache entries are keyed by the ordered list of source files, each as its
+path inside the dataset folder and its SHA-256, plus the loader
+parameters: swapping two files' contents or their order is a new entry,
+while moving the whole dataset folder is not. File hashes are remembered in an index next to each
+file's size and mtime, so unchanged files are never re-read; a touched
+but identical file is re-hashed once and still hits the cache.
+
+Layout:
+    dataset_cache/
+        index.json            path -> {size, mtime_ns, sha256}
+        <key>/manifest.json   sources, params, array shapes
+        <key>/<name>.npy      one file per array
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+from dataset_loader import lap_folders
+
+DATASET_CACHE_DIR = 'dataset_cache'
+
+
+def source_files(dataset_path):
+    """Accelerometer and gyroscope CSVs of every lap folder, in a stable order."""
+    files = []
+    for _, _, lap_path in lap_folders(dataset_path):
+        if not os.path.isdir(lap_path):
+            continue
+        for name in sorted(os.listdir(lap_path)):
+            lowered = name.lower()
+            if 'accelerometer' in lowered or 'gyroscope' in lowered:
+                files.append(os.path.join(lap_path, name))
+    return files
+
+
+def _sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DatasetCache:
+    """Content-addressed store of memory-mappable dataset arrays."""
+
+    def __init__(self, cache_dir=DATASET_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._index_path = os.path.join(cache_dir, 'index.json')
+
+    def _read_index(self):
+        try:
+            with open(self._index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self, index):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self._index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self._index_path)
+
+    def fingerprint(self, files):
+        """
+        SHA-256 of each file, reusing the stored hash when size and mtime match.
+
+        Returns:
+            list of {'path', 'size', 'mtime_ns', 'sha256'} dicts
+        """
+        index = self._read_index()
+        changed = False
+        fingerprints = []
+        for path in files:
+            abs_path = os.path.abspath(path)
+            stat = os.stat(abs_path)
+            known = index.get(abs_path)
+            if not known or known['size'] != stat.st_size or known['mtime_ns'] != stat.st_mtime_ns:
+                known = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': _sha256(abs_path)}
+                index[abs_path] = known
+                changed = True
+            fingerprints.append(dict(known, path=abs_path))
+        if changed:
+            self._write_index(index)
+        return fingerprints
+
+    @staticmethod
+    def cache_key(fingerprints, params, root=None):
+        """
+        Key derived from the ordered (path, SHA-256) sources and loader params.
+
+        Paths are taken relative to root (the dataset folder) when given, so
+        the key survives moving the dataset; mtimes never take part.
+        """
+        sources = []
+        for fp in fingerprints:
+            path = os.path.relpath(fp['path'], os.path.abspath(root)) if root is not None else fp['path']
+            sources.append([path.replace(os.sep, '/'), fp['sha256']])
+        payload = json.dumps({'sources': sources, 'params': params}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()[:24]
+
+    def load(self, key):
+        """
+        Map a cached entry read-only.
+
+        Returns:
+            dict of name -> np.memmap, or None on a cache miss (including an
+            entry with a missing or unreadable array file)
+        """
+        entry_dir = os.path.join(self.cache_dir, key)
+        try:
+            with open(os.path.join(entry_dir, 'manifest.json')) as f:
+                manifest = json.load(f)
+            return {name: np.load(os.path.join(entry_dir, f'{name}.npy'), mmap_mode='r')
+                    for name in manifest['arrays']}
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save(self, key, arrays, fingerprints, params):
+        """Write arrays under key atomically (a reader never sees a partial entry)."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entry_dir = os.path.join(self.cache_dir, key)
+        tmp_dir = tempfile.mkdtemp(prefix=f'.{key}-', dir=self.cache_dir)
+        try:
+            for name, array in arrays.items():
+                np.save(os.path.join(tmp_dir, f'{name}.npy'), np.ascontiguousarray(array))
+            manifest = {
+                'sources': fingerprints,
+                'params': params,
+                'arrays': {name: {'shape': list(np.shape(a)), 'dtype': str(np.asarray(a).dtype)}
+                           for name, a in arrays.items()},
+            }
+            with open(os.path.join(tmp_dir, 'manifest.json'), 'w') as f:
+                json.dump(manifest, f, indent=1)
+            # Move a stale entry aside before swapping the new one in, so a
+            # failed replace never leaves the key without any entry
+            stale_dir = None
+            if os.path.isdir(entry_dir):
+                stale_dir = tempfile.mkdtemp(prefix=f'.{key}-stale-', dir=self.cache_dir)
+                os.replace(entry_dir, os.path.join(stale_dir, key))
+            try:
+                os.replace(tmp_dir, entry_dir)
+            except OSError:
+                if stale_dir is not None:
+                    os.replace(os.path.join(stale_dir, key), entry_dir)
+                raise
+            finally:
+                if stale_dir is not None:
+                    shutil.rmtree(stale_dir, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+    def get_or_build(self, dataset_path, params, build):
+        """
+        Return cached arrays for dataset_path, building them on a miss.
+
+        Args:
+            dataset_path: Bike&Safe Dataset folder
+            params: JSON-serializable loader/feature parameters (part of the key)
+            build: callable returning a dict of name -> array
+
+        Returns:
+            tuple: (dict of name -> read-only memmap, hit: bool)
+        """
+        fingerprints = self.fingerprint(source_files(dataset_path))
+        if not fingerprints:
+            raise ValueError("No data loaded! Check dataset path.")
+        key = self.cache_key(fingerprints, params, root=dataset_path)
+
+        arrays = self.load(key)
+        if arrays is not None:
+            return arrays, True
+
+        self.save(key, build(), fingerprints, params)
+        return self.load(key), False
@@ -0,0 +1,126 @@
+"""
+📝 DETECTOR LOGGING - LEVELED, SAMPLED, STRUCTURED
+==================================================
+Logging setup shared by the detectors and the Flask server.
+
+- Everything logs under the 'accident_detector' logger namespace
+- Per-sample records are DEBUG, so the default (INFO) hot path is quiet
+- SamplingFilter keeps 1 in N low-level records under load
+- JsonFormatter emits one JSON object per line for log collectors
+- Lazy defers building message text until a record is actually emitted
+
+Environment variables (read by configure_logging):
+    ACCIDENT_LOG_LEVEL   DEBUG / INFO / WARNING / ... (default INFO)
+    ACCIDENT_LOG_FORMAT  text / json (default text)
+    ACCIDENT_LOG_SAMPLE  keep 1 in N records below WARNING (default 1 = all)
+"""
+
+import itertools
+import json
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+
+ROOT_LOGGER_NAME = 'accident_detector'
+
+# Attributes every LogRecord has; anything else came in through extra=
+_STANDARD_RECORD_FIELDS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def get_logger(name):
+    """Logger in the accident_detector namespace, e.g. get_logger('rules')."""
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}")
+
+
+class Lazy:
+    """
+    Message argument rendered only when the record is formatted.
+
+    logger.debug("Reasons: %s", Lazy(" | ".join, reasons)) does no string
+    work at all unless DEBUG records are actually emitted.
+    """
+
+    __slots__ = ('func', 'args')
+
+    def __init__(self, func, *args):
+        self.func = func
+        self.args = args
+
+    def __str__(self):
+        return str(self.func(*self.args))
+
+    def to_json(self):
+        return self.func(*self.args)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep every record at WARNING and above, and 1 in sample_every below."""
+
+    def __init__(self, sample_every=1):
+        super().__init__()
+        self.sample_every = max(1, int(sample_every))
+        self._counter = itertools.count()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or self.sample_every == 1:
+            return True
+        return next(self._counter) % self.sample_every == 0
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including any extra= fields."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_RECORD_FIELDS and not key.startswith('_'):
+                entry[key] = value.to_json() if isinstance(value, Lazy) else value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def configure_logging(level=None, json_format=None, sample_every=None, stream=None):
+    """
+    Configure the accident_detector logger tree (idempotent).
+
+    Args:
+        level: logging level name or number (env ACCIDENT_LOG_LEVEL, default INFO)
+        json_format: emit JSON lines (env ACCIDENT_LOG_FORMAT=json)
+        sample_every: keep 1 in N records below WARNING (env ACCIDENT_LOG_SAMPLE)
+        stream: output stream (default stderr)
+
+    Returns:
+        The configured root 'accident_detector' logger
+    """
+    if level is None:
+        level = os.environ.get('ACCIDENT_LOG_LEVEL', 'INFO')
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+        if not isinstance(level, int):
+            level = logging.INFO
+    if json_format is None:
+        json_format = os.environ.get('ACCIDENT_LOG_FORMAT', 'text').lower() == 'json'
+    if sample_every is None:
+        sample_every = int(os.environ.get('ACCIDENT_LOG_SAMPLE', '1'))
+
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.addFilter(SamplingFilter(sample_every))
+    if json_format:
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+
+    logger = logging.getLogger(ROOT_LOGGER_NAME)
+    for old_handler in list(logger.handlers):
+        logger.removeHandler(old_handler)
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+    return logger
@@ -0,0 +1,161 @@
+"""
+💬 EXPLANATIONS - PLAIN-LANGUAGE TEXT PER DECISION BUCKET
+=========================================================
+Everyday-language explanations of a detection result for non-technical
+users (what happened, why it was flagged, an analogy and a safety tip).
+
+Every result falls into one bucket (e.g. stationary impact, side impact,
+smooth riding). Each bucket's five texts are compiled once at import:
+fixed sentences are kept as-is and only the ones quoting a reading are
+formatted per call. /api/detect renders them only when the client asks
+(see app.py), so the default response path builds no text at all.
+"""
+
+EXPLANATION_FIELDS = ('simple_status', 'what_happened', 'why_detected', 'analogy', 'safety_tip')
+
+# Bucket -> field -> text; {placeholders} are filled from the reading
+EXPLANATION_TEMPLATES = {
+    'stationary_impact': {
+        'simple_status': "Your bike was hit while stopped",
+        'what_happened': "Your bike wasn't moving ({speed:.0f} km/h), but the sensors detected a significant impact force of {acc_mag:.1f}G. This indicates something collided with your parked bike, or you were rear-ended while stopped at a traffic light.",
+        'why_detected': "When a bike is stationary, it should only experience gravity pulling downward (approximately 10G). Any force exceeding 15G indicates an external collision has occurred.",
+        'analogy': "Imagine you're standing completely still, and someone suddenly pushes you hard from behind. You haven't moved from your position, but you definitely felt that strong impact.",
+        'safety_tip': "Even when stopped, accidents can happen. Always stay aware of traffic around you, especially at intersections and traffic lights.",
+    },
+    'sudden_braking': {
+        'simple_status': "Sudden emergency stop detected - risk of flipping",
+        'what_happened': "You were riding at {speed:.0f} km/h and suddenly experienced extreme backward force ({abs_acc_x:.1f}G). This is characteristic of very hard braking.",
+        'why_detected': "When you brake too hard on a bike, the front wheel stops abruptly but your body continues moving forward due to momentum. This can cause you to flip over the handlebars, which cyclists call an 'endo'.",
+        'analogy': "Think about running at full speed and suddenly grabbing onto a fixed pole. Your legs stop immediately, but your upper body keeps moving forward because of inertia.",
+        'safety_tip': "Practice gradual, controlled braking. Always use both front and rear brakes together for safer stops, and shift your weight backward when braking hard.",
+    },
+    'tumbling': {
+        'simple_status': "Bike is tumbling or flipping",
+        'what_happened': "The bike is rotating at {gyro_mag:.1f} degrees per second, which is extremely fast. Your bike is likely rolling over or flipping through the air.",
+        'why_detected': "During normal riding, bikes rotate slowly through turns (typically 1-5 degrees per second). Rotation speeds above 25 degrees per second indicate the bike is completely out of control and tumbling.",
+        'analogy': "Compare doing a controlled turn while walking versus doing an uncontrolled somersault. One is smooth and predictable, the other is chaotic spinning motion.",
+        'safety_tip': "This type of rotation usually happens after a collision or when hitting a significant obstacle. Always wear a helmet and protective gear when cycling.",
+    },
+    'extreme_impact': {
+        'simple_status': "Severe crash detected - extreme impact",
+        'what_happened': "Your bike experienced {acc_mag:.1f}G of force. Normal riding typically produces around 10G. This level of force indicates a serious collision has occurred.",
+        'why_detected': "Forces exceeding 25G mean something hit your bike with tremendous force. This could be a vehicle collision, hitting a solid wall, or a major fall at speed.",
+        'analogy': "Consider the difference between gently placing a book on a table versus throwing it violently against a wall. The impact force is dramatically different.",
+        'safety_tip': "This represents a serious accident. Immediately check yourself and any passengers for injuries. Seek medical attention if you experience any pain or disorientation.",
+    },
+    'high_speed_collision': {
+        'simple_status': "High-speed accident at {speed:.0f} km/h",
+        'what_happened': "You were riding fast ({speed:.0f} km/h - that's highway speed) and hit something with {acc_mag:.1f}G of force. At high speeds, even small impacts are dangerous.",
+        'why_detected': "Speed increases danger exponentially. An 8G impact at 60 km/h is much more dangerous than 8G at 20 km/h because of the kinetic energy involved.",
+        'analogy': "Think of falling off a chair versus falling off a roof - the same motion, but vastly different outcomes because of the height.",
+        'safety_tip': "High-speed cycling requires full protective gear. Always wear a helmet and consider body armor for speeds above 50 km/h.",
+    },
+    'side_impact': {
+        'simple_status': "Side impact - something hit you from the side",
+        'what_happened': "Your bike was hit from the left or right with {abs_acc_y:.1f}G of sideways force. This often happens when a vehicle doesn't see you and turns into your path.",
+        'why_detected': "Side impacts (Y-axis) are particularly dangerous for cyclists because you can't see them coming and they often knock you off balance.",
+        'analogy': "Picture someone opening a door into you when you're walking past - you don't expect it and get knocked sideways.",
+        'safety_tip': "Always be visible! Use lights, wear bright colors, and avoid vehicle blind spots, especially at intersections.",
+    },
+    'general_accident': {
+        'simple_status': "Accident detected - abnormal forces",
+        'what_happened': "Sensors detected unusual forces: {acc_mag:.1f}G impact while riding at {speed:.0f} km/h with {gyro_mag:.1f}°/s rotation. These readings are outside normal riding patterns.",
+        'why_detected': "During normal cycling, forces stay relatively low and predictable. These readings indicate something unexpected happened.",
+        'analogy': "It's like walking on a smooth path (predictable) versus stumbling over an unseen obstacle (sudden change).",
+        'safety_tip': "Stay alert and anticipate potential hazards. Defensive cycling can prevent accidents before they happen.",
+    },
+    'stationary': {
+        'simple_status': "All good - bike is stationary and safe",
+        'what_happened': "Your bike is parked or stopped ({speed:.0f} km/h) with normal forces ({acc_mag:.1f}G). Everything looks normal.",
+        'why_detected': "When parked, your bike should only feel gravity pulling down (about 10G). The sensors show normal readings with no unusual impacts.",
+        'analogy': "It's like sitting quietly on a bench - peaceful and stable.",
+        'safety_tip': "You're safe! Take your time before starting to ride.",
+    },
+    'high_speed_cruising': {
+        'simple_status': "High-speed cruising - riding fast but safely at {speed:.0f} km/h",
+        'what_happened': "You're riding fast ({speed:.0f} km/h) but all forces are normal: {acc_mag:.1f}G acceleration and {gyro_mag:.1f}°/s rotation. This is smooth, controlled high-speed riding.",
+        'why_detected': "High speed alone isn't dangerous if everything is controlled. Your bike is stable with no sudden impacts or loss of control.",
+        'analogy': "It's like riding a smooth elevator going fast - speed without chaos.",
+        'safety_tip': "Great! Maintain this smooth control. Stay focused and anticipate obstacles ahead.",
+    },
+    'minor_bump': {
+        'simple_status': "Minor bump or acceleration - normal riding",
+        'what_happened': "You felt {acc_mag:.1f}G of force at {speed:.0f} km/h. This could be from pedaling hard, going over a small bump, or turning.",
+        'why_detected': "Normal cycling involves some forces from pedaling, bumps, and turns. These readings are within the safe range for regular riding.",
+        'analogy': "It's like jogging over slightly uneven ground - you feel it, but you're not falling.",
+        'safety_tip': "You're riding normally. Keep your eyes on the road and hands on the handlebars.",
+    },
+    'smooth_riding': {
+        'simple_status': "Smooth cycling - everything is perfect at {speed:.0f} km/h",
+        'what_happened': "You're riding smoothly at {speed:.0f} km/h with minimal forces ({acc_mag:.1f}G) and stable balance ({gyro_mag:.1f}°/s rotation). This is ideal cycling.",
+        'why_detected': "All sensor readings are in the normal, safe range. Your riding is smooth and controlled.",
+        'analogy': "It's like gliding on ice or a smooth road - effortless and safe.",
+        'safety_tip': "Perfect! You're cycling safely. Enjoy your ride.",
+    },
+}
+
+
+def _compile(template):
+    """Fixed text stays a str; text with placeholders becomes its bound format."""
+    return tuple((field, template[field] if '{' not in template[field] else template[field].format)
+                 for field in EXPLANATION_FIELDS)
+
+
+_COMPILED_TEMPLATES = {bucket: _compile(template) for bucket, template in EXPLANATION_TEMPLATES.items()}
+
+
+def explanation_bucket(sensor_data, is_accident, metrics):
+    """
+    Which EXPLANATION_TEMPLATES bucket describes a result.
+
+    Args:
+        sensor_data: dict with acc_x, acc_y (speed optional)
+        is_accident: detection result
+        metrics: dict with acc_magnitude and gyro_magnitude
+    """
+    speed = sensor_data.get('speed', 0)
+    acc_mag = metrics['acc_magnitude']
+
+    if is_accident:
+        # Determine accident type from sensor values
+        if speed < 5 and acc_mag > 15:
+            return 'stationary_impact'
+        if sensor_data.get('acc_x', 0) < -15 and speed > 30:
+            return 'sudden_braking'     # Endo risk
+        if metrics['gyro_magnitude'] > 25:
+            return 'tumbling'
+        if acc_mag > 25:
+            return 'extreme_impact'
+        if speed > 60 and acc_mag > 8:
+            return 'high_speed_collision'
+        if abs(sensor_data.get('acc_y', 0)) > 20:
+            return 'side_impact'
+        return 'general_accident'
+
+    # No accident - safe riding
+    if speed < 5:
+        return 'stationary'
+    if speed > 50:
+        return 'high_speed_cruising'
+    if acc_mag > 12:
+        return 'minor_bump'
+    return 'smooth_riding'
+
+
+def generate_human_explanation(sensor_data, is_accident, confidence, technical_reason, metrics):
+    """
+    Generate easy-to-understand explanation for non-technical users.
+    Explains what happened in everyday language.
+
+    Returns:
+        dict with the EXPLANATION_FIELDS keys
+    """
+    values = {
+        'speed': sensor_data.get('speed', 0),
+        'acc_mag': metrics['acc_magnitude'],
+        'gyro_mag': metrics['gyro_magnitude'],
+        'abs_acc_x': abs(sensor_data.get('acc_x', 0)),
+        'abs_acc_y': abs(sensor_data.get('acc_y', 0)),
+    }
+    compiled = _COMPILED_TEMPLATES[explanation_bucket(sensor_data, is_accident, metrics)]
+    return {field: text if isinstance(text, str) else text(**values) for field, text in compiled}
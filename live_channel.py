@@ -0,0 +1,341 @@
+"""
+📡 LIVE CHANNEL - SENSOR STREAMS OVER ONE WEBSOCKET
+==================================================
+Clients that evaluate readings continuously (the simulator, dashboards,
+devices) pay a TCP/HTTP handshake and a full set of headers for every
+/api/detect call. LiveChannel serves /api/live instead: one WebSocket
+(RFC 6455) connection per client, sensor frames in, detection results
+out.
+
+- Backpressure per connection: a message is read only after the replies
+  to the previous one were written. A client that sends faster than the
+  server scores, or reads its results slower, is throttled by TCP flow
+  control instead of queueing work in the server; a client that does not
+  read for send_timeout seconds is disconnected (close code 1008)
+- Messages are capped at max_message bytes and connections at
+  max_connections per process (each holds one server thread)
+- Idle connections are closed after idle_timeout seconds; clients keep a
+  quiet connection open with WebSocket pings
+- No extra dependency: the handshake and framing are implemented here on
+  top of the socket that Werkzeug's server (app.py, serve.py) hands to the
+  application (environ['werkzeug.socket']). Only that server can carry
+  /api/live: under any other WSGI server (gunicorn, uWSGI, mod_wsgi) the
+  upgrade answers 501 and clients must use /api/detect instead.
+
+What the messages mean is up to the handler passed to serve (see the
+/api/live route in app.py).
+
+Environment variables (read by LiveChannel.from_env):
+    ACCIDENT_LIVE_MAX_CONNECTIONS  open connections per process (default 256)
+    ACCIDENT_LIVE_MAX_MESSAGE      max bytes of one client message (default 65536)
+    ACCIDENT_LIVE_SEND_TIMEOUT     seconds a client may stall reading results (default 10)
+    ACCIDENT_LIVE_IDLE_TIMEOUT     seconds without client messages before closing (default 120)
+"""
+
+import base64
+import hashlib
+import json
+import os
+import socket
+import struct
+import threading
+from werkzeug.wrappers import Response
+from detector_logging import get_logger
+
+logger = get_logger('live')
+
+# RFC 6455 handshake constant and opcodes
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+OP_CONTINUATION, OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+
+# Close codes
+CLOSE_NORMAL = 1000
+CLOSE_GOING_AWAY = 1001
+CLOSE_PROTOCOL_ERROR = 1002
+CLOSE_INVALID_DATA = 1007
+CLOSE_POLICY_VIOLATION = 1008
+CLOSE_TOO_BIG = 1009
+CLOSE_INTERNAL_ERROR = 1011
+
+
+class WebSocketClosed(Exception):
+    """The connection ended; code/reason are what we close it with."""
+
+    def __init__(self, code=CLOSE_NORMAL, reason=''):
+        super().__init__(f"{code} {reason}".strip())
+        self.code = code
+        self.reason = reason
+
+
+def is_websocket_request(environ):
+    return (environ.get('REQUEST_METHOD') == 'GET'
+            and environ.get('HTTP_UPGRADE', '').lower() == 'websocket'
+            and 'upgrade' in environ.get('HTTP_CONNECTION', '').lower())
+
+
+def accept_key(key):
+    """Sec-WebSocket-Accept value for a client's Sec-WebSocket-Key."""
+    digest = hashlib.sha1((key + WEBSOCKET_GUID).encode('ascii')).digest()
+    return base64.b64encode(digest).decode('ascii')
+
+
+def _unmask(payload, mask):
+    n = len(payload)
+    if not n:
+        return payload
+    key = (mask * (n // 4 + 1))[:n]
+    return (int.from_bytes(payload, 'big') ^ int.from_bytes(key, 'big')).to_bytes(n, 'big')
+
+
+def encode_frame(opcode, payload):
+    """One unfragmented, unmasked (server to client) frame."""
+    n = len(payload)
+    if n < 126:
+        header = struct.pack('!BB', 0x80 | opcode, n)
+    elif n < 1 << 16:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, n)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, n)
+    return header + payload
+
+
+class WebSocket:
+    """Server side of one upgraded connection (used from a single thread)."""
+
+    def __init__(self, sock, rfile, max_message, send_timeout, idle_timeout):
+        """
+        Args:
+            sock: the connection socket (replies are written here)
+            rfile: buffered reader of sock (may already hold the first frames)
+            max_message: max bytes of one (reassembled) client message
+            send_timeout: seconds a write may block on a client that is not reading
+            idle_timeout: seconds a read may wait for the next frame
+        """
+        self.sock = sock
+        self.rfile = rfile
+        self.max_message = max_message
+        self.send_timeout = send_timeout
+        self.idle_timeout = idle_timeout
+        self.closed = False
+
+    def _read_exact(self, n):
+        data = self.rfile.read(n)
+        if len(data) < n:
+            raise WebSocketClosed(CLOSE_GOING_AWAY, 'connection lost')
+        return data
+
+    def _read_frame(self):
+        first, second = self._read_exact(2)
+        fin, opcode = bool(first & 0x80), first & 0x0F
+        if first & 0x70:
+            raise WebSocketClosed(CLOSE_PROTOCOL_ERROR, 'reserved bits set')
+        if not second & 0x80:
+            raise WebSocketClosed(CLOSE_PROTOCOL_ERROR, 'client frames must be masked')
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack('!H', self._read_exact(2))[0]
+        elif length == 127:
+            length = struct.unpack('!Q', self._read_exact(8))[0]
+        if opcode >= OP_CLOSE and (not fin or length > 125):
+            raise WebSocketClosed(CLOSE_PROTOCOL_ERROR, 'invalid control frame')
+        if length > self.max_message:
+            raise WebSocketClosed(CLOSE_TOO_BIG, f'message exceeds {self.max_message} bytes')
+        mask = self._read_exact(4)
+        return fin, opcode, _unmask(self._read_exact(length), mask)
+
+    def receive(self):
+        """
+        Next complete text or binary message, answering pings on the way.
+
+        Returns:
+            str (text message) or bytes (binary message)
+
+        Raises:
+            WebSocketClosed: the client closed, timed out or broke the protocol
+        """
+        self.sock.settimeout(self.idle_timeout)
+        opcode, parts, size = None, [], 0
+        while True:
+            try:
+                fin, frame_opcode, payload = self._read_frame()
+            except socket.timeout:
+                raise WebSocketClosed(CLOSE_GOING_AWAY, 'idle timeout') from None
+            if frame_opcode == OP_PING:
+                self.send_frames([encode_frame(OP_PONG, payload)])
+                self.sock.settimeout(self.idle_timeout)
+                continue
+            if frame_opcode == OP_PONG:
+                continue
+            if frame_opcode == OP_CLOSE:
+                code = struct.unpack('!H', payload[:2])[0] if len(payload) >= 2 else CLOSE_NORMAL
+                raise WebSocketClosed(code if code in (CLOSE_NORMAL, CLOSE_GOING_AWAY) else CLOSE_NORMAL)
+            if frame_opcode in (OP_TEXT, OP_BINARY):
+                if opcode is not None:
+                    raise WebSocketClosed(CLOSE_PROTOCOL_ERROR, 'expected a continuation frame')
+                opcode = frame_opcode
+            elif frame_opcode != OP_CONTINUATION or opcode is None:
+                raise WebSocketClosed(CLOSE_PROTOCOL_ERROR, f'unexpected opcode {frame_opcode}')
+            size += len(payload)
+            if size > self.max_message:
+                raise WebSocketClosed(CLOSE_TOO_BIG, f'message exceeds {self.max_message} bytes')
+            parts.append(payload)
+            if fin:
+                break
+        message = b''.join(parts)
+        if opcode == OP_TEXT:
+            try:
+                return message.decode('utf-8')
+            except UnicodeDecodeError:
+                raise WebSocketClosed(CLOSE_INVALID_DATA, 'text message is not UTF-8') from None
+        return message
+
+    def send_frames(self, frames):
+        """Write encoded frames in one call; blocks at most send_timeout."""
+        self.sock.settimeout(self.send_timeout)
+        try:
+            self.sock.sendall(b''.join(frames))
+        except socket.timeout:
+            raise WebSocketClosed(CLOSE_POLICY_VIOLATION, 'client is not reading its results') from None
+        except OSError:
+            raise WebSocketClosed(CLOSE_GOING_AWAY, 'connection lost') from None
+
+    def close(self, code=CLOSE_NORMAL, reason=''):
+        """Send a close frame (best effort) and shut the socket down."""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.sock.settimeout(1.0)
+            self.sock.sendall(encode_frame(OP_CLOSE, struct.pack('!H', code) + reason.encode('utf-8')[:123]))
+        except OSError:
+            pass
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+class UpgradedResponse(Response):
+    """
+    Response of a request whose connection was upgraded and is now closed.
+
+    Nothing may be written to the socket any more; Werkzeug's server treats
+    the ConnectionError as a dropped connection and ends it quietly.
+    """
+
+    def __call__(self, environ, start_response):
+        raise ConnectionError("WebSocket connection closed")
+
+
+class LiveChannel:
+    """Runs WebSocket connections for a message handler, with per-process limits."""
+
+    def __init__(self, max_connections=256, max_message=65536, send_timeout=10.0, idle_timeout=120.0):
+        self.max_connections = int(max_connections)
+        self.max_message = int(max_message)
+        self.send_timeout = float(send_timeout)
+        self.idle_timeout = float(idle_timeout)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.connections = 0
+        self.rejected = 0
+        self.messages_in = 0
+        self.messages_out = 0
+        self.slow_consumers = 0
+
+    @classmethod
+    def from_env(cls):
+        """Channel configured from the ACCIDENT_LIVE_* environment variables."""
+        return cls(max_connections=int(os.environ.get('ACCIDENT_LIVE_MAX_CONNECTIONS', 256)),
+                   max_message=int(os.environ.get('ACCIDENT_LIVE_MAX_MESSAGE', 65536)),
+                   send_timeout=float(os.environ.get('ACCIDENT_LIVE_SEND_TIMEOUT', 10)),
+                   idle_timeout=float(os.environ.get('ACCIDENT_LIVE_IDLE_TIMEOUT', 120)))
+
+    def _handshake(self, environ):
+        """Upgrade the request's connection, or return (HTTP status, error) when it cannot be."""
+        sock, rfile = environ.get('werkzeug.socket'), environ.get('wsgi.input')
+        if sock is None:
+            return None, (501, 'WebSocket upgrades need the Werkzeug server this WSGI server does not '
+                               'provide: run the API with python app.py or python serve.py, or send '
+                               'readings to /api/detect or /api/detect/bulk')
+        key = environ.get('HTTP_SEC_WEBSOCKET_KEY', '')
+        try:
+            valid_key = len(base64.b64decode(key, validate=True)) == 16
+        except ValueError:
+            valid_key = False
+        if environ.get('HTTP_SEC_WEBSOCKET_VERSION') != '13' or not valid_key:
+            return None, (400, 'Expected a version 13 WebSocket handshake')
+        with self._lock:
+            if self.active >= self.max_connections:
+                self.rejected += 1
+                return None, (503, f'Live channel is full ({self.max_connections} connections)')
+            self.active += 1
+            self.connections += 1
+        sock.sendall(('HTTP/1.1 101 Switching Protocols\r\n'
+                      'Upgrade: websocket\r\n'
+                      'Connection: Upgrade\r\n'
+                      f'Sec-WebSocket-Accept: {accept_key(key)}\r\n\r\n').encode('ascii'))
+        return WebSocket(sock, rfile, self.max_message, self.send_timeout, self.idle_timeout), None
+
+    def serve(self, environ, handle_message, hello=None):
+        """
+        Upgrade the request and run the connection until it closes.
+
+        Args:
+            environ: WSGI environ of the upgrade request
+            handle_message: callable(message: str or bytes) -> list of
+                            JSON-ready replies, sent back in order
+            hello: optional JSON-ready message sent right after the upgrade
+
+        Returns:
+            None once the connection is over, or (HTTP status, error) if
+            the request could not be upgraded
+        """
+        ws, error = self._handshake(environ)
+        if error is not None:
+            return error
+        code, reason = CLOSE_NORMAL, ''
+        try:
+            if hello is not None:
+                ws.send_frames([encode_frame(OP_TEXT, json.dumps(hello).encode('utf-8'))])
+            while True:
+                message = ws.receive()
+                replies = handle_message(message)
+                # Replies of one message go out in one write; the next
+                # message is only read once they are written
+                ws.send_frames([encode_frame(OP_TEXT, json.dumps(reply).encode('utf-8')) for reply in replies])
+                with self._lock:
+                    self.messages_in += 1
+                    self.messages_out += len(replies)
+        except WebSocketClosed as e:
+            code, reason = e.code, e.reason
+            if code == CLOSE_POLICY_VIOLATION:
+                with self._lock:
+                    self.slow_consumers += 1
+        except Exception:
+            logger.exception("Live connection failed")
+            code, reason = CLOSE_INTERNAL_ERROR, 'server error'
+        finally:
+            ws.close(code, reason)
+            with self._lock:
+                self.active -= 1
+        return None
+
+    def stats(self):
+        """Connection and message counters, for monitoring endpoints."""
+        with self._lock:
+            return self._stats()
+
+    def _stats(self):
+        return {
+            'active': self.active,
+            'max_connections': self.max_connections,
+            'connections': self.connections,
+            'rejected': self.rejected,
+            'messages_in': self.messages_in,
+            'messages_out': self.messages_out,
+            'slow_consumers': self.slow_consumers,
+            'max_message_bytes': self.max_message,
+            'send_timeout_seconds': self.send_timeout,
+            'idle_timeout_seconds': self.idle_timeout,
+        }
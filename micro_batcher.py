@@ -0,0 +1,178 @@
+"""
+📦 MICRO-BATCHER - COALESCE CONCURRENT PREDICTIONS
+==================================================
+Concurrent /api/detect calls for the same ML model each pay the full
+per-call overhead of feature building and tree traversal. MicroBatcher
+puts the readings on a queue; one background thread collects everything
+that arrives within a short window (max_wait, default 2 ms) or until
+max_batch readings are waiting, scores them with one predict_batch call
+and resolves each caller's Future.
+
+- Idle: a lone request waits at most max_wait before it is scored
+- Under burst load: batches fill up to max_batch and per-call overhead is
+  amortized across them
+- Every row is its own stream (groups = row index), so temporal feature
+  models score each reading exactly as a single predict would
+- Queue depth and batch size histograms show where the trade-off sits
+
+The thread is started on first use, so each forked server worker runs its
+own batcher.
+
+Environment variables (read by MicroBatcher.from_env):
+    ACCIDENT_BATCH_WINDOW_MS  max wait for a batch to fill (default 2)
+    ACCIDENT_BATCH_MAX        max readings per batch (default 256, <= 1 disables)
+"""
+
+import bisect
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+from working_accident_system import SENSOR_COLUMNS
+
+
+class Histogram:
+    """Counts of observed values in fixed upper-bound buckets."""
+
+    def __init__(self, bounds):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # Last bucket: above every bound
+        self.count = 0
+        self.total = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def snapshot(self):
+        labels = [f"<={bound}" for bound in self.bounds] + [f">{self.bounds[-1]}"]
+        return {
+            'buckets': dict(zip(labels, self.counts)),
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+        }
+
+
+def _power_of_two_bounds(limit):
+    bounds = [1]
+    while bounds[-1] < limit:
+        bounds.append(bounds[-1] * 2)
+    return bounds
+
+
+class MicroBatcher:
+    """Coalesces single-reading predictions into predict_batch calls."""
+
+    def __init__(self, predict_batch, max_batch=256, max_wait=0.002, name='ml'):
+        """
+        Args:
+            predict_batch: callable (N, 7) readings, groups -> (is_accident, confidence)
+            max_batch: max readings per batch
+            max_wait: seconds the first reading of a batch waits for more
+            name: thread name suffix (e.g. the model_type)
+        """
+        self.predict_batch = predict_batch
+        self.max_batch = max(int(max_batch), 1)
+        self.max_wait = max(float(max_wait), 0.0)
+        self.name = name
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.batches = 0
+        self.errors = 0
+        self.batch_sizes = Histogram(_power_of_two_bounds(self.max_batch))
+        self.queue_depths = Histogram([0] + _power_of_two_bounds(4 * self.max_batch))
+
+    @classmethod
+    def from_env(cls, predict_batch, name='ml'):
+        """Batcher configured from ACCIDENT_BATCH_*, or None if batching is disabled."""
+        max_batch = int(os.environ.get('ACCIDENT_BATCH_MAX', 256))
+        if max_batch <= 1:
+            return None
+        window_ms = float(os.environ.get('ACCIDENT_BATCH_WINDOW_MS', 2))
+        return cls(predict_batch, max_batch=max_batch, max_wait=window_ms / 1000.0, name=name)
+
+    def _ensure_worker(self):
+        # Checked per call: a forked process inherits the object, not the thread
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=f'micro-batcher-{self.name}', daemon=True)
+                self._thread.start()
+
+    def submit(self, row):
+        """Queue one reading (SENSOR_COLUMNS order); the Future yields (is_accident, confidence)."""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((row, future))
+        return future
+
+    def predict(self, sensor_data, timeout=None):
+        """
+        Score one reading through the batcher (blocks until its batch ran).
+
+        Args:
+            sensor_data: dict with keys acc_x, acc_y, acc_z, gyro_x, gyro_y, gyro_z, speed
+
+        Returns:
+            tuple: (is_accident: bool, confidence: float)
+        """
+        row = [float(sensor_data.get(col, 0)) for col in SENSOR_COLUMNS]
+        return self.submit(row).result(timeout)
+
+    def _collect(self):
+        """Block for one reading, then gather more until full or the window closes."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())  # Take what is already waiting
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            # Counters are only written by this thread
+            collected = self._collect()
+            self.submitted += len(collected)
+            batch = [(row, future) for row, future in collected if future.set_running_or_notify_cancel()]
+            self.queue_depths.observe(self._queue.qsize())
+            if not batch:
+                continue
+            self.batches += 1
+            self.batch_sizes.observe(len(batch))
+
+            rows = np.array([row for row, _ in batch], dtype=np.float64)
+            try:
+                is_accident, confidence = self.predict_batch(rows, groups=np.arange(len(rows)))
+            except Exception as e:
+                self.errors += 1
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), accident, conf in zip(batch, is_accident.tolist(), confidence.tolist()):
+                future.set_result((bool(accident), float(conf)))
+
+    def stats(self):
+        """Throughput counters plus queue depth and batch size histograms."""
+        return {
+            'max_batch': self.max_batch,
+            'window_ms': self.max_wait * 1000.0,
+            'submitted': self.submitted,
+            'batches': self.batches,
+            'errors': self.errors,
+            'queue_depth': self._queue.qsize(),
+            'queue_depth_histogram': self.queue_depths.snapshot(),
+            'batch_size_histogram': self.batch_sizes.snapshot(),
+        }
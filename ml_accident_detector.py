@@ -4,59 +4,105 @@ import numpy as np
 import pandas as pd
 import joblib                                                   
 import os
-from sklearn.ensemble import RandomForestClassifier
+import sys
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
+from sensor_features import FeaturePipeline
+from model_backends import MODEL_BACKENDS, mmap_model_dir, describe_prediction
+from accident_rules import default_engine
+from dataset_loader import load_dataset_aligned
+from dataset_cache import DatasetCache, DATASET_CACHE_DIR
+from detector_logging import configure_logging, get_logger
 import warnings
 warnings.filterwarnings('ignore')
 
+logger = get_logger('ml')
+
+# Bump when features or labels change so stale dataset caches are not reused
+DATASET_FORMAT_VERSION = 2
+
+
+
+def build_model(backend, random_state=42, **params):
+    """
+    Untrained classifier for a MODEL_BACKENDS key.
+    
+    Args:
+        backend: MODEL_BACKENDS key
+        random_state: Random seed for reproducibility
+        **params: hyperparameters overriding the defaults below (e.g. the
+                  winner of model_search.py)
+    """
+    return _default_model(backend, random_state).set_params(**params)
+
+
+def _default_model(backend, random_state):
+    if backend == 'random_forest':
+        return RandomForestClassifier(
+            n_estimators=150,        # Good balance of trees
+            max_depth=25,            # Deeper to capture subtle patterns
+            min_samples_split=5,     # More sensitive to patterns
+            min_samples_leaf=2,      # Can create finer distinctions
+            max_features='sqrt',     # Use sqrt of features at each split
+            random_state=random_state,
+            class_weight='balanced', # Handle imbalanced data
+            n_jobs=-1                # Use all CPU cores
+        )
+    if backend == 'hist_gradient_boosting':
+        return HistGradientBoostingClassifier(
+            max_iter=200,            # Boosting rounds (one small tree each)
+            learning_rate=0.1,
+            max_leaf_nodes=31,       # Shallow trees: small file, fast traversal
+            min_samples_leaf=20,
+            l2_regularization=1.0,
+            early_stopping=True,     # Stop once the validation loss stalls
+            random_state=random_state,
+            class_weight='balanced'  # Handle imbalanced data
+        )
+    raise ValueError(f"Unknown model backend: {backend} (choose from {', '.join(MODEL_BACKENDS)})")
+
+
+# Rows per chunk in train_incremental (~9 MB of float32 base features)
+TRAIN_CHUNK_SIZE = 250000
+
 class MLAccidentDetector:
     
-    def __init__(self):
+    def __init__(self, temporal_features=False, backend='random_forest', model_params=None):
+        if backend not in MODEL_BACKENDS:
+            raise ValueError(f"Unknown model backend: {backend} (choose from {', '.join(MODEL_BACKENDS)})")
+        self.backend = backend
+        self.model_params = dict(model_params or {})
         self.model = None
         self.scaler = StandardScaler()
-        self.feature_names = ['acc_x', 'acc_y', 'acc_z', 'gyro_x', 'gyro_y', 'gyro_z', 
-                              'acc_magnitude', 'gyro_magnitude', 'speed']
-        print("🤖 ML BIKE ACCIDENT DETECTOR - RANDOM FOREST")
-        print("=" * 60)
-        print("Machine Learning approach using supervised classification")
-        print("Algorithm: Random Forest Classifier")
+        # Same pipeline for training (float32) and inference (float64)
+        self.pipeline = FeaturePipeline(temporal=temporal_features)
+        self.feature_names = self.pipeline.feature_names
+        logger.info("🤖 ML bike accident detector (%s classifier)", self.backend_name)
+    
+    @property
+    def backend_name(self):
+        """Human-readable model family, e.g. 'Random Forest'."""
+        return MODEL_BACKENDS[self.backend]['name']
     
     def create_features(self, df):
         """
         Create features from raw sensor data.
         
+        All features are computed in one vectorized pass into a single
+        float32 matrix (see sensor_features.FeaturePipeline). Temporal
+        features restart at every lap when a lap_id column is present.
+        
         Args:
             df: DataFrame with sensor readings
             
         Returns:
-            DataFrame with engineered features
+            DataFrame with engineered features (a view of the float32 matrix)
         """
-        features = pd.DataFrame()
-        
-        # Original sensor values
-        if 'acc_x' in df.columns:
-            features['acc_x'] = df['acc_x']
-            features['acc_y'] = df['acc_y']
-            features['acc_z'] = df['acc_z']
-        
-        if 'gyro_x' in df.columns:
-            features['gyro_x'] = df['gyro_x']
-            features['gyro_y'] = df['gyro_y']
-            features['gyro_z'] = df['gyro_z']
-        
-        # Calculate magnitudes
-        if all(col in df.columns for col in ['acc_x', 'acc_y', 'acc_z']):
-            features['acc_magnitude'] = np.sqrt(df['acc_x']**2 + df['acc_y']**2 + df['acc_z']**2)
-        
-        if all(col in df.columns for col in ['gyro_x', 'gyro_y', 'gyro_z']):
-            features['gyro_magnitude'] = np.sqrt(df['gyro_x']**2 + df['gyro_y']**2 + df['gyro_z']**2)
-        
-        # Speed (if available, otherwise use 0)
-        features['speed'] = df.get('speed', 0)
-        
-        return features
+        groups = df['lap_id'].to_numpy() if 'lap_id' in df.columns else None
+        features = self.pipeline.transform(df, groups=groups)
+        return pd.DataFrame(features, columns=self.feature_names, copy=False)
     
     def load_dataset(self, dataset_path):
         """
@@ -115,6 +161,83 @@ class MLAccidentDetector:
         
         # Combine all data
         combined_data = pd.concat(all_data, ignore_index=True)
+        return self.prepare_dataset(combined_data)
+    
+    def load_dataset_aligned(self, dataset_path, rate_hz=50, workers=None):
+        """
+        Load the Bike&Safe Dataset with accelerometer and gyroscope rows
+        merged on their timestamps and resampled to a uniform rate.
+        
+        Unlike load_dataset, which pairs rows by position, this interpolates
+        both streams onto a shared time grid. Lap folders load in parallel
+        worker processes.
+        
+        Args:
+            dataset_path: Path to the Bike&Safe Dataset folder
+            rate_hz: Resampling rate
+            workers: Worker processes (None = one per CPU, 1 = serial)
+            
+        Returns:
+            X: Features (sensor data)
+            y: Labels (0=normal, 1=accident)
+        """
+        print(f"\n📂 Loading Bike&Safe Dataset (time-aligned, {rate_hz} Hz)...")
+        combined_data = load_dataset_aligned(dataset_path, rate_hz=rate_hz, workers=workers)
+        return self.prepare_dataset(combined_data)
+    
+    def load_dataset_cached(self, dataset_path, rate_hz=50, workers=None, cache_dir=DATASET_CACHE_DIR):
+        """
+        Time-aligned dataset, parsed once and memory-mapped on later runs.
+        
+        The features and labels are cached as .npy files keyed by the source
+        CSV contents, the loader parameters and the label rules (see
+        dataset_cache.py), so editing label thresholds rebuilds the labels.
+        
+        Args:
+            dataset_path: Path to the Bike&Safe Dataset folder
+            rate_hz: Resampling rate
+            workers: Worker processes for a cache miss
+            cache_dir: Cache location
+            
+        Returns:
+            X: Features (DataFrame over the read-only mapped array)
+            y: Labels (read-only mapped array, 0=normal, 1=accident)
+        """
+        params = {
+            'version': DATASET_FORMAT_VERSION,
+            'rate_hz': rate_hz,
+            'feature_names': self.feature_names,
+            'label_rules': default_engine().rules.config['label_rules'],
+        }
+        
+        def build():
+            combined_data = load_dataset_aligned(dataset_path, rate_hz=rate_hz, workers=workers)
+            X = self.create_features(combined_data)
+            y = self.create_synthetic_labels(X)
+            return {
+                'features': X.to_numpy(),
+                'labels': y.astype(np.uint8),
+                'lap_id': combined_data['lap_id'].to_numpy(dtype=np.int16),
+                'timestamp': combined_data['timestamp'].to_numpy(dtype=np.float64),
+            }
+        
+        arrays, hit = DatasetCache(cache_dir).get_or_build(dataset_path, params, build)
+        print(f"\n{'⚡ Dataset cache hit' if hit else '💾 Dataset cached'}: {len(arrays['labels'])} samples")
+        
+        X = pd.DataFrame(arrays['features'], columns=self.feature_names, copy=False)
+        return X, arrays['labels']
+    
+    def prepare_dataset(self, combined_data):
+        """
+        Turn combined raw sensor rows into features and synthetic labels.
+        
+        Args:
+            combined_data: DataFrame with acc_x..gyro_z and speed columns
+            
+        Returns:
+            X: Features (sensor data)
+            y: Labels (0=normal, 1=accident)
+        """
         print(f"\n✅ Total samples loaded: {len(combined_data)}")
         
         # Create features
@@ -134,73 +257,24 @@ class MLAccidentDetector:
     def create_synthetic_labels(self, X):
         """
         Create sensitive accident labels that match rule-based system behavior.
-        Uses SAME thresholds as WorkingAccidentDetector for consistency.
-        """
-        y = np.zeros(len(X))
-        
-        # These thresholds match the rule-based system exactly
-        # so ML learns the same patterns
-        
-        # SEVERE ACCIDENTS (High Confidence >= 85%)
-        severe = (
-            (X['acc_x'].abs() > 25) |  # Extreme forward/back force
-            (X['acc_y'].abs() > 22) |  # Extreme lateral force
-            (X['acc_z'].abs() > 28) |  # Extreme vertical force
-            (X['gyro_x'].abs() > 8) |  # Extreme roll
-            (X['gyro_y'].abs() > 8) |  # Extreme pitch
-            (X['acc_magnitude'] > 30) | # Extreme total acceleration
-            (X['gyro_magnitude'] > 10)  # Extreme total rotation
-        )
-        
-        # DANGEROUS SITUATIONS (Medium Confidence 70-84%)
-        dangerous = (
-            (X['acc_x'].abs() > 18) |  # Heavy braking/acceleration
-            (X['acc_y'].abs() > 15) |  # Hard turn or side impact
-            (X['acc_z'].abs() > 20) |  # Lifting or dropping
-            (X['gyro_x'].abs() > 5) |  # Strong roll
-            (X['gyro_y'].abs() > 5) |  # Strong pitch
-            (X['acc_magnitude'] > 20) | # High acceleration
-            (X['gyro_magnitude'] > 6)   # High rotation
-        )
         
-        # MODERATE CONCERN (Low-Medium Confidence 50-69%)
-        moderate = (
-            (X['acc_x'].abs() > 12) |  # Moderate braking
-            (X['acc_y'].abs() > 10) |  # Moderate turn
-            (X['acc_z'].abs() > 15) |  # Moderate vertical
-            (X['gyro_x'].abs() > 3) |  # Moderate roll
-            (X['gyro_y'].abs() > 3) |  # Moderate pitch
-            (X['acc_magnitude'] > 15) | # Moderate acceleration
-            (X['gyro_magnitude'] > 4)   # Moderate rotation
-        )
-        
-        # SPEED-RELATED RISKS
-        # High speed makes moderate forces more dangerous
-        speed_amplified = (
-            ((X['speed'] > 60) & (X['acc_magnitude'] > 12)) |
-            ((X['speed'] > 50) & (X['gyro_magnitude'] > 3)) |
-            ((X['speed'] > 40) & (X['acc_x'] < -10))  # Hard braking at speed
-        )
-        
-        # COMBINED FORCES (rotation + acceleration = loss of control)
-        combined = (
-            (X['acc_magnitude'] > 12) & (X['gyro_magnitude'] > 3)
-        )
+        The thresholds are the label_rules of accident_rules.json, next to
+        the WorkingAccidentDetector rules, evaluated in one chunked NumPy
+        pass over the feature columns.
         
-        # LOW-SPEED FALLS (stationary or slow speed but high forces)
-        low_speed_fall = (
-            (X['speed'] < 10) & 
-            ((X['gyro_magnitude'] > 5) | (X['acc_magnitude'] > 15))
-        )
-        
-        # Mark as accident if ANY condition is met
-        y[severe | dangerous | moderate | speed_amplified | combined | low_speed_fall] = 1
-        
-        return y
+        Args:
+            X: Features DataFrame (or mapping of feature name -> array)
+            
+        Returns:
+            uint8 array of labels (0=normal, 1=accident)
+        """
+        if isinstance(X, pd.DataFrame):
+            X = {name: X[name].to_numpy() for name in X.columns}
+        return default_engine().rules.label(X, len(next(iter(X.values()))))
     
     def train(self, X, y, test_size=0.2, random_state=42):
         """
-        Train the Random Forest model on sensor data.
+        Train the selected model backend on sensor data.
         
         Args:
             X: Features (sensor readings)
@@ -211,7 +285,7 @@ class MLAccidentDetector:
         Returns:
             dict: Training results with accuracy, confusion matrix, etc.
         """
-        print("\n🎓 Training Random Forest Model...")
+        print(f"\n🎓 Training {self.backend_name} Model...")
         print("=" * 60)
         
         # Split data into training and testing sets
@@ -227,18 +301,9 @@ class MLAccidentDetector:
         X_train_scaled = self.scaler.fit_transform(X_train)
         X_test_scaled = self.scaler.transform(X_test)
         
-        # Train Random Forest Classifier
+        # Train the classifier
         print("\n⏳ Training in progress...")
-        self.model = RandomForestClassifier(
-            n_estimators=150,        # Good balance of trees
-            max_depth=25,            # Deeper to capture subtle patterns
-            min_samples_split=5,     # More sensitive to patterns
-            min_samples_leaf=2,      # Can create finer distinctions
-            max_features='sqrt',     # Use sqrt of features at each split
-            random_state=random_state,
-            class_weight='balanced', # Handle imbalanced data
-            n_jobs=-1                # Use all CPU cores
-        )
+        self.model = build_model(self.backend, random_state, **self.model_params)
         
         self.model.fit(X_train_scaled, y_train)
         
@@ -270,29 +335,179 @@ class MLAccidentDetector:
         print(classification_report(y_test, y_test_pred, 
                                    target_names=['Normal', 'Accident']))
         
-        # Feature Importance
-        print("\n🔍 Feature Importance:")
+        # Feature Importance (impurity based; not provided by boosting)
+        feature_importance = None
+        if hasattr(self.model, 'feature_importances_'):
+            print("\n🔍 Feature Importance:")
+            feature_importance = pd.DataFrame({
+                'feature': self.feature_names,
+                'importance': self.model.feature_importances_
+            }).sort_values('importance', ascending=False)
+            
+            for idx, row in feature_importance.iterrows():
+                print(f"   {row['feature']:20s}: {row['importance']:.4f}")
+        
+        return {
+            'train_accuracy': train_accuracy,
+            'test_accuracy': test_accuracy,
+            'confusion_matrix': cm,
+            'feature_importance': feature_importance
+        }
+    
+    @staticmethod
+    def _iter_chunks(X, y, chunk_size, order=None):
+        """
+        (X_chunk, y_chunk) row blocks; only one block is in memory at a time.
+        
+        With order (a permutation of the row indices) every block is a
+        random row subset instead of a contiguous slice; its rows are read
+        in file order, which keeps memmap reads sequential.
+        """
+        X = X.to_numpy() if isinstance(X, pd.DataFrame) else X
+        for start in range(0, len(X), chunk_size):
+            if order is None:
+                yield np.asarray(X[start:start + chunk_size]), np.asarray(y[start:start + chunk_size])
+            else:
+                rows = np.sort(order[start:start + chunk_size])
+                yield np.asarray(X[rows]), np.asarray(y[rows])
+    
+    def train_incremental(self, X, y, chunk_size=TRAIN_CHUNK_SIZE, n_estimators=None,
+                          test_size=0.2, random_state=42):
+        """
+        Train on bounded memory by streaming the dataset in chunks.
+        
+        Pass 1 fits the scaler with partial_fit and counts the classes.
+        Pass 2 grows the forest tree-by-tree with warm_start: every chunk
+        trains its share of the n_estimators trees on that chunk alone.
+        Chunks are random row subsets (the datasets are stored lap by lap,
+        so contiguous chunks would give each tree a single lap). Only one
+        chunk (plus its scaled copy) and the row permutation are in memory
+        at a time, so X and y can be the memory-mapped arrays from
+        load_dataset_cached.
+        
+        Args:
+            X: Features (DataFrame or 2-D array, e.g. a memmap)
+            y: Labels (0=normal, 1=accident)
+            chunk_size: rows per training chunk
+            n_estimators: total number of trees (default: the model's
+                          n_estimators, from model_params or build_model)
+            test_size: fraction of rows held out for evaluation (random, not stratified)
+            random_state: Random seed for reproducibility
+            
+        Returns:
+            dict: Evaluation results (holdout accuracy, recall, false alarm
+                  rate, confusion matrix, feature importance)
+        """
+        if self.backend != 'random_forest':
+            raise ValueError("Chunked training grows a Random Forest with warm_start; "
+                             f"use train() for the {self.backend_name} backend")
+        n_rows = len(y)
+        n_chunks = -(-n_rows // chunk_size)
+        print(f"\n🎓 Training Random Forest Model (chunked, {n_chunks} chunks of {chunk_size} rows)...")
+        print("=" * 60)
+        
+        # Chunk rows and holdout rows come from one seeded generator, so
+        # both passes (and the evaluation) agree on the chunks and the split
+        order = np.random.default_rng(random_state).permutation(n_rows)
+        def holdout_masks():
+            rng = np.random.default_rng(random_state)
+            for X_chunk, y_chunk in self._iter_chunks(X, y, chunk_size, order):
+                yield X_chunk, y_chunk, rng.random(len(y_chunk)) < test_size
+        
+        # Pass 1: scaler statistics and class counts
+        self.scaler = StandardScaler()
+        class_counts = np.zeros(2, dtype=np.int64)
+        for X_chunk, y_chunk, test in holdout_masks():
+            train = ~test
+            if train.any():
+                self.scaler.partial_fit(X_chunk[train])
+                class_counts += np.bincount(y_chunk[train].astype(np.int64), minlength=2)[:2]
+        
+        n_train = int(class_counts.sum())
+        print(f"📊 Data Split:")
+        print(f"   - Training samples: {n_train}")
+        print(f"   - Testing samples: {n_rows - n_train}")
+        if not class_counts.all():
+            raise ValueError("Training data must contain both normal and accident samples")
+        
+        # 'balanced' weights from the global counts (a per-chunk 'balanced'
+        # would weight every chunk's trees differently)
+        class_weight = {label: n_train / (2 * count) for label, count in enumerate(class_counts)}
+        
+        # Pass 2: grow the forest chunk by chunk
+        print("\n⏳ Training in progress...")
+        self.model = build_model(self.backend, random_state, **self.model_params)
+        if n_estimators is None:
+            n_estimators = self.model.n_estimators
+        self.model.set_params(warm_start=True, n_estimators=0, class_weight=class_weight)
+        trees_done = 0
+        for i, (X_chunk, y_chunk, test) in enumerate(holdout_masks()):
+            train = ~test
+            target = n_estimators * (i + 1) // n_chunks
+            # A tree cannot learn from a single-class chunk: carry its share forward
+            if target <= trees_done or len(np.unique(y_chunk[train])) < 2:
+                continue
+            self.model.n_estimators = target
+            self.model.fit(self.scaler.transform(X_chunk[train]), y_chunk[train])
+            trees_done = target
+            logger.info("🌲 Chunk %d/%d: %d trees", i + 1, n_chunks, trees_done)
+        if trees_done == 0:
+            raise ValueError("No chunk contained both classes; increase chunk_size")
+        if trees_done < n_estimators:
+            # The trailing chunks had a single class, so their shares were never grown
+            logger.warning("⚠️ Forest has %d of %d trees: the last chunks held a single class",
+                           trees_done, n_estimators)
+        
+        # Evaluate on the holdout rows, chunk by chunk
+        print("✅ Training complete!")
+        print("\n📈 Model Evaluation:")
+        print("=" * 60)
+        cm = np.zeros((2, 2), dtype=np.int64)
+        for X_chunk, y_chunk, test in holdout_masks():
+            if test.any():
+                proba = self._predict_proba(self._scale(X_chunk[test]))
+                y_pred = self.model.classes_[np.argmax(proba, axis=1)] == 1
+                cm += np.bincount(2 * y_chunk[test].astype(np.int64) + y_pred, minlength=4).reshape(2, 2)
+        
+        tn, fp, fn, tp = cm.ravel()
+        test_accuracy = float((tn + tp) / max(cm.sum(), 1))
+        recall = float(tp / max(tp + fn, 1))
+        false_alarm_rate = float(fp / max(fp + tn, 1))
+        print(f"🎯 Testing Accuracy: {test_accuracy * 100:.2f}%")
+        print(f"🚨 Recall: {recall * 100:.2f}%   False alarm rate: {false_alarm_rate * 100:.2f}%")
+        print("\n📊 Confusion Matrix (Test Set):")
+        print(cm)
+        
         feature_importance = pd.DataFrame({
             'feature': self.feature_names,
             'importance': self.model.feature_importances_
         }).sort_values('importance', ascending=False)
         
-        for idx, row in feature_importance.iterrows():
-            print(f"   {row['feature']:20s}: {row['importance']:.4f}")
-        
         return {
-            'train_accuracy': train_accuracy,
             'test_accuracy': test_accuracy,
+            'recall': recall,
+            'false_alarm_rate': false_alarm_rate,
             'confusion_matrix': cm,
-            'feature_importance': feature_importance
+            'feature_importance': feature_importance,
+            'n_trees': len(self.model.estimators_),
+            'n_chunks': n_chunks
         }
     
-    def save_model(self, filepath='ml_accident_model.pkl'):
-        """Save the trained model and scaler."""
+    def save_model(self, filepath=None):
+        """
+        Save the trained model and scaler (default: the backend's model file).
+        
+        Random Forest models are also exported as a compiled, memory-mappable
+        directory next to the file (see CompiledForest.save_mmap), which the
+        server maps instead of unpickling.
+        """
+        if filepath is None:
+            filepath = MODEL_BACKENDS[self.backend]['path']
         if self.model is None:
             raise ValueError("No model to save! Train the model first.")
         
         model_data = {
+            'backend': self.backend,
             'model': self.model,
             'scaler': self.scaler,
             'feature_names': self.feature_names
@@ -300,6 +515,10 @@ class MLAccidentDetector:
         
         joblib.dump(model_data, filepath)
         print(f"\n💾 Model saved to: {filepath}")
+        
+        if self.backend == 'random_forest':
+            from compiled_forest import CompiledForest
+            CompiledForest.from_detector(self).save_mmap(mmap_model_dir(filepath), source=filepath)
     
     def load_model(self, filepath='ml_accident_model.pkl'):
         """Load a trained model and scaler."""
@@ -307,11 +526,81 @@ class MLAccidentDetector:
             raise FileNotFoundError(f"Model file not found: {filepath}")
         
         model_data = joblib.load(filepath)
+        self.backend = model_data.get('backend', 'random_forest')
         self.model = model_data['model']
         self.scaler = model_data['scaler']
         self.feature_names = model_data['feature_names']
+        self.pipeline = FeaturePipeline.from_feature_names(self.feature_names)
+        
+        logger.info("✅ %s model loaded from: %s", self.backend_name, filepath)
+    
+    def build_feature_matrix(self, data, groups=None):
+        """
+        Build the model input from raw sensor rows.
         
-        print(f"✅ Model loaded from: {filepath}")
+        Args:
+            data: (N, 7) array (acc_x, acc_y, acc_z, gyro_x, gyro_y, gyro_z, speed)
+                  or a DataFrame with those columns
+            groups: optional per-row stream id for temporal features
+                    (None = the rows are one consecutive stream)
+            
+        Returns:
+            float64 array with columns in self.feature_names order
+        """
+        return self.pipeline.transform(data, groups=groups, dtype=np.float64)
+    
+    def _scale(self, features):
+        """Apply the fitted StandardScaler without sklearn's per-call validation."""
+        mean = getattr(self.scaler, 'mean_', None)
+        scale = getattr(self.scaler, 'scale_', None)
+        if mean is not None:
+            features = features - mean
+        if scale is not None:
+            features = features / scale
+        return features
+    
+    def _predict_proba(self, features_scaled):
+        """
+        Class probabilities from a single pass over the forest.
+        
+        Equivalent to model.predict_proba, but the input is validated once
+        instead of once per tree.
+        """
+        estimators = getattr(self.model, 'estimators_', None)
+        if estimators is None:
+            return self.model.predict_proba(features_scaled)
+        
+        X = np.ascontiguousarray(features_scaled, dtype=np.float32)
+        proba = np.zeros((X.shape[0], len(self.model.classes_)), dtype=np.float64)
+        for estimator in estimators:
+            proba += estimator.predict_proba(X, check_input=False)
+        proba /= len(estimators)
+        return proba
+    
+    def predict_batch(self, data, groups=None):
+        """
+        Predict many sensor readings at once.
+        
+        The label is derived from the same predict_proba pass used for the
+        confidence (argmax, as RandomForestClassifier.predict does), so each
+        batch walks the trees only once.
+        
+        Args:
+            data: (N, 7) array or DataFrame of raw sensor readings
+            groups: optional per-row stream id (temporal feature models only)
+            
+        Returns:
+            tuple: (is_accident: bool array, confidence: float array)
+        """
+        if self.model is None:
+            raise ValueError("No model loaded! Train or load a model first.")
+        
+        features_scaled = self._scale(self.build_feature_matrix(data, groups))
+        proba = self._predict_proba(features_scaled)
+        
+        labels = self.model.classes_.take(np.argmax(proba, axis=1))
+        accident_column = int(np.flatnonzero(self.model.classes_ == 1)[0])
+        return labels == 1, proba[:, accident_column]
     
     def predict(self, sensor_data):
         """
@@ -326,61 +615,43 @@ class MLAccidentDetector:
         if self.model is None:
             raise ValueError("No model loaded! Train or load a model first.")
         
-        # Calculate magnitudes
-        acc_magnitude = np.sqrt(sensor_data['acc_x']**2 + 
-                               sensor_data['acc_y']**2 + 
-                               sensor_data['acc_z']**2)
-        gyro_magnitude = np.sqrt(sensor_data['gyro_x']**2 + 
-                                sensor_data['gyro_y']**2 + 
-                                sensor_data['gyro_z']**2)
-        
-        # Create feature vector
-        features = np.array([[
-            sensor_data['acc_x'],
-            sensor_data['acc_y'],
-            sensor_data['acc_z'],
-            sensor_data['gyro_x'],
-            sensor_data['gyro_y'],
-            sensor_data['gyro_z'],
-            acc_magnitude,
-            gyro_magnitude,
-            sensor_data.get('speed', 0)
-        ]])
-        
-        # Scale features
-        features_scaled = self.scaler.transform(features)
-        
-        # Predict
-        prediction = self.model.predict(features_scaled)[0]
-        confidence = self.model.predict_proba(features_scaled)[0][1]  # Probability of accident
+        row = [[sensor_data['acc_x'], sensor_data['acc_y'], sensor_data['acc_z'],
+                sensor_data['gyro_x'], sensor_data['gyro_y'], sensor_data['gyro_z'],
+                sensor_data.get('speed', 0)]]
+        is_accident, confidence = self.predict_batch(row)
+        prediction = bool(is_accident[0])
+        confidence = float(confidence[0])  # Probability of accident
         
-        # Generate reason
-        if prediction == 1:
-            reason = f"ML Model detected accident pattern (confidence: {confidence*100:.1f}%)"
-        else:
-            reason = f"Normal riding detected (confidence: {(1-confidence)*100:.1f}%)"
-        
-        return bool(prediction), float(confidence), reason
-
+        return prediction, confidence, describe_prediction(prediction, confidence)
 
-def main():
-    """Train and test the ML accident detector."""
+def main(incremental=False, backend='random_forest'):
+    """
+    Train and test the ML accident detector.
+    
+    Args:
+        incremental: train chunk by chunk on bounded memory (--incremental)
+        backend: MODEL_BACKENDS key (--hgb for hist_gradient_boosting)
+    """
+    configure_logging()
     
     # Initialize detector
-    detector = MLAccidentDetector()
+    detector = MLAccidentDetector(backend=backend)
     
     # Set dataset path
     dataset_path = r"Bike&Safe Dataset\Bike&Safe Dataset\Bike&Safe Dataset"
     
     try:
-        # Load dataset
-        X, y = detector.load_dataset(dataset_path)
+        # Load dataset (accelerometer/gyroscope aligned on timestamps, cached)
+        X, y = detector.load_dataset_cached(dataset_path)
         
         # Train model
-        results = detector.train(X, y)
+        if incremental:
+            results = detector.train_incremental(X, y)
+        else:
+            results = detector.train(X, y)
         
         # Save model
-        detector.save_model('ml_accident_model.pkl')
+        detector.save_model()
         
         # Test with sample data
         print("\n" + "=" * 60)
@@ -458,4 +729,5 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    main(incremental='--incremental' in sys.argv[1:],
+         backend='hist_gradient_boosting' if '--hgb' in sys.argv[1:] else 'random_forest')
@@ -0,0 +1,30 @@
+"""
+🗂️ MODEL BACKENDS - NAMES AND MODEL FILES
+========================================
+The ML model families the project can train and serve, with the name
+shown to users and the default model file of each, and the reason text
+every ML backend reports.
+
+Kept free of scikit-learn imports so the server can find (and report)
+trained models without paying for sklearn until one is actually used.
+"""
+
+import os
+
+# Model backends: name shown to users and default model file
+MODEL_BACKENDS = {
+    'random_forest': {'name': 'Random Forest', 'path': 'ml_accident_model.pkl'},
+    'hist_gradient_boosting': {'name': 'Histogram Gradient Boosting', 'path': 'ml_accident_model_hgb.pkl'},
+}
+
+
+def mmap_model_dir(model_path):
+    """Directory holding the memory-mappable export of a model file."""
+    return os.path.splitext(model_path)[0] + '.mmap'
+
+
+def describe_prediction(prediction, confidence):
+    """Reason text of an ML result (confidence = probability of accident)."""
+    if prediction:
+        return f"ML Model detected accident pattern (confidence: {confidence*100:.1f}%)"
+    return f"Normal riding detected (confidence: {(1-confidence)*100:.1f}%)"
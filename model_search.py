@@ -0,0 +1,304 @@
+"""
+🔬 MODEL SEARCH - PARALLEL CROSS-VALIDATED TUNING WITH COST REPORTING
+=====================================================================
+Cross-validates every model family / hyperparameter combination in
+SEARCH_SPACE on the cached Bike&Safe dataset and reports, per candidate:
+
+- recall and false alarm rate (what matters for accident alerts)
+- inference cost: CPU time per reading for single requests and batches
+- model size (pickled model + scaler) and peak training memory
+
+Every (candidate, fold) task runs in its own worker process. Workers map
+the cached feature arrays read-only instead of receiving copies, and each
+process handles one task so its peak RSS is that task's memory (one task
+per process needs Python 3.11+; older versions reuse workers, see
+_pool_options). Peak memory is read with getrusage, so it is reported as
+NaN on Windows. Latency is single-threaded CPU time, so it stays
+comparable while other workers are busy.
+
+The recommended model is the one with the best recall (then the lowest
+false alarm rate) among the candidates within the latency budget.
+
+Usage:
+    python model_search.py --latency-budget-ms 1.0
+    python model_search.py --workers 4 --folds 5 --save
+"""
+
+import argparse
+import itertools
+import json
+import os
+import pickle
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from sklearn.model_selection import StratifiedKFold
+from sklearn.preprocessing import StandardScaler
+from threadpoolctl import threadpool_limits
+from ml_accident_detector import MLAccidentDetector, MODEL_BACKENDS, build_model
+from dataset_cache import DATASET_CACHE_DIR
+from detector_logging import configure_logging, get_logger
+from working_accident_system import SENSOR_COLUMNS
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, peak memory is not reported
+    resource = None
+
+logger = get_logger('search')
+
+DEFAULT_DATASET_PATH = r"Bike&Safe Dataset\Bike&Safe Dataset\Bike&Safe Dataset"
+
+# Model family -> hyperparameter grid (every combination is a candidate)
+SEARCH_SPACE = {
+    'random_forest': {
+        'n_estimators': [50, 150],
+        'max_depth': [12, 25],
+        'min_samples_leaf': [2, 8],
+    },
+    'hist_gradient_boosting': {
+        'max_iter': [100, 200],
+        'max_leaf_nodes': [15, 31],
+        'learning_rate': [0.1, 0.2],
+    },
+}
+
+# Raw sensor columns inside the base feature matrix (FEATURE_NAMES order)
+_RAW_FEATURE_COLUMNS = [0, 1, 2, 3, 4, 5, 8]
+
+# Readings timed per candidate and fold
+LATENCY_SINGLE_SAMPLES = 200
+LATENCY_BATCH_SAMPLES = 4096
+
+
+def candidates(search_space=SEARCH_SPACE):
+    """(backend, params) for every grid combination."""
+    result = []
+    for backend, grid in search_space.items():
+        names = list(grid)
+        for values in itertools.product(*(grid[name] for name in names)):
+            result.append((backend, dict(zip(names, values))))
+    return result
+
+
+def _mapped_file(array):
+    """Path of the .npy file an array (or a view of it) is memory-mapped from."""
+    while isinstance(array, np.ndarray):
+        if isinstance(array, np.memmap) and array.filename:
+            return array.filename
+        array = array.base
+    return None
+
+
+def _peak_rss_mb():
+    """Peak resident memory of this process in MB (NaN where unavailable)."""
+    if resource is None:
+        return float('nan')
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024.0 * 1024.0) if sys.platform == 'darwin' else peak / 1024.0  # Bytes on macOS, KB elsewhere
+
+
+def _pool_options():
+    """One task per worker process where the executor supports it (Python 3.11+)."""
+    if sys.version_info >= (3, 11):
+        return {'max_tasks_per_child': 1}
+    # Older Pythons reuse workers: ru_maxrss is then the worker's peak so far,
+    # and a fold's train_peak_mb only counts growth beyond earlier folds
+    return {}
+
+
+# Worker state: the dataset, mapped once per worker process
+_X = None
+_y = None
+
+
+def _init_worker(features_path, labels_path):
+    global _X, _y
+    _X = np.load(features_path, mmap_mode='r')
+    _y = np.load(labels_path, mmap_mode='r')
+
+
+def _cpu_seconds(func, repeats):
+    start = time.process_time()
+    for _ in range(repeats):
+        func()
+    return (time.process_time() - start) / repeats
+
+
+def _evaluate(task):
+    """Fit one candidate on one fold and measure quality and cost."""
+    backend, params, fold, n_folds, random_state = task
+    rss_before = _peak_rss_mb()
+
+    splitter = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=random_state)
+    train_idx, test_idx = list(splitter.split(np.zeros(len(_y)), _y))[fold]
+    X_train, y_train = np.asarray(_X[train_idx]), np.asarray(_y[train_idx])
+    X_test, y_test = np.asarray(_X[test_idx]), np.asarray(_y[test_idx])
+
+    detector = MLAccidentDetector(backend=backend, model_params=params)
+    model_params = dict(params)
+    if 'n_jobs' in build_model(backend).get_params():
+        model_params['n_jobs'] = 1  # The pool already uses every core
+
+    with threadpool_limits(1):
+        start = time.perf_counter()
+        detector.scaler = StandardScaler().fit(X_train)
+        detector.model = build_model(backend, random_state, **model_params)
+        detector.model.fit(detector.scaler.transform(X_train), y_train)
+        fit_seconds = time.perf_counter() - start
+
+        y_pred, _ = detector.predict_batch(X_test[:, _RAW_FEATURE_COLUMNS])
+
+        # Latency through the real serving paths, on held-out readings
+        raw = X_test[:, _RAW_FEATURE_COLUMNS].astype(np.float64)
+        batch = raw[:LATENCY_BATCH_SAMPLES]
+        batch_seconds = _cpu_seconds(lambda: detector.predict_batch(batch), 3)
+        readings = [dict(zip(SENSOR_COLUMNS, row)) for row in raw[:LATENCY_SINGLE_SAMPLES].tolist()]
+        detector.predict(readings[0])
+        single_seconds = _cpu_seconds(lambda: [detector.predict(r) for r in readings], 1) / len(readings)
+
+    y_true = y_test == 1
+    tp = int((y_pred & y_true).sum())
+    fn = int((~y_pred & y_true).sum())
+    fp = int((y_pred & ~y_true).sum())
+    tn = int((~y_pred & ~y_true).sum())
+    return {
+        'backend': backend,
+        'params': params,
+        'fold': fold,
+        'recall': tp / max(tp + fn, 1),
+        'false_alarm_rate': fp / max(fp + tn, 1),
+        'accuracy': (tp + tn) / max(len(y_test), 1),
+        'single_ms': single_seconds * 1e3,
+        'batch_us_per_reading': batch_seconds / max(len(batch), 1) * 1e6,
+        'fit_seconds': fit_seconds,
+        'model_kb': len(pickle.dumps({'model': detector.model, 'scaler': detector.scaler},
+                                     protocol=pickle.HIGHEST_PROTOCOL)) / 1024.0,
+        'train_peak_mb': max(_peak_rss_mb() - rss_before, 0.0),
+    }
+
+
+def summarize(fold_results):
+    """Average fold metrics per candidate (sizes and memory: worst fold)."""
+    grouped = {}
+    for result in fold_results:
+        key = (result['backend'], json.dumps(result['params'], sort_keys=True))
+        grouped.setdefault(key, []).append(result)
+
+    summary = []
+    for (backend, _), results in grouped.items():
+        row = {'backend': backend, 'params': results[0]['params'], 'folds': len(results)}
+        for metric in ('recall', 'false_alarm_rate', 'accuracy', 'single_ms',
+                       'batch_us_per_reading', 'fit_seconds'):
+            row[metric] = float(np.mean([r[metric] for r in results]))
+        row['recall_std'] = float(np.std([r['recall'] for r in results]))
+        row['model_kb'] = float(max(r['model_kb'] for r in results))
+        row['train_peak_mb'] = float(np.max([r['train_peak_mb'] for r in results]))  # NaN if unmeasured
+        summary.append(row)
+    return summary
+
+
+def recommend(summary, latency_budget_ms):
+    """Best recall, then lowest false alarm rate, among candidates within budget."""
+    within = [row for row in summary if row['single_ms'] <= latency_budget_ms]
+    if not within:
+        return None
+    return max(within, key=lambda row: (round(row['recall'], 4), -row['false_alarm_rate'], -row['single_ms']))
+
+
+def run_search(X, y, search_space=SEARCH_SPACE, n_folds=3, workers=None, random_state=42):
+    """
+    Cross-validate every candidate in a process pool.
+
+    Args:
+        X: (N, 9) base feature matrix, ideally memory-mapped from the cache
+        y: labels
+        search_space: model family -> hyperparameter grid
+        n_folds: stratified CV folds
+        workers: worker processes (default: one per CPU)
+        random_state: seed for the folds and the models
+
+    Returns:
+        list of per-candidate summaries (see summarize)
+    """
+    features_path, labels_path = _mapped_file(X), _mapped_file(y)
+    if features_path is None or labels_path is None:
+        raise ValueError("run_search needs the memory-mapped arrays from load_dataset_cached")
+
+    tasks = [(backend, params, fold, n_folds, random_state)
+             for backend, params in candidates(search_space) for fold in range(n_folds)]
+    workers = workers or os.cpu_count() or 1
+    print(f"🔬 {len(tasks) // n_folds} candidates x {n_folds} folds on {len(y)} samples, {workers} workers")
+
+    fold_results = []
+    # One task per process: ru_maxrss then measures that task alone
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(features_path, labels_path), **_pool_options()) as pool:
+        for result in pool.map(_evaluate, tasks):
+            fold_results.append(result)
+            logger.info("✓ %s %s fold %d: recall %.3f, %.3f ms",
+                        result['backend'], result['params'], result['fold'],
+                        result['recall'], result['single_ms'])
+    return summarize(fold_results)
+
+
+def print_report(summary, best, latency_budget_ms):
+    print("\n" + "=" * 124)
+    print(f"{'model':30s} {'params':40s} {'recall':>7s} {'false+':>7s} "
+          f"{'1x ms':>7s} {'batch µs':>9s} {'size KB':>8s} {'mem MB':>7s}")
+    print("-" * 124)
+    for row in sorted(summary, key=lambda row: (-row['recall'], row['single_ms'])):
+        params = ", ".join(f"{k}={v}" for k, v in row['params'].items())
+        flag = "⭐" if row is best else ("  " if row['single_ms'] <= latency_budget_ms else "⏱")
+        print(f"{flag}{MODEL_BACKENDS[row['backend']]['name']:28s} {params:40s} "
+              f"{row['recall']:7.3f} {row['false_alarm_rate']:7.4f} {row['single_ms']:7.3f} "
+              f"{row['batch_us_per_reading']:9.2f} {row['model_kb']:8.0f} {row['train_peak_mb']:7.0f}")
+    print("=" * 124)
+    print(f"⏱ = over the {latency_budget_ms:g} ms single-reading budget")
+    if best is None:
+        print("⚠️ No candidate meets the latency budget")
+    else:
+        print(f"⭐ Recommended: {MODEL_BACKENDS[best['backend']]['name']} {best['params']} "
+              f"(recall {best['recall']:.3f}, false alarms {best['false_alarm_rate']:.4f}, "
+              f"{best['single_ms']:.3f} ms)")
+
+
+def main(argv=None):
+    """Run the search from the command line."""
+    parser = argparse.ArgumentParser(description="Cross-validated model search with cost reporting")
+    parser.add_argument('--dataset', default=DEFAULT_DATASET_PATH, help="Bike&Safe Dataset folder")
+    parser.add_argument('--cache-dir', default=DATASET_CACHE_DIR)
+    parser.add_argument('--folds', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--latency-budget-ms', type=float, default=1.0,
+                        help="max CPU time per single-reading prediction")
+    parser.add_argument('--output', default='model_search_results.json')
+    parser.add_argument('--save', action='store_true',
+                        help="retrain the recommended model on all data and save it")
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    print("🔬 MODEL SEARCH")
+    print("=" * 60)
+    detector = MLAccidentDetector()
+    X, y = detector.load_dataset_cached(args.dataset, cache_dir=args.cache_dir)
+
+    summary = run_search(X.to_numpy(), y, n_folds=args.folds, workers=args.workers)
+    best = recommend(summary, args.latency_budget_ms)
+    print_report(summary, best, args.latency_budget_ms)
+
+    with open(args.output, 'w') as f:
+        json.dump({'latency_budget_ms': args.latency_budget_ms, 'folds': args.folds,
+                   'recommended': best, 'candidates': summary}, f, indent=2)
+    print(f"💾 Results saved to: {args.output}")
+
+    if args.save and best is not None:
+        winner = MLAccidentDetector(backend=best['backend'], model_params=best['params'])
+        winner.train(X, y)
+        winner.save_model()
+    return best
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() is not None else 1)
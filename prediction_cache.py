@@ -0,0 +1,120 @@
+"""
+🧠 PREDICTION CACHE - BOUNDED LRU FOR REPEATED READINGS
+=======================================================
+The simulator and preset-driven clients send the same readings over and
+over (preset scenarios, slider positions). PredictionCache remembers the
+finished /api/detect response per (model version, reading), so a repeat
+skips inference and explanation generation entirely.
+
+- Bounded: least recently used entries are evicted beyond max_size
+- Entries expire ttl seconds after they were computed
+- Readings are keyed on their exact float values: a hit is only ever the
+  response computed for that very reading (any rounding could return the
+  result of a reading on the other side of a rule threshold)
+- The model version is part of the key: a reloaded rules config or a new
+  model object never serves results computed by the old one
+- Thread-safe; hit/miss/eviction counters for monitoring
+
+Environment variables (read by PredictionCache.from_env):
+    ACCIDENT_CACHE_SIZE        max entries (default 4096, 0 disables)
+    ACCIDENT_CACHE_TTL         seconds an entry stays valid (default 300)
+"""
+
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from working_accident_system import SENSOR_COLUMNS
+
+# One reading as 7 little-endian doubles (SENSOR_COLUMNS order)
+_READING = struct.Struct('<7d')
+
+
+class PredictionCache:
+    """Thread-safe LRU + TTL cache of detection results."""
+
+    def __init__(self, max_size=4096, ttl=300.0):
+        """
+        Args:
+            max_size: max entries (0 disables the cache)
+            ttl: seconds an entry stays valid (None = until evicted)
+        """
+        self.max_size = int(max_size)
+        self.ttl = None if ttl is None else float(ttl)
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @classmethod
+    def from_env(cls):
+        """Cache configured from the ACCIDENT_CACHE_* environment variables."""
+        ttl = float(os.environ.get('ACCIDENT_CACHE_TTL', 300))
+        return cls(max_size=int(os.environ.get('ACCIDENT_CACHE_SIZE', 4096)),
+                   ttl=ttl if ttl > 0 else None)
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    def key(self, sensor_data, version):
+        """
+        Cache key of a reading.
+
+        Args:
+            sensor_data: dict with the SENSOR_COLUMNS keys (speed optional)
+            version: hashable model version; anything that changes the
+                     result (model, rules, request options) belongs here
+        """
+        # + 0.0 folds -0.0 into 0.0, the only distinct floats that score alike
+        return version, _READING.pack(*(float(sensor_data.get(col, 0)) + 0.0 for col in SENSOR_COLUMNS))
+
+    def get(self, key):
+        """Cached value for key, or None (expired entries count as misses)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or time.monotonic() < expires_at:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        """Store value under key, evicting the least recently used entries."""
+        if not self.enabled:
+            return
+        expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Counters and hit rate, for monitoring endpoints."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
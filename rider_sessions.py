@@ -0,0 +1,445 @@
+"""
+🚴 RIDER SESSIONS - PER-DEVICE STATE AND CRASH INCIDENTS
+=======================================================
+/api/detect judges every reading on its own. Clients that send a
+device_id also get a session: the recent readings of that rider and the
+crash incident they are in, if any.
+
+One crash at 100 Hz yields dozens of consecutive positive readings.
+Positives of a device less than `debounce` seconds apart are merged into
+one incident carrying its start/end time, number of positive readings,
+peak confidence and most severe reason. The reading that opens an incident
+is the only one flagged as an alert; the incident is closed (and handed to
+on_incident and the recent incidents list) once `debounce` seconds pass
+without another positive, so an alerting pipeline sees one event per crash.
+A background thread (started on the first reading, so each forked server
+worker runs its own) closes expired incidents every sweep_interval seconds,
+also for riders that stopped sending.
+
+Debounce, idle and incident durations are measured on a monotonic clock,
+so a wall clock step never merges, splits or shortens incidents; reported
+times (first_seen, last_seen, start, end) are converted to epoch seconds.
+
+Sessions live in one SessionStore of fixed capacity with array-backed
+storage: every per-rider field is one preallocated NumPy array indexed by
+slot, and the ring buffers of recent readings are a single
+(capacity, history, 7) float32 block. Memory is bounded by capacity up
+front (about 1 KB per rider at the default history of 32 readings, and
+only touched pages are resident) and does not grow with the number of
+riders seen.
+
+- Sessions idle for idle_timeout seconds are evicted, and expired
+  incidents closed, by a vectorized sweep run every sweep_interval seconds
+- When every slot is taken, the least recently seen 1% of sessions are
+  evicted
+- Thread-safe (one lock, held only for O(1) slot updates)
+
+Each server process keeps its own store, so a device's readings must all
+reach one process (otherwise every worker would hold part of a session
+and report its own copy of each incident). serve.py therefore runs one
+worker by default while sessions are enabled and disables the store when
+told to run more; under other servers app.py disables it on the first
+request that reports several worker processes (wsgi.multiprocess). A
+disabled store keeps the reason in disabled_reason, and requests that
+send a device_id are then refused rather than silently losing sessions.
+
+Environment variables (read by SessionStore.from_env):
+    ACCIDENT_SESSION_CAPACITY  max concurrent sessions (default 100000, 0 disables)
+    ACCIDENT_SESSION_HISTORY   readings kept per rider (default 32)
+    ACCIDENT_SESSION_IDLE      seconds without readings before eviction (default 300)
+    ACCIDENT_SESSION_DEBOUNCE  max seconds between positive readings of one
+                               incident (default 2)
+    ACCIDENT_INCIDENT_HISTORY  closed incidents kept for /api/incidents (default 1000)
+"""
+
+import os
+import threading
+import time
+from collections import deque
+import numpy as np
+from detector_logging import get_logger
+from working_accident_system import SENSOR_COLUMNS
+
+logger = get_logger('sessions')
+
+# Longest accepted device_id
+MAX_DEVICE_ID_LENGTH = 128
+
+
+def validate_device_id(device_id):
+    """The device_id as a non-empty string, or ValueError."""
+    if not isinstance(device_id, str) or not device_id or len(device_id) > MAX_DEVICE_ID_LENGTH:
+        raise ValueError(f"device_id must be a non-empty string of at most {MAX_DEVICE_ID_LENGTH} characters")
+    return device_id
+
+
+class RiderSession:
+    """Read-only view of one slot of a SessionStore."""
+
+    __slots__ = ('store', 'slot', 'device_id')
+
+    def __init__(self, store, slot, device_id):
+        self.store = store
+        self.slot = slot
+        self.device_id = device_id
+
+    @property
+    def sample_count(self):
+        return int(self.store._counts[self.slot])
+
+    @property
+    def recent_readings(self):
+        """Buffered readings, oldest first, as an (n, 7) float32 array."""
+        store, slot = self.store, self.slot
+        count = int(store._counts[slot])
+        if count <= store.history:
+            return store._samples[slot, :count].copy()
+        head = count % store.history
+        return np.concatenate((store._samples[slot, head:], store._samples[slot, :head]))
+
+    @property
+    def incident(self):
+        """The open incident as a dict, or None."""
+        return self.store._incident_dict(self.slot, 'open') if self.store._is_open(self.slot) else None
+
+    def to_dict(self, readings=False):
+        """JSON-ready state (recent_readings only when readings=True)."""
+        store, slot = self.store, self.slot
+        state = {
+            'device_id': self.device_id,
+            'samples': int(store._counts[slot]),
+            'accident_readings': int(store._accident_counts[slot]),
+            'first_seen': store._epoch(store._first_seen[slot]),
+            'last_seen': store._epoch(store._last_seen[slot]),
+            'incident': self.incident,
+            'last_incident': store._last_incident[slot],
+        }
+        if readings:
+            state['recent_readings'] = self.recent_readings.tolist()
+        return state
+
+
+class SessionStore:
+    """Fixed-capacity, array-backed per-device sessions and crash incidents."""
+
+    def __init__(self, capacity=100_000, history=32, idle_timeout=300.0, debounce=2.0,
+                 sweep_interval=1.0, incident_history=1000, on_incident=None, clock=time.monotonic):
+        """
+        Args:
+            capacity: max concurrent sessions (0 disables the store)
+            history: readings kept per rider (ring buffer length)
+            idle_timeout: seconds without readings before a session is evicted
+            debounce: max seconds between two positive readings of one incident
+            sweep_interval: seconds between sweeps for idle sessions and
+                            expired incidents
+            incident_history: closed incidents kept for incidents()
+            on_incident: optional callable receiving every closed incident
+                         dict (called outside the store lock)
+            clock: monotonic seconds, the time base of every timeout
+        """
+        if history < 1:
+            raise ValueError("history must be at least 1")
+        self.capacity = max(int(capacity), 0)
+        self.disabled_reason = None if self.capacity else "session capacity is 0"
+        self.history = int(history)
+        self.idle_timeout = float(idle_timeout)
+        self.debounce = float(debounce)
+        self.sweep_interval = float(sweep_interval)
+        self.on_incident = on_incident
+        self.clock = clock
+
+        n = self.capacity
+        # np.zeros maps fresh zero pages: untouched slots cost no resident memory
+        self._samples = np.zeros((n, self.history, len(SENSOR_COLUMNS)), dtype=np.float32)
+        self._counts = np.zeros(n, dtype=np.int64)
+        self._accident_counts = np.zeros(n, dtype=np.int64)
+        self._first_seen = np.zeros(n, dtype=np.float64)
+        self._last_seen = np.zeros(n, dtype=np.float64)
+        self._in_use = np.zeros(n, dtype=bool)
+        self._device_ids = [None] * n
+
+        # Open incident per slot (readings = 0: none); a positive reading
+        # before debounce_until extends it
+        self._incident_ids = np.zeros(n, dtype=np.int64)
+        self._incident_start = np.zeros(n, dtype=np.float64)
+        self._incident_end = np.zeros(n, dtype=np.float64)
+        self._incident_readings = np.zeros(n, dtype=np.int32)
+        self._incident_peak = np.zeros(n, dtype=np.float32)
+        self._incident_rank = np.zeros(n, dtype=np.int16)
+        self._incident_reason = [None] * n
+        self._debounce_until = np.zeros(n, dtype=np.float64)
+        self._last_incident = [None] * n  # Closed incident dict, only for riders that had one
+
+        self._slots = {}  # device_id -> slot
+        self._free = list(range(n - 1, -1, -1))  # Stack, lowest slot on top
+        self._closed = deque(maxlen=max(int(incident_history), 0))
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+        self._sweeper = None
+        self.created = 0
+        self.evicted_idle = 0
+        self.evicted_full = 0
+        self.incidents_opened = 0
+        self.incidents_closed = 0
+
+    @classmethod
+    def from_env(cls, on_incident=None):
+        """Store configured from the ACCIDENT_SESSION_* environment variables."""
+        store = cls(capacity=int(os.environ.get('ACCIDENT_SESSION_CAPACITY', 100_000)),
+                    history=int(os.environ.get('ACCIDENT_SESSION_HISTORY', 32)),
+                    idle_timeout=float(os.environ.get('ACCIDENT_SESSION_IDLE', 300)),
+                    debounce=float(os.environ.get('ACCIDENT_SESSION_DEBOUNCE', 2)),
+                    incident_history=int(os.environ.get('ACCIDENT_INCIDENT_HISTORY', 1000)),
+                    on_incident=on_incident)
+        if not store.enabled:
+            store.disabled_reason = "ACCIDENT_SESSION_CAPACITY is 0"
+        return store
+
+    @property
+    def enabled(self):
+        return self.capacity > 0
+
+    def __len__(self):
+        return len(self._slots)
+
+    def _epoch(self, t):
+        """Epoch seconds of a store clock reading."""
+        return float(t) + (time.time() - self.clock())
+
+    def _is_open(self, slot):
+        return self._incident_readings[slot] > 0
+
+    def _incident_dict(self, slot, status):
+        start, end = float(self._incident_start[slot]), float(self._incident_end[slot])
+        epoch_start = self._epoch(start)
+        return {
+            'incident_id': int(self._incident_ids[slot]),
+            'device_id': self._device_ids[slot],
+            'status': status,
+            'start': epoch_start,
+            'end': epoch_start + (end - start),
+            'duration': end - start,
+            'readings': int(self._incident_readings[slot]),
+            'peak_confidence': float(self._incident_peak[slot]),
+            'reason': self._incident_reason[slot],
+        }
+
+    def _close(self, slot, closed):
+        """Close the open incident of slot, appending it to closed."""
+        incident = self._incident_dict(slot, 'closed')
+        self._incident_readings[slot] = 0
+        self._incident_reason[slot] = None
+        self._last_incident[slot] = incident
+        self._closed.append(incident)
+        self.incidents_closed += 1
+        closed.append(incident)
+
+    def _release(self, slot, closed):
+        if self._is_open(slot):
+            self._close(slot, closed)
+        del self._slots[self._device_ids[slot]]
+        self._device_ids[slot] = None
+        self._last_incident[slot] = None
+        self._in_use[slot] = False
+        self._free.append(slot)
+
+    def _sweep(self, now, closed):
+        """Close expired incidents and evict every session idle for idle_timeout seconds."""
+        self._next_sweep = now + self.sweep_interval
+        for slot in np.flatnonzero((self._incident_readings > 0) & (self._debounce_until <= now)).tolist():
+            self._close(slot, closed)
+        idle = np.flatnonzero(self._in_use & (self._last_seen < now - self.idle_timeout))
+        for slot in idle.tolist():
+            self._release(slot, closed)
+        self.evicted_idle += len(idle)
+
+    def _acquire(self, device_id, now, closed):
+        """Slot for a new session, evicting the least recently seen ones if full."""
+        if not self._free:
+            self._sweep(now, closed)
+        if not self._free:
+            # Free the least recently seen 1% at once, so a full store does
+            # not pay an O(capacity) scan for every new rider
+            n = max(self.capacity // 100, 1)
+            oldest = np.argpartition(np.where(self._in_use, self._last_seen, np.inf), n - 1)[:n]
+            for slot in oldest.tolist():
+                self._release(slot, closed)
+            self.evicted_full += n
+        slot = self._free.pop()
+        self._slots[device_id] = slot
+        self._device_ids[slot] = device_id
+        self._in_use[slot] = True
+        self._counts[slot] = 0
+        self._accident_counts[slot] = 0
+        self._first_seen[slot] = now
+        self._incident_readings[slot] = 0
+        self._debounce_until[slot] = 0.0
+        self.created += 1
+        return slot
+
+    def _ensure_sweeper(self):
+        # Checked per call: a forked process inherits the object, not the thread
+        sweeper = self._sweeper
+        if sweeper is not None and sweeper.is_alive():
+            return
+        with self._lock:
+            if self._sweeper is None or not self._sweeper.is_alive():
+                self._sweeper = threading.Thread(target=self._run_sweeper, name='rider-sessions-sweeper',
+                                                 daemon=True)
+                self._sweeper.start()
+
+    def _run_sweeper(self):
+        while self.enabled:
+            time.sleep(max(self.sweep_interval, 0.01))
+            try:
+                self.close_expired()
+            except Exception:
+                logger.exception("Session sweep failed")
+
+    def _notify(self, closed):
+        if self.on_incident is None:
+            return
+        for incident in closed:
+            try:
+                self.on_incident(incident)
+            except Exception:
+                logger.exception("Incident handler failed for incident %d", incident['incident_id'])
+
+    def record(self, device_id, sensor_data, is_accident, confidence, reason=None, severity=-1, now=None):
+        """
+        Add one scored reading to the device's session (created on first use).
+
+        Args:
+            device_id: client-chosen device identifier
+            sensor_data: dict with the SENSOR_COLUMNS keys (speed optional)
+            is_accident, confidence: the detection result of this reading
+            reason: reason of a positive reading, kept as the incident reason
+                    if it is the most severe one so far
+            severity: rank of reason (higher = more severe, ties go to the
+                      more confident reading)
+            now: reading time on the store clock (default: clock())
+
+        Returns:
+            dict: device_id, samples, alert (True only for the reading that
+            opens an incident), incident (the open incident or None)
+        """
+        self._ensure_sweeper()
+        now = self.clock() if now is None else float(now)
+        row = [float(sensor_data.get(col, 0)) for col in SENSOR_COLUMNS]
+        closed = []
+        with self._lock:
+            if now >= self._next_sweep:
+                self._sweep(now, closed)
+            slot = self._slots.get(device_id)
+            if slot is None:
+                slot = self._acquire(device_id, now, closed)
+
+            count = int(self._counts[slot])
+            self._samples[slot, count % self.history] = row
+            self._counts[slot] = count + 1
+            self._last_seen[slot] = now
+
+            if self._is_open(slot) and now >= self._debounce_until[slot]:
+                self._close(slot, closed)
+
+            alert = False
+            if is_accident:
+                self._accident_counts[slot] += 1
+                if not self._is_open(slot):
+                    alert = True
+                    self.incidents_opened += 1
+                    self._incident_ids[slot] = self.incidents_opened
+                    self._incident_start[slot] = now
+                    self._incident_peak[slot] = 0.0
+                    self._incident_rank[slot] = severity
+                    self._incident_reason[slot] = reason
+                elif (severity, confidence) > (self._incident_rank[slot], self._incident_peak[slot]):
+                    self._incident_rank[slot] = severity
+                    self._incident_reason[slot] = reason
+                self._incident_end[slot] = now
+                self._incident_readings[slot] += 1
+                self._incident_peak[slot] = max(float(self._incident_peak[slot]), confidence)
+                self._debounce_until[slot] = now + self.debounce
+
+            summary = {
+                'device_id': device_id,
+                'samples': count + 1,
+                'alert': alert,
+                'incident': self._incident_dict(slot, 'open') if self._is_open(slot) else None,
+            }
+        self._notify(closed)
+        return summary
+
+    def close_expired(self, now=None):
+        """Close every incident whose debounce window has passed (and evict idle sessions)."""
+        now = self.clock() if now is None else float(now)
+        closed = []
+        with self._lock:
+            self._sweep(now, closed)
+        self._notify(closed)
+        return closed
+
+    def incidents(self, limit=100):
+        """Open incidents and the most recently closed ones (newest first)."""
+        with self._lock:
+            open_incidents = [self._incident_dict(slot, 'open')
+                              for slot in np.flatnonzero(self._incident_readings > 0).tolist()]
+            recent = list(self._closed)[::-1][:limit]
+        return {'open': open_incidents, 'closed': recent}
+
+    def get(self, device_id):
+        """RiderSession view of a device, or None (valid until the session is evicted)."""
+        with self._lock:
+            slot = self._slots.get(device_id)
+            return None if slot is None else RiderSession(self, slot, device_id)
+
+    def session_dict(self, device_id, readings=True):
+        """Snapshot of a device's session as a dict, or None (taken under the lock)."""
+        with self._lock:
+            slot = self._slots.get(device_id)
+            if slot is None:
+                return None
+            return RiderSession(self, slot, device_id).to_dict(readings=readings)
+
+    def clear(self):
+        """Drop every session (open incidents are closed and reported)."""
+        closed = []
+        with self._lock:
+            for slot in list(self._slots.values()):
+                self._release(slot, closed)
+        self._notify(closed)
+
+    def disable(self, reason="disabled"):
+        """Turn the store off for good (open incidents are closed and reported)."""
+        self.clear()
+        with self._lock:
+            self.capacity = 0
+            self._free = []
+            self.disabled_reason = reason
+
+    def memory_bytes(self):
+        """Bytes reserved by the slot arrays (an upper bound on resident memory)."""
+        arrays = (self._samples, self._counts, self._accident_counts, self._first_seen, self._last_seen,
+                  self._in_use, self._incident_ids, self._incident_start, self._incident_end,
+                  self._incident_readings, self._incident_peak, self._incident_rank, self._debounce_until)
+        return sum(array.nbytes for array in arrays)
+
+    def stats(self):
+        """Occupancy, eviction and incident counters, for monitoring endpoints."""
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'disabled_reason': self.disabled_reason,
+                'active': len(self._slots),
+                'capacity': self.capacity,
+                'history': self.history,
+                'idle_timeout_seconds': self.idle_timeout,
+                'debounce_seconds': self.debounce,
+                'created': self.created,
+                'evicted_idle': self.evicted_idle,
+                'evicted_full': self.evicted_full,
+                'incidents_opened': self.incidents_opened,
+                'incidents_closed': self.incidents_closed,
+                'open_incidents': self.incidents_opened - self.incidents_closed,
+                'reserved_bytes': self.memory_bytes(),
+            }
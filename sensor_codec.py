@@ -0,0 +1,59 @@
+"""
+📦 SENSOR RECORD CODEC - PACKED BINARY UPLOADS
+==============================================
+Compact binary format for gateway uploads to /api/detect and
+/api/detect/bulk, selected with Content-Type: application/vnd.bike-sensor.f32
+
+Each reading is one 28-byte record of seven little-endian float32 values in
+SENSOR_COLUMNS order:
+
+    acc_x, acc_y, acc_z, gyro_x, gyro_y, gyro_z, speed
+
+Records are concatenated with no header; the reading count is
+len(body) / 28. Decoding is a zero-copy np.frombuffer view.
+"""
+
+import numpy as np
+from working_accident_system import SENSOR_COLUMNS
+
+SENSOR_RECORD_CONTENT_TYPE = 'application/vnd.bike-sensor.f32'
+RECORD_DTYPE = np.dtype('<f4')
+RECORD_SIZE = RECORD_DTYPE.itemsize * len(SENSOR_COLUMNS)
+
+
+def is_sensor_record_type(content_type):
+    """True if a Content-Type header selects the packed record format."""
+    return bool(content_type) and content_type.split(';')[0].strip().lower() == SENSOR_RECORD_CONTENT_TYPE
+
+
+def encode_readings(readings):
+    """
+    Pack readings into the binary record format.
+    
+    Args:
+        readings: (N, 7) array-like in SENSOR_COLUMNS order
+        
+    Returns:
+        bytes of length N * RECORD_SIZE
+    """
+    matrix = np.asarray(readings, dtype=RECORD_DTYPE)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    if matrix.ndim != 2 or matrix.shape[1] != len(SENSOR_COLUMNS):
+        raise ValueError(f"Expected an (N, {len(SENSOR_COLUMNS)}) array, got shape {matrix.shape}")
+    return np.ascontiguousarray(matrix).tobytes()
+
+
+def decode_readings(buffer):
+    """
+    View a packed body as an (N, 7) float32 matrix without copying.
+    
+    Args:
+        buffer: bytes-like object holding whole records
+        
+    Returns:
+        read-only (N, 7) float32 array backed by buffer
+    """
+    if len(buffer) % RECORD_SIZE:
+        raise ValueError(f"Body length {len(buffer)} is not a multiple of {RECORD_SIZE}-byte records")
+    return np.frombuffer(buffer, dtype=RECORD_DTYPE).reshape(-1, len(SENSOR_COLUMNS))
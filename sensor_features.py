@@ -0,0 +1,192 @@
+"""
+📐 SENSOR FEATURES - SHARED FEATURE PIPELINE
+============================================
+Builds the model input matrix used by training, the ML detector and the
+compiled forest runtime, so features cannot drift between them.
+
+- One preallocated matrix (float32 for training, float64 for inference)
+- Base features: raw axes, acceleration/gyro magnitudes, speed
+- Optional temporal features: jerk, rolling max/variance and orientation
+  change over a trailing window, computed per recording (no window ever
+  spans two laps or devices)
+- No intermediate DataFrames; depends only on NumPy/pandas, not sklearn
+"""
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from working_accident_system import SENSOR_COLUMNS, to_sensor_matrix
+
+FEATURE_NAMES = ['acc_x', 'acc_y', 'acc_z', 'gyro_x', 'gyro_y', 'gyro_z',
+                 'acc_magnitude', 'gyro_magnitude', 'speed']
+
+TEMPORAL_FEATURE_NAMES = ['acc_jerk', 'acc_rolling_max', 'acc_rolling_var',
+                          'gyro_rolling_max', 'orientation_change']
+
+# Input column -> output column for the raw channels
+_RAW_COLUMNS = [(0, 0), (1, 1), (2, 2), (3, 3), (4, 4), (5, 5), (6, 8)]
+
+
+class FeaturePipeline:
+    """Vectorized raw sensor rows -> model feature matrix."""
+
+    def __init__(self, temporal=False, window=25, rate_hz=50, dtype=np.float32):
+        """
+        Args:
+            temporal: append TEMPORAL_FEATURE_NAMES to the base features
+            window: trailing window length (samples) for rolling features
+            rate_hz: sample rate, used to scale jerk to G/s
+            dtype: default output dtype
+        """
+        self.temporal = bool(temporal)
+        self.window = int(window)
+        self.rate_hz = float(rate_hz)
+        self.dtype = np.dtype(dtype)
+
+    @property
+    def feature_names(self):
+        return FEATURE_NAMES + (TEMPORAL_FEATURE_NAMES if self.temporal else [])
+
+    @classmethod
+    def from_feature_names(cls, feature_names, **kwargs):
+        """Pipeline producing the given columns (as stored with a trained model)."""
+        names = list(feature_names)
+        if names == FEATURE_NAMES:
+            return cls(temporal=False, **kwargs)
+        if names == FEATURE_NAMES + TEMPORAL_FEATURE_NAMES:
+            return cls(temporal=True, **kwargs)
+        raise ValueError(f"Unsupported feature set: {names}")
+
+    def transform(self, data, groups=None, dtype=None, out=None):
+        """
+        Compute all features in one pass into a single matrix.
+
+        Args:
+            data: (N, 7) array in SENSOR_COLUMNS order or a DataFrame with
+                  those columns (speed optional)
+            groups: optional per-row recording id (e.g. lap_id); rows of one
+                    recording must be contiguous. Temporal features restart
+                    at every change. None treats all rows as one stream.
+            dtype: output dtype (defaults to the pipeline dtype)
+            out: optional preallocated (N, n_features) output
+
+        Returns:
+            (N, n_features) array with columns in feature_names order
+        """
+        if not isinstance(data, pd.DataFrame):
+            data = np.asarray(data)
+            if data.ndim != 2 or data.shape[1] != len(SENSOR_COLUMNS):
+                data = to_sensor_matrix(data)
+        n_rows = len(data)
+        n_features = len(self.feature_names)
+        if out is None:
+            out = np.empty((n_rows, n_features), dtype=dtype or self.dtype)
+        elif out.shape != (n_rows, n_features):
+            raise ValueError(f"out must have shape {(n_rows, n_features)}, got {out.shape}")
+
+        # Raw channels are written straight into their output columns
+        if isinstance(data, pd.DataFrame):
+            for (src, dst), col in zip(_RAW_COLUMNS, SENSOR_COLUMNS):
+                if col in data.columns:
+                    out[:, dst] = data[col].to_numpy()
+                elif col == 'speed':
+                    out[:, dst] = 0
+                else:
+                    raise ValueError(f"Missing sensor column: {col}")
+        else:
+            for src, dst in _RAW_COLUMNS:
+                out[:, dst] = data[:, src]
+
+        self._magnitude(out, 0, 6)
+        self._magnitude(out, 3, 7)
+
+        if self.temporal:
+            for start, end in self._segments(groups, n_rows):
+                self._temporal_features(out[start:end])
+        return out
+
+    @staticmethod
+    def _magnitude(out, first, dst):
+        """out[:, dst] = sqrt(x² + y² + z²) of columns first..first+2, in place."""
+        column = out[:, dst]
+        np.multiply(out[:, first], out[:, first], out=column)
+        square = np.empty_like(column)
+        for k in (first + 1, first + 2):
+            np.multiply(out[:, k], out[:, k], out=square)
+            column += square
+        np.sqrt(column, out=column)
+
+    @staticmethod
+    def _segments(groups, n_rows):
+        """(start, end) ranges of contiguous equal group ids."""
+        if groups is None or n_rows == 0:
+            return [(0, n_rows)]
+        groups = np.asarray(groups)
+        cuts = np.flatnonzero(groups[1:] != groups[:-1]) + 1
+        bounds = np.concatenate([[0], cuts, [n_rows]])
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def _rolling_max(self, values, dst):
+        """Trailing-window max, truncated at the segment start."""
+        w = min(self.window, len(values))
+        padded = np.concatenate([np.full(w - 1, -np.inf, dtype=values.dtype), values])
+        np.max(sliding_window_view(padded, w), axis=1, out=dst)
+
+    def _rolling_var(self, values, dst):
+        """Trailing-window variance from prefix sums (shifted for stability)."""
+        n = len(values)
+        w = self.window
+        centered = values.astype(np.float64) - values[0]
+        prefix = np.cumsum(centered)
+        prefix_sq = np.cumsum(centered * centered)
+        sums = prefix.copy()
+        sums_sq = prefix_sq.copy()
+        if n > w:
+            sums[w:] -= prefix[:-w]
+            sums_sq[w:] -= prefix_sq[:-w]
+        counts = np.minimum(np.arange(1, n + 1), w)
+        mean = sums / counts
+        np.maximum(sums_sq / counts - mean * mean, 0.0, out=sums_sq)
+        dst[:] = sums_sq
+
+    def _temporal_features(self, seg):
+        """Fill the temporal columns of one recording segment in place."""
+        base = len(FEATURE_NAMES)
+        acc_mag = seg[:, 6]
+        gyro_mag = seg[:, 7]
+
+        # Jerk: rate of change of the acceleration magnitude (G/s)
+        jerk = seg[:, base]
+        jerk[0] = 0
+        np.subtract(acc_mag[1:], acc_mag[:-1], out=jerk[1:])
+        np.abs(jerk, out=jerk)
+        jerk *= self.rate_hz
+
+        self._rolling_max(acc_mag, seg[:, base + 1])
+        self._rolling_var(acc_mag, seg[:, base + 2])
+        self._rolling_max(gyro_mag, seg[:, base + 3])
+
+        # Orientation change: angle (degrees) between consecutive acc vectors
+        angle = seg[:, base + 4]
+        angle[0] = 0
+        if len(seg) > 1:
+            acc = seg[:, :3]
+            dot = np.einsum('ij,ij->i', acc[1:], acc[:-1])
+            norms = acc_mag[1:] * acc_mag[:-1]
+            cos = np.divide(dot, norms, out=np.ones_like(dot), where=norms > 0)
+            np.clip(cos, -1.0, 1.0, out=cos)
+            angle[1:] = np.degrees(np.arccos(cos))
+
+
+def build_feature_matrix(data):
+    """
+    Build the float64 (N, 9) base model input from raw sensor rows.
+
+    Args:
+        data: (N, 7) array (acc_x, acc_y, acc_z, gyro_x, gyro_y, gyro_z, speed)
+              or a DataFrame with those columns
+
+    Returns:
+        float64 array with columns in FEATURE_NAMES order
+    """
+    return FeaturePipeline(dtype=np.float64).transform(data)
@@ -0,0 +1,211 @@
+"""
+🏭 PRODUCTION SERVER - PRE-FORK WSGI WORKERS
+============================================
+Production entry point for the detection API. `python app.py` is the
+single-process debug server; this runs one master and N worker processes
+so /api/detect throughput scales with the CPU cores.
+
+- The master imports the app and loads every model once (preload_models),
+  then binds the listening socket and forks the workers. Workers share the
+  model pages copy-on-write (memory-mapped Random Forest pages are shared
+  outright) and the kernel spreads connections across their accept() calls.
+- gc.freeze() before forking keeps the collector from touching (and so
+  copying) the preloaded objects in every worker.
+- Numeric libraries run one thread per worker, so N workers do not start
+  N x cores BLAS/OpenMP threads.
+- The master restarts a worker that dies and stops them all on SIGTERM or
+  Ctrl+C.
+- Live WebSocket connections (/api/live) each hold one worker thread, up to
+  ACCIDENT_LIVE_MAX_CONNECTIONS per worker. They need this server (or
+  app.py): under gunicorn /api/live answers 501.
+- Rider sessions (device_id, /api/sessions, /api/incidents) are kept per
+  process, and the kernel hands a device's connections to any worker. So
+  while they are enabled the default is one worker; an explicit --workers
+  N (or ACCIDENT_WORKERS) above 1 disables them with a warning, and
+  requests that send a device_id then get a 503. Set
+  ACCIDENT_SESSION_CAPACITY=0 to get one worker per CPU without sessions.
+  Under gunicorn, app.py disables them itself when -w is above 1.
+
+Forking needs a Unix-like OS; elsewhere a single threaded worker is used.
+
+Usage:
+    python serve.py --workers 4 --port 5000
+    gunicorn --preload -w 4 -b 0.0.0.0:5000 serve:application
+
+Environment variables:
+    ACCIDENT_WORKERS   worker processes (default: one per CPU, or one while
+                       rider sessions are enabled)
+"""
+
+import os
+
+# Must be set before numpy/sklearn load their thread pools
+for _var in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+    os.environ.setdefault(_var, '1')
+
+import argparse
+import gc
+import logging
+import signal
+import socket
+import time
+from werkzeug.serving import make_server
+from app import app, preload_models, ml_detectors, rider_sessions
+from detector_logging import get_logger
+
+logger = get_logger('serve')
+
+# Seconds a worker gets to finish after SIGTERM before it is killed
+SHUTDOWN_TIMEOUT = 10.0
+
+
+class _Shutdown(Exception):
+    """Raised in the master by SIGTERM/SIGINT (interrupts os.waitpid)."""
+
+
+def create_application():
+    """The Flask app with every model loaded, ready to be forked."""
+    loaded = preload_models()
+    for model_type, model in loaded.items():
+        if model is not None:
+            logger.info("✅ Preloaded ML model '%s' (%s)", model_type, model.backend_name)
+    gc.collect()
+    gc.freeze()
+    return app
+
+
+# WSGI callable for external servers (gunicorn --preload serve:application)
+application = create_application()
+
+
+def _run_worker(listener, host, port):
+    """Serve requests from the inherited listening socket until SIGTERM."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # The master handles Ctrl+C
+    server = make_server(host, port, application, threaded=True, fd=listener.fileno())
+
+    def stop(signum, frame):
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    logger.info("👷 Worker %d serving", os.getpid())
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def default_workers():
+    """ACCIDENT_WORKERS, else one per CPU, or one while rider sessions are enabled."""
+    configured = int(os.environ.get('ACCIDENT_WORKERS', 0))
+    if configured:
+        return configured
+    if rider_sessions.enabled:
+        return 1
+    return os.cpu_count() or 1
+
+
+def serve(host='0.0.0.0', port=5000, workers=None):
+    """
+    Run the pre-fork server (blocks until SIGTERM/SIGINT).
+
+    Args:
+        host, port: address to listen on
+        workers: worker processes (default: default_workers())
+    """
+    if not workers:
+        workers = default_workers()
+        if workers == 1 and rider_sessions.enabled:
+            logger.info("🚴 Rider sessions are per process: serving with one worker "
+                        "(set --workers or ACCIDENT_SESSION_CAPACITY=0 to scale out)")
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)  # No per-request access log
+
+    if workers > 1 and hasattr(os, 'fork') and rider_sessions.enabled:
+        # Every worker would keep its own half of each rider's session and
+        # report its own copy of every incident
+        logger.warning("⚠️ Rider sessions are per process: disabled with %d workers (use --workers 1)", workers)
+        rider_sessions.disable(f"the server runs {workers} worker processes (run one worker to keep sessions)")
+
+    if not hasattr(os, 'fork'):
+        logger.warning("⚠️ os.fork is unavailable on this platform, serving from one threaded process")
+        make_server(host, port, application, threaded=True).serve_forever()
+        return
+
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    listener = socket.create_server((host, port), family=family, backlog=2048)
+    listener.set_inheritable(True)
+
+    children = set()
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _run_worker(listener, host, port)
+            except SystemExit as e:
+                code = e.code or 0
+            except BaseException:
+                logger.exception("Worker %d crashed", os.getpid())
+                code = 1
+            finally:
+                os._exit(code)
+        children.add(pid)
+
+    def request_stop(signum, frame):
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        raise _Shutdown()
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    for _ in range(workers):
+        spawn()
+    logger.info("🏭 Serving on http://%s:%d with %d workers (master %d)", host, port, workers, os.getpid())
+
+    try:
+        while True:
+            pid, status = os.waitpid(-1, 0)
+            if pid in children:
+                children.discard(pid)
+                logger.warning("⚠️ Worker %d exited (status %d), restarting", pid, status)
+                time.sleep(0.1)  # Do not spin if workers die at startup
+                spawn()
+    except (_Shutdown, ChildProcessError):
+        pass
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+        while children and time.monotonic() < deadline:
+            for pid in list(children):
+                if os.waitpid(pid, os.WNOHANG)[0]:
+                    children.discard(pid)
+            time.sleep(0.05)
+        for pid in children:
+            os.kill(pid, signal.SIGKILL)
+        listener.close()
+        logger.info("🛑 Server stopped")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-fork production server for the detection API")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes (default: ACCIDENT_WORKERS, else one per CPU, "
+                             "or one while rider sessions are enabled)")
+    args = parser.parse_args(argv)
+
+    print("=" * 70)
+    print("🏭 ACCIDENT DETECTION API - PRODUCTION SERVER")
+    print("=" * 70)
+    print(f"🧠 ML models preloaded: {', '.join(t for t, m in ml_detectors.items() if m is not None) or 'none'}")
+    serve(args.host, args.port, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -38,46 +38,119 @@ const rotationDisplay = document.getElementById('rotation-value');
 // Preset scenarios data (will be loaded from API)
 let presetScenarios = {};
 
+// Live channel: one WebSocket for every evaluation (falls back to fetch)
+let liveSocket = null;
+let liveSeq = 0;
+let liveRetryDelay = 1000;
+const livePending = new Map();  // seq -> {resolve, reject}
+
 // Initialize
 document.addEventListener('DOMContentLoaded', function() {
     checkMLModelStatus();
+    connectLiveChannel();
     loadPresetScenarios();
     updateAllDisplays();
     attachEventListeners();
 });
 
+// Open the live channel; results arrive in order and resolve their request
+function connectLiveChannel() {
+    if (!('WebSocket' in window)) {
+        return;
+    }
+    const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
+    const socket = new WebSocket(`${protocol}//${window.location.host}/api/live?explain=1`);
+    
+    socket.onopen = () => {
+        liveSocket = socket;
+        liveRetryDelay = 1000;
+    };
+    socket.onmessage = (event) => {
+        const message = JSON.parse(event.data);
+        if (message.type === 'hello' || message.type === 'status') {
+            applyModelStatus(message.model_status);
+        } else if (message.type === 'result' && livePending.has(message.seq)) {
+            livePending.get(message.seq).resolve(message);
+            livePending.delete(message.seq);
+        } else if (message.type === 'error') {
+            // Errors answer the oldest request still waiting
+            const [seq, pending] = livePending.entries().next().value || [];
+            if (pending) {
+                pending.reject(new Error(message.error));
+                livePending.delete(seq);
+            }
+        }
+    };
+    socket.onclose = () => {
+        liveSocket = null;
+        livePending.forEach(pending => pending.reject(new Error('Live connection closed')));
+        livePending.clear();
+        // Reconnect with backoff; fetch is used meanwhile
+        setTimeout(connectLiveChannel, liveRetryDelay);
+        liveRetryDelay = Math.min(liveRetryDelay * 2, 30000);
+    };
+}
+
+// Evaluate one reading over the live channel, or with a plain request
+async function requestDetection(sensorData) {
+    if (liveSocket && liveSocket.readyState === WebSocket.OPEN) {
+        const seq = ++liveSeq;
+        return new Promise((resolve, reject) => {
+            livePending.set(seq, {resolve, reject});
+            liveSocket.send(JSON.stringify({...sensorData, seq}));
+        });
+    }
+    
+    const response = await fetch('/api/detect', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(sensorData)
+    });
+    
+    if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    
+    return response.json();
+}
+
 // Check if ML model is available
 async function checkMLModelStatus() {
     try {
         const response = await fetch('/api/model_status');
-        const status = await response.json();
-        
-        const mlStatusDiv = document.getElementById('ml-status');
-        const mlRadio = document.querySelector('input[name="model"][value="ml"]');
-        
-        if (!status.ml_available) {
-            // ML model not available
-            if (mlStatusDiv) {
-                mlStatusDiv.style.display = 'block';
-                mlStatusDiv.innerHTML = '⚠️ ML model not loaded. Using rule-based system. <br><small>To train: python ml_accident_detector.py</small>';
-            }
-            if (mlRadio) {
-                mlRadio.disabled = true;
-                mlRadio.parentElement.style.opacity = '0.5';
-                mlRadio.parentElement.style.cursor = 'not-allowed';
-            }
-        } else {
-            // ML model is available
-            if (mlStatusDiv) {
-                mlStatusDiv.style.display = 'none';
-            }
-            console.log('✅ ML model is ready to use!');
-        }
+        applyModelStatus(await response.json());
     } catch (error) {
         console.error('Error checking ML model status:', error);
     }
 }
 
+// Enable or disable the ML option from a model status report
+function applyModelStatus(status) {
+    const mlStatusDiv = document.getElementById('ml-status');
+    const mlRadio = document.querySelector('input[name="model"][value="ml"]');
+    
+    if (!status.ml_available) {
+        // ML model not available
+        if (mlStatusDiv) {
+            mlStatusDiv.style.display = 'block';
+            mlStatusDiv.innerHTML = '⚠️ ML model not loaded. Using rule-based system. <br><small>To train: python ml_accident_detector.py</small>';
+        }
+        if (mlRadio) {
+            mlRadio.disabled = true;
+            mlRadio.parentElement.style.opacity = '0.5';
+            mlRadio.parentElement.style.cursor = 'not-allowed';
+        }
+    } else {
+        // ML model is available
+        if (mlStatusDiv) {
+            mlStatusDiv.style.display = 'none';
+        }
+        console.log('✅ ML model is ready to use!');
+    }
+}
+
 // Load preset scenarios from server
 async function loadPresetScenarios() {
     try {
@@ -308,23 +381,12 @@ async function detectAccident() {
         gyro_x: parseFloat(gyroXSlider.value),
         gyro_y: parseFloat(gyroYSlider.value),
         gyro_z: parseFloat(gyroZSlider.value),
-        model_type: selectedModel  // Add model selection
+        model_type: selectedModel,  // Add model selection
+        explain: true               // Plain-language explanation for the result panel
     };
     
     try {
-        const response = await fetch('/api/detect', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify(sensorData)
-        });
-        
-        if (!response.ok) {
-            throw new Error(`HTTP error! status: ${response.status}`);
-        }
-        
-        const result = await response.json();
+        const result = await requestDetection(sensorData);
         
         // Display results
         displayResults(result);
@@ -0,0 +1,244 @@
+"""
+🌊 STREAMING BIKE ACCIDENT DETECTOR - WINDOWED RULES
+====================================================
+Consumes a continuous 50-100 Hz accelerometer/gyroscope stream for one
+rider and emits an event only when the WorkingAccidentDetector rules fire
+repeatedly inside a sliding window.
+
+- Samples go into a fixed-size ring buffer (no growth, no reallocation)
+- Rolling features are updated with O(1) work per sample:
+  peak acceleration magnitude, peak jerk, rotation integral over the window
+  and post-impact stillness
+- Rules are scored with the vectorized detect_batch, one call per pushed block
+"""
+
+from collections import deque
+import numpy as np
+from working_accident_system import WorkingAccidentDetector, SENSOR_COLUMNS, describe_reasons, to_sensor_matrix
+
+GRAVITY = 9.81
+
+
+class _RollingMax:
+    """Sliding-window maximum with amortized O(1) updates (monotonic deque)."""
+
+    def __init__(self, window_size):
+        self.window_size = window_size
+        self._candidates = deque()  # (sample_index, value), values decreasing
+
+    def push(self, index, value):
+        candidates = self._candidates
+        while candidates and candidates[-1][1] <= value:
+            candidates.pop()
+        candidates.append((index, value))
+        while candidates[0][0] <= index - self.window_size:
+            candidates.popleft()
+
+    @property
+    def value(self):
+        return self._candidates[0][1] if self._candidates else 0.0
+
+    def clear(self):
+        self._candidates.clear()
+
+
+class StreamingAccidentDetector:
+    """Windowed accident detection over a continuous per-rider IMU stream."""
+
+    def __init__(self, window_size=100, sample_rate_hz=50, min_hits=3,
+                 stillness_seconds=0.0, stillness_tolerance=1.5,
+                 stillness_gyro=1.0, detector=None):
+        """
+        Args:
+            window_size: samples kept in the ring buffer (100 = 2 s at 50 Hz)
+            sample_rate_hz: nominal stream rate, used for jerk and integrals
+            min_hits: rule-positive samples required inside the window
+            stillness_seconds: if > 0, wait for this much post-impact
+                               stillness before emitting the event
+            stillness_tolerance: max deviation of |acc| from gravity (G)
+                                 for a sample to count as still
+            stillness_gyro: max gyro magnitude (°/s) for a still sample
+            detector: WorkingAccidentDetector to reuse (one is created otherwise)
+        """
+        if window_size < 1 or min_hits < 1 or min_hits > window_size:
+            raise ValueError("Need 1 <= min_hits <= window_size")
+
+        self.window_size = int(window_size)
+        self.sample_rate_hz = float(sample_rate_hz)
+        self.min_hits = int(min_hits)
+        self.stillness_samples = int(round(stillness_seconds * sample_rate_hz))
+        self.stillness_tolerance = float(stillness_tolerance)
+        self.stillness_gyro = float(stillness_gyro)
+        self.detector = detector if detector is not None else WorkingAccidentDetector()
+
+        # Ring buffers (slot = sample_index % window_size)
+        self._samples = np.zeros((self.window_size, len(SENSOR_COLUMNS)))
+        self._hits = np.zeros(self.window_size, dtype=bool)
+        self._confidence = np.zeros(self.window_size)
+        self._reasons = np.zeros(self.window_size, dtype=np.uint32)
+        self._rotation = np.zeros(self.window_size)
+
+        self._peak_acc = _RollingMax(self.window_size)
+        self._peak_jerk = _RollingMax(self.window_size)
+        self.reset()
+
+    def reset(self):
+        """Forget all buffered samples and state."""
+        self._samples.fill(0.0)
+        self._hits.fill(False)
+        self._confidence.fill(0.0)
+        self._reasons.fill(0)
+        self._rotation.fill(0.0)
+        self._peak_acc.clear()
+        self._peak_jerk.clear()
+
+        self.samples_seen = 0
+        self._hit_count = 0
+        self._rotation_integral = 0.0
+        self._prev_acc_magnitude = None
+        self._prev_timestamp = None
+        self._still_run = 0
+        self._last_hit_index = None
+        self._latched = False
+        self._pending = None
+
+    @property
+    def features(self):
+        """Current rolling window features."""
+        return {
+            'peak_acc_magnitude': float(self._peak_acc.value),
+            'peak_jerk': float(self._peak_jerk.value),
+            'rotation_integral': float(self._rotation_integral),
+            'stillness_seconds': self._still_run / self.sample_rate_hz,
+            'hits': int(self._hit_count),
+            'samples_in_window': min(self.samples_seen, self.window_size),
+        }
+
+    def window(self):
+        """Buffered samples in chronological order, as an (n, 7) copy."""
+        n = min(self.samples_seen, self.window_size)
+        start = (self.samples_seen - n) % self.window_size
+        return np.roll(self._samples, -start, axis=0)[:n]
+
+    def push(self, samples, timestamps=None):
+        """
+        Feed one or more samples into the stream.
+
+        Args:
+            samples: dict (one reading; speed optional), (7,) / (N, 7) array
+                     or DataFrame in SENSOR_COLUMNS order
+            timestamps: optional per-sample timestamps (seconds); defaults to
+                        sample_index / sample_rate_hz. Jerk and the rotation
+                        integral use the real spacing between timestamps.
+
+        Returns:
+            list of event dicts (usually empty)
+
+        Raises:
+            ValueError: a dict reading lacks an acceleration or gyro axis
+        """
+        if isinstance(samples, dict):
+            for col in SENSOR_COLUMNS[:6]:
+                if col not in samples:
+                    raise ValueError(f"Missing parameter: {col}")
+            samples = [[samples[col] for col in SENSOR_COLUMNS[:6]] + [samples.get('speed', 0)]]
+        block = to_sensor_matrix(samples)
+        if timestamps is not None:
+            timestamps = np.atleast_1d(np.asarray(timestamps, dtype=np.float64))
+            if len(timestamps) != len(block):
+                raise ValueError("timestamps must match the number of samples")
+
+        # Score the whole block with the rule engine in one vectorized call
+        is_accident, confidence, reasons = self.detector.detect_batch(block)
+        sq = block[:, :6] * block[:, :6]
+        acc_magnitude = np.sqrt(sq[:, 0] + sq[:, 1] + sq[:, 2])
+        gyro_magnitude = np.sqrt(sq[:, 3] + sq[:, 4] + sq[:, 5])
+
+        events = []
+        for i in range(len(block)):
+            timestamp = timestamps[i] if timestamps is not None else None
+            event = self._update(block[i], bool(is_accident[i]), float(confidence[i]),
+                                 reasons[i], float(acc_magnitude[i]),
+                                 float(gyro_magnitude[i]), timestamp)
+            if event is not None:
+                events.append(event)
+        return events
+
+    def _update(self, sample, hit, confidence, reasons, acc_magnitude, gyro_magnitude, timestamp):
+        """O(1) state update for a single sample."""
+        index = self.samples_seen
+        slot = index % self.window_size
+        dt = 1.0 / self.sample_rate_hz
+        if timestamp is not None:
+            # Real spacing when timestamps are given (nominal for the first
+            # sample and for repeated or out-of-order timestamps)
+            if self._prev_timestamp is not None and timestamp > self._prev_timestamp:
+                dt = timestamp - self._prev_timestamp
+            self._prev_timestamp = timestamp
+
+        # Evict the sample leaving the window
+        if index >= self.window_size:
+            self._hit_count -= int(self._hits[slot])
+            self._rotation_integral -= self._rotation[slot]
+
+        rotation = gyro_magnitude * dt
+        self._samples[slot] = sample
+        self._hits[slot] = hit
+        self._confidence[slot] = confidence
+        self._reasons[slot] = reasons
+        self._rotation[slot] = rotation
+        self._hit_count += int(hit)
+        self._rotation_integral += rotation
+        if slot == self.window_size - 1:
+            # Re-sum once per lap so add/subtract rounding cannot drift
+            self._rotation_integral = float(self._rotation.sum())
+
+        jerk = 0.0 if self._prev_acc_magnitude is None else abs(acc_magnitude - self._prev_acc_magnitude) / dt
+        self._prev_acc_magnitude = acc_magnitude
+        self._peak_acc.push(index, acc_magnitude)
+        self._peak_jerk.push(index, jerk)
+
+        still = (abs(acc_magnitude - GRAVITY) <= self.stillness_tolerance
+                 and gyro_magnitude <= self.stillness_gyro)
+        self._still_run = self._still_run + 1 if still and not hit else 0
+        if hit:
+            self._last_hit_index = index
+
+        self.samples_seen += 1
+
+        # Re-arm once the window holds no rule hits any more
+        if self._latched and self._pending is None and self._hit_count == 0:
+            self._latched = False
+
+        if not self._latched and self._hit_count >= self.min_hits:
+            # Snapshot now, while the impact is still inside the window
+            self._latched = True
+            self._pending = self._build_event(index, timestamp)
+
+        if self._pending is None:
+            return None
+        if self.stillness_samples:
+            if self._still_run < self.stillness_samples:
+                # Give the rider one window to come to rest, then drop it
+                if index - self._last_hit_index > self.window_size + self.stillness_samples:
+                    self._pending = None
+                return None
+            self._pending['stillness_seconds'] = self._still_run / self.sample_rate_hz
+            self._pending['confirmed_index'] = index
+
+        event, self._pending = self._pending, None
+        return event
+
+    def _build_event(self, index, timestamp):
+        """Summarize the current window (O(window), only on emission)."""
+        reason_mask = int(np.bitwise_or.reduce(self._reasons))
+        event = {
+            'sample_index': index,
+            'timestamp': float(timestamp) if timestamp is not None else index / self.sample_rate_hz,
+            'last_hit_index': self._last_hit_index,
+            'peak_confidence': float(self._confidence.max()),
+            'reason_mask': reason_mask,
+            'reasons': describe_reasons(reason_mask, self.detector.rules.flags),
+        }
+        event.update(self.features)
+        return event
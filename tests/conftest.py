@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from readings import EXTREME_READINGS, random_readings
+
+
+@pytest.fixture(scope='session')
+def ml_readings():
+    return np.vstack([random_readings(3000, seed=3), EXTREME_READINGS])
+
+
+@pytest.fixture(scope='session')
+def ml_detector(ml_readings):
+    """A small Random Forest trained on rule-based labels of synthetic readings."""
+    from ml_accident_detector import MLAccidentDetector
+    from working_accident_system import WorkingAccidentDetector
+    detector = MLAccidentDetector()
+    labels = WorkingAccidentDetector().detect_batch(ml_readings)[0].astype(int)
+    features = pd.DataFrame(detector.build_feature_matrix(ml_readings), columns=detector.feature_names)
+    detector.train(features, labels)
+    return detector
+
+
+@pytest.fixture
+def client():
+    import app
+    app.app.config['TESTING'] = True
+    return app.app.test_client()
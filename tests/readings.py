@@ -0,0 +1,26 @@
+"""Synthetic sensor readings shared by the detector tests."""
+
+import numpy as np
+
+from working_accident_system import SENSOR_COLUMNS
+
+# Crash-like readings on top of the random ones, so every rule tier fires
+EXTREME_READINGS = [
+    [45, 25, 55, 30, 25, 35, 90],
+    [8, 50, 35, 15, 45, 25, 60],
+    [-25, 3, 12, 300, 50, 20, 50],
+    [-18, 2, 9.8, 5, 3, 2, 30],
+    [12, 11, 9.8, 40, 20, 10, 0],
+]
+
+
+def random_readings(n, seed=0):
+    """(n, 7) readings in SENSOR_COLUMNS order, from calm riding to violent crashes."""
+    rng = np.random.default_rng(seed)
+    # Every row gets its own noise scale
+    scale = rng.choice([0.5, 3.0, 8.0, 15.0], p=[0.4, 0.3, 0.2, 0.1], size=(n, 1))
+    readings = rng.normal(0, 1, size=(n, len(SENSOR_COLUMNS))) * scale
+    readings[:, 2] += 9.8
+    readings[:, 3:6] *= 3  # gyroscope spans larger values
+    readings[:, 6] = rng.uniform(0, 120, size=n)
+    return readings
@@ -0,0 +1,142 @@
+"""JSON rule config: compilation, scoring, chunked evaluation and hot reload."""
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from accident_rules import RAW_COLUMNS, RULES_CONFIG_PATH, RuleEngine, RuleSet, load_rules_config, scalar_features
+from readings import EXTREME_READINGS, random_readings
+
+
+@pytest.fixture
+def config():
+    with open(RULES_CONFIG_PATH, encoding='utf-8') as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def rules_path(tmp_path):
+    path = tmp_path / 'rules.json'
+    shutil.copy(RULES_CONFIG_PATH, path)
+    return path
+
+
+@pytest.fixture
+def readings():
+    return np.vstack([random_readings(2000, seed=12), EXTREME_READINGS])
+
+
+def columns_of(readings):
+    return {name: readings[:, i] for i, name in enumerate(RAW_COLUMNS)}
+
+
+def write_config(path, config):
+    # Bump the mtime explicitly: two writes can land within one timestamp tick
+    stat = os.stat(path) if os.path.exists(path) else None
+    path.write_text(json.dumps(config), encoding='utf-8')
+    if stat is not None:
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def test_shipped_config_compiles():
+    rules = load_rules_config()
+    assert rules.flags
+    assert len(set(rules.flags)) == len(rules.flags)
+    assert 0 < rules.accident_threshold < 1
+
+
+def test_batch_matches_scalar(readings):
+    rules = load_rules_config()
+    _, confidence, reasons = rules.detect(columns_of(readings), len(readings))
+    for row, batch_confidence, mask in zip(readings, confidence, reasons):
+        scalar_confidence, messages = rules.score(scalar_features(dict(zip(RAW_COLUMNS, row))))
+        assert scalar_confidence == batch_confidence
+        assert len(messages) == len(rules.describe(mask))
+
+
+def test_score_mask_matches_detect(readings):
+    rules = load_rules_config()
+    masks = rules.detect(columns_of(readings), len(readings))[2]
+    for row, mask in zip(readings[:300], masks):
+        _, messages, scalar_mask = rules.score(scalar_features(dict(zip(RAW_COLUMNS, row))), with_mask=True)
+        assert scalar_mask == mask
+        assert len(messages) == bin(scalar_mask).count('1')
+
+
+def test_messages_match_score(readings):
+    rules = load_rules_config()
+    masks = rules.detect(columns_of(readings), len(readings))[2]
+    for row, mask in zip(readings[:300], masks):
+        features = scalar_features(dict(zip(RAW_COLUMNS, row)))
+        assert rules.messages(mask, features) == rules.score(features)[1]
+
+
+def test_most_severe():
+    rules = load_rules_config()
+    assert rules.most_severe([]) == (None, -1)
+    flag, rank = rules.most_severe(['moderate_impact', 'extreme_crash'])
+    assert flag == 'extreme_crash'
+    assert rank > rules.most_severe(['moderate_impact'])[1]
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 256])
+def test_chunk_size_does_not_change_results(readings, chunk_size):
+    rules = load_rules_config()
+    columns, n = columns_of(readings), len(readings)
+    for expected, actual in zip(rules.detect(columns, n), rules.detect(columns, n, chunk_size=chunk_size)):
+        np.testing.assert_array_equal(expected, actual)
+    np.testing.assert_array_equal(rules.label(columns, n), rules.label(columns, n, chunk_size=chunk_size))
+
+
+@pytest.mark.parametrize('clause', [['no_such_feature', '>', 1], ['acc_x', '=>', 1]])
+def test_invalid_clause_is_rejected(config, clause):
+    config['detection_rules'][0]['rules'][0]['when'] = [clause]
+    with pytest.raises(ValueError):
+        RuleSet(config)
+
+
+def test_unsupported_schema_is_rejected(config):
+    config['schema'] = 99
+    with pytest.raises(ValueError):
+        RuleSet(config)
+
+
+def test_hot_reload_swaps_rules(rules_path, config):
+    engine = RuleEngine(str(rules_path), check_interval=0)
+    before = engine.rules
+    assert before.version == config['version']
+
+    config['version'] = 'test-2'
+    write_config(rules_path, config)
+    after = engine.rules
+    assert after is not before
+    assert after.version == 'test-2'
+
+
+def test_broken_edit_keeps_previous_rules(rules_path):
+    engine = RuleEngine(str(rules_path), check_interval=0)
+    before = engine.rules
+    stat = os.stat(rules_path)
+    rules_path.write_text('{not json', encoding='utf-8')
+    os.utime(rules_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert engine.rules is before
+    with pytest.raises(ValueError):
+        engine.reload()
+    assert engine.rules is before
+
+
+def test_unchanged_file_is_not_recompiled(rules_path):
+    engine = RuleEngine(str(rules_path), check_interval=0)
+    assert engine.rules is engine.rules
+
+
+def test_check_interval_defers_reload(rules_path, config):
+    engine = RuleEngine(str(rules_path), check_interval=3600)
+    before = engine.rules
+    config['version'] = 'test-3'
+    write_config(rules_path, config)
+    assert engine.rules is before
+    assert engine.reload().version == 'test-3'
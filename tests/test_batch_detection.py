@@ -0,0 +1,40 @@
+"""detect_batch must agree with detect_accident reading by reading."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from readings import EXTREME_READINGS, random_readings
+from working_accident_system import WorkingAccidentDetector, SENSOR_COLUMNS
+
+
+@pytest.fixture(scope='module')
+def detector():
+    return WorkingAccidentDetector()
+
+
+def test_batch_matches_scalar(detector):
+    readings = np.vstack([random_readings(2000), EXTREME_READINGS])
+    is_accident, confidence, reasons = detector.detect_batch(readings)
+    for i, row in enumerate(readings):
+        expected_accident, expected_confidence, reason = detector.detect_accident(dict(zip(SENSOR_COLUMNS, row)))[:3]
+        assert bool(is_accident[i]) == bool(expected_accident)
+        assert confidence[i] == pytest.approx(expected_confidence, abs=1e-12)
+        fired = 0 if reason == "Normal riding" else len(reason.split(" | "))
+        assert bin(int(reasons[i])).count('1') == fired
+    assert is_accident.any() and not is_accident.all()
+
+
+def test_dataframe_speed_defaults_to_zero(detector):
+    readings = random_readings(50, seed=2)
+    readings[:, 6] = 0
+    frame = pd.DataFrame(readings[:, :6], columns=SENSOR_COLUMNS[:6])
+    from_frame = detector.detect_batch(frame)
+    from_array = detector.detect_batch(readings)
+    for a, b in zip(from_frame, from_array):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_missing_column_is_rejected(detector):
+    with pytest.raises(ValueError):
+        detector.detect_batch(pd.DataFrame({'acc_x': [1.0]}))
@@ -0,0 +1,79 @@
+import numpy as np
+
+import app
+from readings import EXTREME_READINGS, random_readings
+from working_accident_system import SENSOR_COLUMNS, WorkingAccidentDetector
+
+
+def scenarios_for(readings, expected=None):
+    return [{'name': f'Reading {i}', 'data': dict(zip(SENSOR_COLUMNS, row)),
+             **({} if expected is None else {'expected': bool(expected[i])})}
+            for i, row in enumerate(np.asarray(readings).tolist())]
+
+
+def test_rule_based_matches_scalar_detector(client):
+    scalar = WorkingAccidentDetector()
+    expected = [scalar.detect_accident(dict(zip(SENSOR_COLUMNS, row)))[0] for row in EXTREME_READINGS]
+    response = client.post('/api/batch_test', json={'scenarios': scenarios_for(EXTREME_READINGS, expected)})
+    assert response.status_code == 200
+    body = response.get_json()
+    for result, row in zip(body['results'], EXTREME_READINGS):
+        is_accident, confidence, reason = scalar.detect_accident(dict(zip(SENSOR_COLUMNS, row)))[:3]
+        assert result['is_accident'] == is_accident
+        assert result['confidence'] == confidence
+        assert result['reason'] == reason
+        assert result['correct'] is True
+    assert body['statistics']['accuracy'] == 1.0
+    assert body['statistics']['total'] == len(EXTREME_READINGS)
+
+
+def test_chunked_pool_matches_single_batch(client, monkeypatch):
+    readings = random_readings(500, seed=7)
+    is_accident, confidence, _ = WorkingAccidentDetector().detect_batch(readings)
+    monkeypatch.setattr(app, 'BATCH_TEST_CHUNK_SIZE', 64)
+    body = client.post('/api/batch_test', json={'scenarios': scenarios_for(readings)}).get_json()
+    assert body['statistics']['chunk_size'] == 64
+    assert [r['is_accident'] for r in body['results']] == is_accident.tolist()
+    np.testing.assert_allclose([r['confidence'] for r in body['results']], confidence)
+    assert body['statistics']['accuracy'] is None
+
+
+def test_both_models_report_agreement(client, monkeypatch, ml_detector):
+    monkeypatch.setitem(app.ml_detectors, 'ml', ml_detector)
+    monkeypatch.setitem(app.ml_detectors, 'ml-hgb', ml_detector)
+    readings = random_readings(200, seed=8)
+    body = client.post('/api/batch_test', json={'model_type': 'both',
+                                                'scenarios': scenarios_for(readings)}).get_json()
+    ml_accident = ml_detector.predict_batch(readings)[0]
+    assert [r['models']['ml']['is_accident'] for r in body['results']] == ml_accident.tolist()
+    assert [r['models']['ml-hgb']['is_accident'] for r in body['results']] == ml_accident.tolist()
+    rule_accident = [r['models']['rule-based']['is_accident'] for r in body['results']]
+    assert [r['is_accident'] for r in body['results']] == rule_accident
+    expected = np.mean(ml_accident == np.array(rule_accident))
+    assert body['statistics']['agreement'] == {'ml': expected, 'ml-hgb': expected}
+    assert body['statistics']['agreement_rate'] == expected
+
+
+def test_ml_reasons_match_scalar_predict(client, monkeypatch, ml_detector):
+    monkeypatch.setitem(app.ml_detectors, 'ml', ml_detector)
+    readings = random_readings(20, seed=9)
+    body = client.post('/api/batch_test', json={'model_type': 'ml',
+                                                'scenarios': scenarios_for(readings)}).get_json()
+    for result, row in zip(body['results'], readings.tolist()):
+        assert result['reason'] == ml_detector.predict(dict(zip(SENSOR_COLUMNS, row)))[2]
+
+
+def test_errors(client, monkeypatch):
+    monkeypatch.setitem(app.ml_detectors, 'ml', None)
+    response = client.post('/api/batch_test', json={'model_type': 'ml', 'scenarios': []})
+    assert response.status_code == 400
+
+    response = client.post('/api/batch_test', json={'scenarios': [{'data': {'acc_x': 1}}]})
+    assert response.status_code == 400
+    assert 'acc_y' in response.get_json()['error']
+
+    reading = dict(zip(SENSOR_COLUMNS, EXTREME_READINGS[0]))
+    for value in (None, True, [1]):
+        response = client.post('/api/batch_test', json={'scenarios': [{'data': dict(reading, acc_z=value)}]})
+        assert response.status_code == 400
+        assert 'acc_z' in response.get_json()['error']
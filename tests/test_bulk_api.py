@@ -0,0 +1,83 @@
+import json
+
+import numpy as np
+
+from readings import EXTREME_READINGS
+from accident_rules import scalar_features
+from working_accident_system import SENSOR_COLUMNS, WorkingAccidentDetector, describe_reasons
+
+
+def parse_lines(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_bulk_lists_match_detect_batch(client):
+    body = '\n'.join(json.dumps(row) for row in EXTREME_READINGS)
+    response = client.post('/api/detect/bulk', data=body)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.headers['X-Reading-Count'] == str(len(EXTREME_READINGS))
+
+    is_accident, confidence, reasons = WorkingAccidentDetector().detect_batch(np.array(EXTREME_READINGS))
+    lines = parse_lines(response)
+    assert [line[0] for line in lines] == is_accident.astype(int).tolist()
+    assert [line[2] for line in lines] == reasons.tolist()
+    np.testing.assert_allclose([line[1] for line in lines], confidence, atol=5e-5)
+
+
+def test_bulk_objects_default_speed(client):
+    row = dict(zip(SENSOR_COLUMNS, EXTREME_READINGS[0]))
+    without_speed = {k: v for k, v in row.items() if k != 'speed'}
+    body = json.dumps(without_speed) + '\n\n' + json.dumps(row) + '\n'
+    objects = parse_lines(client.post('/api/detect/bulk', data=body))
+    zero_speed = parse_lines(client.post('/api/detect/bulk', data=json.dumps([*EXTREME_READINGS[0][:6], 0])))
+    assert len(objects) == 2
+    assert objects[0] == zero_speed[0]
+
+
+def test_bulk_six_column_lists(client):
+    body = json.dumps(EXTREME_READINGS[1][:6])
+    six = parse_lines(client.post('/api/detect/bulk', data=body))
+    seven = parse_lines(client.post('/api/detect/bulk', data=json.dumps([*EXTREME_READINGS[1][:6], 0])))
+    assert six == seven
+
+
+def test_bulk_empty_body(client):
+    response = client.post('/api/detect/bulk', data='')
+    assert response.status_code == 200
+    assert response.headers['X-Reading-Count'] == '0'
+
+
+def test_bulk_rejects_bad_lines(client):
+    missing = client.post('/api/detect/bulk', data='{"acc_x": 1}')
+    assert missing.status_code == 400
+    assert 'acc_y' in missing.get_json()['error']
+
+    short = client.post('/api/detect/bulk', data='[1, 2, 3]')
+    assert short.status_code == 400
+
+    garbage = client.post('/api/detect/bulk', data='not json')
+    assert garbage.status_code == 400
+
+
+def test_bulk_rejects_non_finite_values(client):
+    valid_list = json.dumps(EXTREME_READINGS[0])
+    valid_object = json.dumps(dict(zip(SENSOR_COLUMNS, EXTREME_READINGS[0])))
+    for body in (valid_list + '\n[1, 2, null, 0, 0, 0, 0]',
+                 valid_list + '\n[1, 2, NaN, 0, 0, 0, 0]',
+                 valid_object + '\n{"acc_x": Infinity, "acc_y": 0, "acc_z": 9.8, "gyro_x": 0, "gyro_y": 0, "gyro_z": 0}'):
+        response = client.post('/api/detect/bulk', data=body)
+        assert response.status_code == 400
+        assert 'line 2' in response.get_json()['error']
+
+
+def test_bulk_reason_bits_follow_response_headers(client):
+    import app
+    rules = app.detector.rules
+    response = client.post('/api/detect/bulk', data='\n'.join(json.dumps(row) for row in EXTREME_READINGS))
+    assert response.headers['X-Rules-Version'] == str(rules.version)
+    flags = response.headers['X-Reason-Flags'].split(',')
+    assert flags == rules.flags
+    for line, row in zip(parse_lines(response), EXTREME_READINGS):
+        mask = rules.score(scalar_features(dict(zip(SENSOR_COLUMNS, row))), with_mask=True)[2]
+        assert describe_reasons(line[2], flags) == rules.describe(mask)
@@ -0,0 +1,129 @@
+"""CompiledForest: flat-array traversal against scikit-learn."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from compiled_forest import CompiledForest, benchmark, compact_forest, evaluate, fold_scaler_thresholds
+from working_accident_system import SENSOR_COLUMNS, WorkingAccidentDetector
+
+
+@pytest.fixture(scope='module')
+def forest(ml_detector):
+    return CompiledForest.from_detector(ml_detector)
+
+
+def sklearn_proba(detector, readings):
+    features = pd.DataFrame(detector.build_feature_matrix(readings), columns=detector.feature_names)
+    return detector.model.predict_proba(detector.scaler.transform(features))
+
+
+def test_fold_scaler_thresholds_is_exact():
+    rng = np.random.default_rng(0)
+    thresholds = rng.normal(0, 2, 500).astype(np.float32).astype(np.float64)
+    mean = rng.normal(0, 10, 500)
+    scale = rng.uniform(0.1, 20, 500)
+    folded = fold_scaler_thresholds(thresholds, mean, scale)
+
+    def goes_left(x):
+        return ((x - mean) / scale).astype(np.float32).astype(np.float64) <= thresholds
+
+    assert goes_left(folded).all()
+    assert not goes_left(np.nextafter(folded, np.inf)).any()
+
+
+def test_batch_matches_sklearn(forest, ml_detector, ml_readings):
+    expected = sklearn_proba(ml_detector, ml_readings)
+    np.testing.assert_allclose(forest.predict_proba_features(ml_detector.build_feature_matrix(ml_readings)),
+                               expected, rtol=0, atol=1e-12)
+    is_accident, confidence = forest.predict_batch(ml_readings)
+    np.testing.assert_allclose(confidence, expected[:, 1], rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(is_accident, ml_detector.model.predict(
+        ml_detector.scaler.transform(pd.DataFrame(ml_detector.build_feature_matrix(ml_readings),
+                                                  columns=ml_detector.feature_names))) == 1)
+
+
+def test_single_reading_matches_batch(forest, ml_readings):
+    readings = ml_readings[:200]
+    is_accident, confidence = forest.predict_batch(readings)
+    for i, row in enumerate(readings):
+        prediction, single_confidence, _ = forest.predict(dict(zip(SENSOR_COLUMNS, row)))
+        assert prediction == bool(is_accident[i])
+        assert single_confidence == pytest.approx(confidence[i], abs=1e-12)
+
+
+def test_benchmark_times_both_models(forest, ml_detector, ml_readings, capsys):
+    timings = benchmark(ml_detector, forest, ml_readings[:20], repeats=1, sklearn_samples=5)
+    assert set(timings) == {'sklearn', 'compiled'}
+    assert all(seconds > 0 for seconds in timings.values())
+    assert 'compiled  predict' in capsys.readouterr().out
+
+
+def test_readings_on_a_split_threshold(forest, ml_detector):
+    # Raw speed sitting exactly on every folded speed threshold (and one ulp above)
+    speed_column = forest.feature_names.index('speed')
+    internal = (forest.feature == speed_column) & np.isfinite(forest.threshold)
+    speeds = np.unique(forest.threshold[internal])[:50]
+    if not len(speeds):
+        pytest.skip("forest has no speed split")
+    readings = np.zeros((2 * len(speeds), 7))
+    readings[:, 2] = 9.8
+    readings[:, 6] = np.concatenate([speeds, np.nextafter(speeds, np.inf)])
+    np.testing.assert_allclose(forest.predict_batch(readings)[1], sklearn_proba(ml_detector, readings)[:, 1],
+                               rtol=0, atol=1e-12)
+
+
+def test_save_and_load(forest, ml_readings, tmp_path):
+    path = str(tmp_path / 'forest.npz')
+    forest.save(path)
+    loaded = CompiledForest.load(path)
+    for a, b in zip(loaded.predict_batch(ml_readings), forest.predict_batch(ml_readings)):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_subforest_of_every_tree_is_identical(forest, ml_readings):
+    full = forest.subforest()
+    assert full.n_trees == forest.n_trees
+    np.testing.assert_array_equal(full.predict_batch(ml_readings)[1], forest.predict_batch(ml_readings)[1])
+    deep = forest.subforest(max_depth=forest.max_depth)
+    np.testing.assert_array_equal(deep.predict_batch(ml_readings)[1], forest.predict_batch(ml_readings)[1])
+
+
+def test_subforest_selects_trees(forest, ml_detector, ml_readings):
+    trees = [0, 3, 7]
+    features = ml_detector.scaler.transform(pd.DataFrame(ml_detector.build_feature_matrix(ml_readings),
+                                                         columns=ml_detector.feature_names))
+    expected = np.mean([ml_detector.model.estimators_[t].predict_proba(features) for t in trees], axis=0)
+    np.testing.assert_allclose(forest.subforest(trees).predict_batch(ml_readings)[1], expected[:, 1],
+                               rtol=0, atol=1e-12)
+
+
+def test_depth_limit(forest, ml_readings):
+    shallow = forest.subforest(max_depth=3)
+    assert shallow.max_depth <= 3
+    assert len(shallow.feature) <= forest.n_trees * (2 ** 4 - 1)
+    _, confidence = shallow.predict_batch(ml_readings)
+    assert ((confidence >= 0) & (confidence <= 1)).all()
+
+
+def test_compact_file_matches_quantized_forest(forest, ml_readings, tmp_path):
+    path = str(tmp_path / 'compact.npz')
+    quantized = forest.quantized()
+    quantized.save(path, compact=True)
+    loaded = CompiledForest.load(path)
+    np.testing.assert_array_equal(loaded.predict_batch(ml_readings)[1], quantized.predict_batch(ml_readings)[1])
+    # float16 thresholds move a few splits: the decisions should still agree
+    agreement = quantized.predict_batch(ml_readings)[0] == forest.predict_batch(ml_readings)[0]
+    assert agreement.mean() > 0.98
+
+
+def test_compact_forest_keeps_accuracy(forest, ml_detector, ml_readings):
+    features = ml_detector.build_feature_matrix(ml_readings)
+    labels = WorkingAccidentDetector().detect_batch(ml_readings)[0].astype(int)
+
+    compact, stages = compact_forest(forest, features, labels, max_depth=forest.max_depth,
+                                     max_accuracy_drop=0.0, min_trees=5)
+    assert [stage[0] for stage in stages] == ['original', f'depth <= {forest.max_depth}', 'pruned']
+    assert 5 <= compact.n_trees <= forest.n_trees
+    before, after = evaluate(forest, features, labels), evaluate(compact.subforest(), features, labels)
+    assert after['accuracy'] >= before['accuracy'] - 0.01
@@ -0,0 +1,116 @@
+"""DatasetCache: content-addressed keys, atomic entries, rebuild on damage."""
+
+import os
+
+import numpy as np
+import pytest
+
+from dataset_cache import DatasetCache
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    lap = tmp_path / 'data' / 'First route' / 'First lap'
+    lap.mkdir(parents=True)
+    (lap / 'Accelerometer.csv').write_text('time,x,y,z\n0,1,2,3\n1,4,5,6\n')
+    (lap / 'Gyroscope.csv').write_text('time,x,y,z\n0,0.1,0.2,0.3\n1,0.4,0.5,0.6\n')
+    return tmp_path / 'data'
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DatasetCache(str(tmp_path / 'cache'))
+
+
+class Builder:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return {'X': np.arange(12, dtype=np.float32).reshape(4, 3), 'y': np.array([0, 1, 0, 1], dtype=np.uint8)}
+
+
+def test_miss_then_hit(dataset, cache):
+    build = Builder()
+    arrays, hit = cache.get_or_build(str(dataset), {'rate_hz': 50}, build)
+    assert not hit
+    again, hit = cache.get_or_build(str(dataset), {'rate_hz': 50}, build)
+    assert hit and build.calls == 1
+    np.testing.assert_array_equal(again['X'], build()['X'])
+    assert isinstance(again['X'], np.memmap) and not again['X'].flags.writeable
+
+
+def test_key_follows_params_and_contents(dataset, cache):
+    build = Builder()
+    cache.get_or_build(str(dataset), {'rate_hz': 50}, build)
+    cache.get_or_build(str(dataset), {'rate_hz': 100}, build)
+    assert build.calls == 2
+
+    acc = dataset / 'First route' / 'First lap' / 'Accelerometer.csv'
+    acc.write_text(acc.read_text() + '2,7,8,9\n')
+    cache.get_or_build(str(dataset), {'rate_hz': 50}, build)
+    assert build.calls == 3
+
+
+def test_key_follows_file_order_and_paths():
+    a = {'path': '/data/lap/Accelerometer.csv', 'sha256': 'aa'}
+    b = {'path': '/data/lap/Gyroscope.csv', 'sha256': 'bb'}
+    key = DatasetCache.cache_key([a, b], {})
+    assert DatasetCache.cache_key([b, a], {}) != key
+    # Same set of hashes, contents swapped between the two files
+    assert DatasetCache.cache_key([dict(a, sha256='bb'), dict(b, sha256='aa')], {}) != key
+
+
+def test_key_survives_moving_the_dataset(dataset, cache, tmp_path):
+    build = Builder()
+    cache.get_or_build(str(dataset), {}, build)
+    moved = tmp_path / 'moved'
+    dataset.rename(moved)
+    _, hit = cache.get_or_build(str(moved), {}, build)
+    assert hit and build.calls == 1
+
+
+def test_key_ignores_mtime(dataset, cache):
+    build = Builder()
+    cache.get_or_build(str(dataset), {}, build)
+    acc = dataset / 'First route' / 'First lap' / 'Accelerometer.csv'
+    os.utime(acc, (0, 0))
+    _, hit = cache.get_or_build(str(dataset), {}, build)
+    assert hit and build.calls == 1
+
+
+def test_missing_array_file_is_a_miss(dataset, cache):
+    build = Builder()
+    cache.get_or_build(str(dataset), {}, build)
+    key = next(name for name in os.listdir(cache.cache_dir) if not name.startswith('.') and not name.endswith('.json'))
+    os.remove(os.path.join(cache.cache_dir, key, 'y.npy'))
+    assert cache.load(key) is None
+    arrays, hit = cache.get_or_build(str(dataset), {}, build)
+    assert not hit and build.calls == 2
+    np.testing.assert_array_equal(arrays['y'], [0, 1, 0, 1])
+
+
+def test_save_replaces_entry(cache):
+    cache.save('entry', {'a': np.arange(3)}, [], {})
+    cache.save('entry', {'a': np.arange(5)}, [], {})
+    np.testing.assert_array_equal(cache.load('entry')['a'], np.arange(5))
+    assert sorted(os.listdir(cache.cache_dir)) == ['entry']
+
+
+def test_failed_save_keeps_previous_entry(cache):
+    cache.save('entry', {'a': np.arange(3)}, [], {})
+
+    class Unsaveable:
+        def __array__(self, dtype=None, copy=None):
+            raise RuntimeError('broken array')
+
+    with pytest.raises(RuntimeError):
+        cache.save('entry', {'a': Unsaveable()}, [], {})
+    np.testing.assert_array_equal(cache.load('entry')['a'], np.arange(3))
+    assert sorted(os.listdir(cache.cache_dir)) == ['entry']
+
+
+def test_empty_dataset_is_rejected(tmp_path, cache):
+    with pytest.raises(ValueError):
+        cache.get_or_build(str(tmp_path), {}, Builder())
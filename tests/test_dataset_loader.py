@@ -0,0 +1,69 @@
+"""Timestamp parsing and accelerometer/gyroscope alignment."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dataset_loader import ACC_COLUMNS, GYRO_COLUMNS, _timestamps_to_seconds, align_streams, read_sensor_csv
+
+
+def test_epoch_units():
+    seconds = np.array([1_700_000_000.0, 1_700_000_000.02])
+    for scale in (1e3, 1e6, 1e9):
+        converted = _timestamps_to_seconds(pd.Series(seconds * scale))
+        np.testing.assert_allclose(converted, seconds, rtol=0, atol=1e-6)
+
+
+@pytest.mark.parametrize('scale', [1, 1e3, 1e6])
+def test_relative_clock_units(scale):
+    seconds = np.arange(5) * 0.02
+    np.testing.assert_allclose(_timestamps_to_seconds(pd.Series(seconds * scale)), seconds, atol=1e-9)
+
+
+def test_date_strings_share_one_clock():
+    acc = _timestamps_to_seconds(pd.Series(['2024-01-01 10:00:00.00', '2024-01-01 10:00:00.02']))
+    gyro = _timestamps_to_seconds(pd.Series(['2024-01-01 10:00:00.01', '2024-01-01 10:00:00.03']))
+    assert gyro[0] - acc[0] == pytest.approx(0.01, abs=1e-6)
+    assert acc[0] == pytest.approx(pd.Timestamp('2024-01-01 10:00:00').timestamp())
+
+
+def test_unparseable_date_is_nan():
+    seconds = _timestamps_to_seconds(pd.Series(['2024-01-01 10:00:00', 'garbage', 'x']))
+    assert np.isfinite(seconds[0]) and np.isnan(seconds[1:]).all()
+
+
+def stream(start, n, rate_hz, names, slope):
+    t = start + np.arange(n) / rate_hz
+    return pd.DataFrame({'timestamp': t, **{name: slope * (t - 100) + i for i, name in enumerate(names)}})
+
+
+def test_align_streams_interpolates_on_overlap():
+    acc = stream(100.0, 101, 100, ACC_COLUMNS, 2.0)   # 100.0 .. 101.0 s
+    gyro = stream(100.5, 80, 40, GYRO_COLUMNS, 3.0)   # 100.5 .. 102.475 s
+    aligned = align_streams(acc, gyro, rate_hz=50)
+
+    assert aligned['timestamp'].iloc[0] == pytest.approx(100.5)
+    assert aligned['timestamp'].iloc[-1] == pytest.approx(101.0)
+    np.testing.assert_allclose(np.diff(aligned['timestamp']), 0.02)
+    t = aligned['timestamp'].to_numpy()
+    np.testing.assert_allclose(aligned['acc_y'], 2.0 * (t - 100) + 1)
+    np.testing.assert_allclose(aligned['gyro_z'], 3.0 * (t - 100) + 2)
+    assert (aligned['speed'] == 0).all()
+
+
+def test_align_streams_without_overlap():
+    with pytest.raises(ValueError):
+        align_streams(stream(0.0, 10, 10, ACC_COLUMNS, 1.0), stream(5.0, 10, 10, GYRO_COLUMNS, 1.0))
+
+
+def test_read_sensor_csv(tmp_path):
+    path = tmp_path / 'Accelerometer.csv'
+    path.write_text('timestamp;sensor_type;x;y;z\n'
+                    '2024-01-01 10:00:00.04;acc;3;4;5\n'
+                    '2024-01-01 10:00:00.00;acc;0;1;2\n'
+                    '2024-01-01 10:00:00.00;acc;9;9;9\n')
+    df = read_sensor_csv(str(path), ACC_COLUMNS)
+    assert list(df.columns) == ['timestamp'] + ACC_COLUMNS
+    assert len(df) == 2  # sorted, duplicate timestamp dropped
+    assert df['acc_x'].tolist() == [0, 3]
+    assert df['timestamp'].iloc[1] - df['timestamp'].iloc[0] == pytest.approx(0.04, abs=1e-6)
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from explanations import EXPLANATION_FIELDS, EXPLANATION_TEMPLATES, explanation_bucket, generate_human_explanation
+from sensor_codec import SENSOR_RECORD_CONTENT_TYPE, encode_readings
+from working_accident_system import SENSOR_COLUMNS
+
+
+def metrics_of(reading):
+    return {'acc_magnitude': float(np.sqrt(sum(reading[k] ** 2 for k in ('acc_x', 'acc_y', 'acc_z')))),
+            'gyro_magnitude': float(np.sqrt(sum(reading[k] ** 2 for k in ('gyro_x', 'gyro_y', 'gyro_z'))))}
+
+
+def reading(**values):
+    data = dict(acc_x=0.0, acc_y=0.0, acc_z=9.8, gyro_x=0.0, gyro_y=0.0, gyro_z=0.0, speed=20.0)
+    data.update(values)
+    return data
+
+
+@pytest.mark.parametrize('bucket, is_accident, values', [
+    ('stationary_impact', True, dict(acc_x=20, speed=0)),
+    ('sudden_braking', True, dict(acc_x=-18, speed=40)),
+    ('tumbling', True, dict(gyro_x=30)),
+    ('extreme_impact', True, dict(acc_z=30)),
+    ('high_speed_collision', True, dict(speed=70)),
+    ('side_impact', True, dict(acc_y=21, acc_z=0)),
+    ('general_accident', True, dict()),
+    ('stationary', False, dict(speed=0)),
+    ('high_speed_cruising', False, dict(speed=55)),
+    ('minor_bump', False, dict(acc_x=8)),
+    ('smooth_riding', False, dict()),
+])
+def test_every_bucket_is_reachable(bucket, is_accident, values):
+    data = reading(**values)
+    assert explanation_bucket(data, is_accident, metrics_of(data)) == bucket
+
+
+def test_rendered_text():
+    data = reading(acc_x=-18.25, speed=42.4)
+    explanation = generate_human_explanation(data, True, 0.9, '', metrics_of(data))
+    assert set(explanation) == set(EXPLANATION_FIELDS)
+    assert explanation['what_happened'].startswith(
+        "You were riding at 42 km/h and suddenly experienced extreme backward force (18.2G).")
+    assert explanation['analogy'] == EXPLANATION_TEMPLATES['sudden_braking']['analogy']
+
+
+def test_explanations_are_opt_in(client):
+    data = reading(acc_x=-30, speed=50)
+    assert 'explanation' not in client.post('/api/detect', json=data).get_json()
+    explained = client.post('/api/detect', json=dict(data, explain=True)).get_json()
+    assert set(explained['explanation']) == set(EXPLANATION_FIELDS)
+    # The cached plain response must not be served to a client asking for text
+    assert 'explanation' not in client.post('/api/detect', json=data).get_json()
+
+
+def test_binary_explain_query_parameter(client):
+    body = encode_readings([reading(acc_x=-30, speed=50)[col] for col in SENSOR_COLUMNS])
+    plain = client.post('/api/detect', data=body, content_type=SENSOR_RECORD_CONTENT_TYPE).get_json()
+    explained = client.post('/api/detect?explain=yes', data=body,
+                            content_type=SENSOR_RECORD_CONTENT_TYPE).get_json()
+    assert 'explanation' not in plain
+    assert 'explanation' in explained
+
+
+@pytest.mark.parametrize('flag, expected', [
+    (True, True), (1, True), ('true', True), ('Yes', True), ('1', True),
+    (False, False), (0, False), ('false', False), ('0', False), ('no', False), ('', False),
+])
+def test_json_explain_flag_is_parsed_like_live_options(client, flag, expected):
+    body = client.post('/api/detect', json=dict(reading(acc_x=-30, speed=50), explain=flag)).get_json()
+    assert ('explanation' in body) is expected
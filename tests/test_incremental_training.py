@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from ml_accident_detector import MLAccidentDetector
+from working_accident_system import WorkingAccidentDetector
+
+
+@pytest.fixture(scope='module')
+def training_data(ml_readings):
+    X = MLAccidentDetector().build_feature_matrix(ml_readings)
+    y = WorkingAccidentDetector().detect_batch(ml_readings)[0].astype(np.uint8)
+    return X, y
+
+
+def test_chunked_training_from_memmap(training_data, ml_readings, tmp_path):
+    X, y = training_data
+    np.save(tmp_path / 'X.npy', X)
+    X_mmap = np.load(tmp_path / 'X.npy', mmap_mode='r')
+
+    detector = MLAccidentDetector()
+    results = detector.train_incremental(X_mmap, y, chunk_size=700, n_estimators=20)
+    assert results['n_chunks'] == 5
+    assert results['n_trees'] == 20
+    assert results['test_accuracy'] > 0.9
+
+    # The scaler saw exactly the training rows, i.e. everything not held out
+    n_test = int(results['confusion_matrix'].sum())
+    assert 0 < n_test < len(y)
+    assert detector.scaler.n_samples_seen_ == len(y) - n_test
+
+    is_accident, _ = detector.predict_batch(ml_readings)
+    assert (is_accident == y.astype(bool)).mean() > 0.9
+
+
+def test_chunked_training_is_reproducible(training_data):
+    X, y = training_data
+    first, second = MLAccidentDetector(), MLAccidentDetector()
+    first.train_incremental(X, y, chunk_size=1000, n_estimators=8)
+    second.train_incremental(X, y, chunk_size=1000, n_estimators=8)
+    np.testing.assert_array_equal(first.model.predict_proba(first.scaler.transform(X)),
+                                  second.model.predict_proba(second.scaler.transform(X)))
+
+
+def test_single_class_data_is_rejected(training_data):
+    X, _ = training_data
+    with pytest.raises(ValueError):
+        MLAccidentDetector().train_incremental(X, np.zeros(len(X), dtype=np.uint8), chunk_size=1000)
+
+
+def test_model_params_reach_the_forest(training_data):
+    X, y = training_data
+    detector = MLAccidentDetector(model_params={'n_estimators': 12, 'max_depth': 4})
+    results = detector.train_incremental(X, y, chunk_size=len(y) // 3 + 1)
+    assert results['n_trees'] == 12
+    assert max(tree.get_depth() for tree in detector.model.estimators_) <= 4
+
+
+def test_label_sorted_rows_still_train_every_chunk(training_data):
+    # Contiguous chunks of label-sorted rows would each hold a single class
+    X, y = training_data
+    order = np.argsort(y, kind='stable')
+    results = MLAccidentDetector().train_incremental(X[order], y[order], chunk_size=len(y) // 5 + 1,
+                                                     n_estimators=10)
+    assert results['n_trees'] == 10
+    assert results['test_accuracy'] > 0.9
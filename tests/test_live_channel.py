@@ -0,0 +1,190 @@
+"""WebSocket framing of the live channel (RFC 6455, server side)."""
+
+import base64
+import json
+import os
+import socket
+import struct
+import threading
+
+import pytest
+
+from live_channel import (CLOSE_GOING_AWAY, CLOSE_INVALID_DATA, CLOSE_NORMAL, CLOSE_PROTOCOL_ERROR,
+                          CLOSE_TOO_BIG, OP_BINARY, OP_CLOSE, OP_CONTINUATION, OP_PING, OP_PONG, OP_TEXT,
+                          WebSocket, WebSocketClosed, accept_key, encode_frame)
+
+
+def client_frame(opcode, payload, fin=True, mask=True):
+    """A frame as a client sends it (masked)."""
+    header = bytes([(0x80 if fin else 0) | opcode])
+    length = len(payload)
+    mask_bit = 0x80 if mask else 0
+    if length < 126:
+        header += bytes([mask_bit | length])
+    elif length < 1 << 16:
+        header += bytes([mask_bit | 126]) + struct.pack('!H', length)
+    else:
+        header += bytes([mask_bit | 127]) + struct.pack('!Q', length)
+    if not mask:
+        return header + payload
+    key = os.urandom(4)
+    return header + key + bytes(b ^ key[i % 4] for i, b in enumerate(payload))
+
+
+def read_server_frame(sock):
+    """(opcode, payload) of one unmasked server frame."""
+    def exact(n):
+        data = b''
+        while len(data) < n:
+            chunk = sock.recv(n - len(data))
+            assert chunk, 'connection closed'
+            data += chunk
+        return data
+    first, second = exact(2)
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack('!H', exact(2))[0]
+    elif length == 127:
+        length = struct.unpack('!Q', exact(8))[0]
+    return first & 0x0F, exact(length)
+
+
+@pytest.fixture
+def pair():
+    server, client = socket.socketpair()
+    ws = WebSocket(server, server.makefile('rb'), max_message=64, send_timeout=1.0, idle_timeout=1.0)
+    client.settimeout(2.0)
+    yield ws, client
+    server.close()
+    client.close()
+
+
+def test_accept_key_rfc_example():
+    assert accept_key('dGhlIHNhbXBsZSBub25jZQ==') == 's3pPLMBiTxaQ9kYGzzhZRbK+xOo='
+
+
+def test_encode_frame_lengths():
+    assert encode_frame(OP_TEXT, b'hi') == b'\x81\x02hi'
+    assert encode_frame(OP_BINARY, b'x' * 200)[:4] == b'\x82\x7e\x00\xc8'
+    assert encode_frame(OP_BINARY, b'x' * 70000)[:10] == b'\x82\x7f' + struct.pack('!Q', 70000)
+
+
+def test_text_and_binary_messages(pair):
+    ws, client = pair
+    client.sendall(client_frame(OP_TEXT, 'héllo'.encode()) + client_frame(OP_BINARY, b'\x00\x01'))
+    assert ws.receive() == 'héllo'
+    assert ws.receive() == b'\x00\x01'
+
+
+def test_fragmented_message_is_reassembled(pair):
+    ws, client = pair
+    client.sendall(client_frame(OP_TEXT, b'{"a":', fin=False)
+                   + client_frame(OP_PING, b'p')  # control frames may be interleaved
+                   + client_frame(OP_CONTINUATION, b' 1', fin=False)
+                   + client_frame(OP_CONTINUATION, b'}'))
+    assert ws.receive() == '{"a": 1}'
+    assert read_server_frame(client) == (OP_PONG, b'p')
+
+
+def test_ping_is_answered_with_pong(pair):
+    ws, client = pair
+    client.sendall(client_frame(OP_PING, b'hello') + client_frame(OP_PONG, b'ignored')
+                   + client_frame(OP_TEXT, b'next'))
+    assert ws.receive() == 'next'
+    assert read_server_frame(client) == (OP_PONG, b'hello')
+
+
+def test_close_frame(pair):
+    ws, client = pair
+    client.sendall(client_frame(OP_CLOSE, struct.pack('!H', CLOSE_GOING_AWAY)))
+    with pytest.raises(WebSocketClosed) as closed:
+        ws.receive()
+    assert closed.value.code == CLOSE_GOING_AWAY
+    ws.close(closed.value.code)
+    opcode, payload = read_server_frame(client)
+    assert opcode == OP_CLOSE and struct.unpack('!H', payload[:2])[0] == CLOSE_GOING_AWAY
+
+
+@pytest.mark.parametrize('frames', [
+    [client_frame(OP_TEXT, b'x' * 65)],
+    [client_frame(OP_TEXT, b'x' * 40, fin=False), client_frame(OP_CONTINUATION, b'x' * 40)],
+])
+def test_oversize_message(pair, frames):
+    ws, client = pair
+    client.sendall(b''.join(frames))
+    with pytest.raises(WebSocketClosed) as closed:
+        ws.receive()
+    assert closed.value.code == CLOSE_TOO_BIG
+
+
+@pytest.mark.parametrize('frame, code', [
+    (client_frame(OP_TEXT, b'x', mask=False), CLOSE_PROTOCOL_ERROR),
+    (client_frame(OP_CONTINUATION, b'x'), CLOSE_PROTOCOL_ERROR),
+    (client_frame(OP_PING, b'x', fin=False), CLOSE_PROTOCOL_ERROR),
+    (client_frame(OP_TEXT, b'\xff\xfe'), CLOSE_INVALID_DATA),
+])
+def test_protocol_errors(pair, frame, code):
+    ws, client = pair
+    client.sendall(frame)
+    with pytest.raises(WebSocketClosed) as closed:
+        ws.receive()
+    assert closed.value.code == code
+
+
+def test_dropped_connection(pair):
+    ws, client = pair
+    client.sendall(client_frame(OP_TEXT, b'abc')[:3])
+    client.shutdown(socket.SHUT_WR)
+    with pytest.raises(WebSocketClosed) as closed:
+        ws.receive()
+    assert closed.value.code == CLOSE_GOING_AWAY
+
+
+@pytest.fixture(scope='module')
+def server():
+    from werkzeug.serving import make_server
+    from app import app
+    srv = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv.server_port
+    srv.shutdown()
+
+
+def test_live_endpoint_round_trip(server):
+    key = base64.b64encode(os.urandom(16)).decode()
+    with socket.create_connection(('127.0.0.1', server), timeout=5) as sock:
+        sock.sendall((f'GET /api/live HTTP/1.1\r\nHost: localhost\r\nUpgrade: websocket\r\n'
+                      f'Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n'
+                      f'Sec-WebSocket-Version: 13\r\n\r\n').encode())
+        head = b''
+        while not head.endswith(b'\r\n\r\n'):
+            head += sock.recv(1)
+        assert head.startswith(b'HTTP/1.1 101')
+        assert f'Sec-WebSocket-Accept: {accept_key(key)}'.encode() in head
+
+        opcode, payload = read_server_frame(sock)
+        assert json.loads(payload)['type'] == 'hello'
+
+        reading = dict(acc_x=0, acc_y=0, acc_z=9.8, gyro_x=0, gyro_y=0, gyro_z=0, seq=7, explain='false')
+        sock.sendall(client_frame(OP_TEXT, json.dumps(reading).encode()))
+        result = json.loads(read_server_frame(sock)[1])
+        assert result['type'] == 'result' and result['seq'] == 7
+        assert result['is_accident'] is False and 'explanation' not in result
+
+        sock.sendall(client_frame(OP_TEXT, b'{"acc_x": NaN}'))
+        assert json.loads(read_server_frame(sock)[1])['type'] == 'error'
+
+        sock.sendall(client_frame(OP_CLOSE, struct.pack('!H', CLOSE_NORMAL)))
+        opcode, payload = read_server_frame(sock)
+        assert opcode == OP_CLOSE and struct.unpack('!H', payload[:2])[0] == CLOSE_NORMAL
+
+
+def test_other_wsgi_servers_get_a_clear_501(client):
+    # The test client, like gunicorn, hands the app no werkzeug.socket
+    key = base64.b64encode(os.urandom(16)).decode()
+    response = client.get('/api/live', headers={'Upgrade': 'websocket', 'Connection': 'Upgrade',
+                                                 'Sec-WebSocket-Key': key, 'Sec-WebSocket-Version': '13'})
+    assert response.status_code == 501
+    error = response.get_json()['error']
+    assert 'serve.py' in error and '/api/detect' in error
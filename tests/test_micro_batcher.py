@@ -0,0 +1,106 @@
+import threading
+
+import numpy as np
+import pytest
+
+from micro_batcher import Histogram, MicroBatcher
+from readings import random_readings
+from working_accident_system import SENSOR_COLUMNS
+
+
+class RecordingModel:
+    """predict_batch stand-in: accident when acc_x > 0, confidence = row index / 1000."""
+
+    def __init__(self, release=None):
+        self.batch_sizes = []
+        self.release = release
+
+    def predict_batch(self, rows, groups=None):
+        if self.release is not None:
+            self.release.wait(5)
+        self.batch_sizes.append(len(rows))
+        np.testing.assert_array_equal(groups, np.arange(len(rows)))
+        return rows[:, 0] > 0, rows[:, 6] / 1000.0
+
+
+def test_concurrent_calls_are_coalesced():
+    release = threading.Event()
+    model = RecordingModel(release)
+    batcher = MicroBatcher(model.predict_batch, max_batch=64, max_wait=0.05)
+    readings = random_readings(40, seed=22)
+
+    # The first batch blocks in the model while the other calls queue up
+    first = batcher.submit(readings[0].tolist())
+    futures = [batcher.submit(row.tolist()) for row in readings[1:]]
+    release.set()
+
+    results = [first.result(5)] + [future.result(5) for future in futures]
+    assert results == [(bool(row[0] > 0), row[6] / 1000.0) for row in readings]
+    assert sum(model.batch_sizes) == len(readings)
+    assert len(model.batch_sizes) < len(readings)
+    stats = batcher.stats()
+    assert stats['submitted'] == len(readings) and stats['batches'] == len(model.batch_sizes)
+
+
+def test_batches_never_exceed_max_batch():
+    release = threading.Event()
+    model = RecordingModel(release)
+    batcher = MicroBatcher(model.predict_batch, max_batch=8, max_wait=0.05)
+    futures = [batcher.submit(row.tolist()) for row in random_readings(50, seed=23)]
+    release.set()
+    for future in futures:
+        future.result(5)
+    assert max(model.batch_sizes) <= 8
+    assert sum(model.batch_sizes) == 50
+
+
+def test_predict_takes_a_reading_dict():
+    batcher = MicroBatcher(RecordingModel().predict_batch, max_wait=0)
+    reading = dict(zip(SENSOR_COLUMNS, [1.0, 0, 9.8, 0, 0, 0, 250.0]))
+    del reading['speed']
+    assert batcher.predict(reading, timeout=5) == (True, 0.0)
+
+
+def test_errors_reach_every_caller():
+    def broken(rows, groups=None):
+        raise RuntimeError('model failed')
+
+    batcher = MicroBatcher(broken, max_wait=0.01)
+    futures = [batcher.submit([0.0] * 7) for _ in range(3)]
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(5)
+    assert batcher.stats()['errors'] >= 1
+
+
+def test_from_env(monkeypatch):
+    monkeypatch.setenv('ACCIDENT_BATCH_MAX', '1')
+    assert MicroBatcher.from_env(RecordingModel().predict_batch) is None
+    monkeypatch.setenv('ACCIDENT_BATCH_MAX', '32')
+    monkeypatch.setenv('ACCIDENT_BATCH_WINDOW_MS', '5')
+    batcher = MicroBatcher.from_env(RecordingModel().predict_batch)
+    assert batcher.max_batch == 32 and batcher.max_wait == pytest.approx(0.005)
+
+
+def test_histogram_buckets():
+    histogram = Histogram([1, 2, 4])
+    for value in (1, 2, 3, 9):
+        histogram.observe(value)
+    snapshot = histogram.snapshot()
+    assert snapshot['buckets'] == {'<=1': 1, '<=2': 1, '<=4': 1, '>4': 1}
+    assert snapshot['mean'] == pytest.approx(3.75)
+
+
+def test_detect_endpoint_uses_the_batcher(client, monkeypatch, ml_detector):
+    import app
+    batcher = MicroBatcher(ml_detector.predict_batch, max_wait=0)
+    monkeypatch.setitem(app.ml_detectors, 'ml', ml_detector)
+    monkeypatch.setitem(app.ml_batchers, 'ml', batcher)
+    monkeypatch.setattr(app.prediction_cache, 'max_size', 0)
+    reading = dict(zip(SENSOR_COLUMNS, [-30.0, 0, 9.8, 0, 0, 0, 50.0]))
+
+    body = client.post('/api/detect', json=dict(reading, model_type='ml')).get_json()
+    is_accident, confidence, reason = ml_detector.predict(reading)
+    assert (body['is_accident'], body['confidence'], body['reason']) == (is_accident, confidence, reason)
+    assert batcher.stats()['submitted'] == 1
+    assert client.get('/api/batch_stats').get_json()['ml']['batches'] == 1
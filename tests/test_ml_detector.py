@@ -0,0 +1,68 @@
+"""MLAccidentDetector: batched prediction against scikit-learn."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml_accident_detector import MLAccidentDetector
+from readings import random_readings
+from working_accident_system import SENSOR_COLUMNS, WorkingAccidentDetector
+
+
+def sklearn_proba(detector, readings):
+    features = pd.DataFrame(detector.build_feature_matrix(readings), columns=detector.feature_names)
+    return detector.model.predict_proba(detector.scaler.transform(features))[:, 1]
+
+
+def test_predict_batch_matches_sklearn(ml_detector, ml_readings):
+    is_accident, confidence = ml_detector.predict_batch(ml_readings)
+    expected = sklearn_proba(ml_detector, ml_readings)
+    np.testing.assert_allclose(confidence, expected, rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(is_accident, expected > 0.5)
+
+
+def test_predict_matches_batch(ml_detector, ml_readings):
+    readings = ml_readings[:50]
+    is_accident, confidence = ml_detector.predict_batch(readings)
+    for i, row in enumerate(readings):
+        prediction, single_confidence, reason = ml_detector.predict(dict(zip(SENSOR_COLUMNS, row)))
+        assert prediction == bool(is_accident[i])
+        assert single_confidence == pytest.approx(confidence[i], abs=1e-12)
+        assert reason
+
+
+def test_save_and_load_round_trip(ml_detector, ml_readings, tmp_path):
+    path = str(tmp_path / 'model.pkl')
+    ml_detector.save_model(path)
+    loaded = MLAccidentDetector()
+    loaded.load_model(path)
+    for a, b in zip(loaded.predict_batch(ml_readings), ml_detector.predict_batch(ml_readings)):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_predict_without_model():
+    with pytest.raises(ValueError):
+        MLAccidentDetector().predict_batch(random_readings(2))
+
+
+def test_gradient_boosting_backend(ml_readings, tmp_path):
+    detector = MLAccidentDetector(backend='hist_gradient_boosting')
+    labels = WorkingAccidentDetector().detect_batch(ml_readings)[0].astype(int)
+    features = pd.DataFrame(detector.build_feature_matrix(ml_readings), columns=detector.feature_names)
+    detector.train(features, labels)
+
+    is_accident, confidence = detector.predict_batch(ml_readings)
+    np.testing.assert_allclose(confidence, sklearn_proba(detector, ml_readings), rtol=0, atol=1e-12)
+    assert (is_accident == labels.astype(bool)).mean() > 0.9
+
+    path = str(tmp_path / 'model_hgb.pkl')
+    detector.save_model(path)
+    loaded = MLAccidentDetector()
+    loaded.load_model(path)
+    assert loaded.backend == 'hist_gradient_boosting'
+    np.testing.assert_array_equal(loaded.predict_batch(ml_readings)[1], confidence)
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        MLAccidentDetector(backend='svm')
@@ -0,0 +1,70 @@
+"""Memory-mapped Random Forest export and the server's lazy model loading."""
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+import app
+from compiled_forest import CompiledForest
+from ml_accident_detector import MLAccidentDetector
+from model_backends import MODEL_BACKENDS, mmap_model_dir
+
+
+@pytest.fixture
+def saved_model(ml_detector, tmp_path, monkeypatch):
+    """ml_detector saved as the server's 'ml' model file (plus its .mmap export)."""
+    path = str(tmp_path / 'model.pkl')
+    ml_detector.save_model(path)
+    monkeypatch.setitem(MODEL_BACKENDS['random_forest'], 'path', path)
+    return path
+
+
+def test_save_model_exports_mmap(saved_model, ml_detector, ml_readings):
+    forest = CompiledForest.load_mmap(mmap_model_dir(saved_model), source=saved_model)
+    assert not forest.value.flags.writeable
+    for a, b in zip(forest.predict_batch(ml_readings), ml_detector.predict_batch(ml_readings)):
+        np.testing.assert_allclose(a, b, rtol=0, atol=1e-12)
+
+
+def test_stale_export_is_rejected(saved_model):
+    stat = os.stat(saved_model)
+    os.utime(saved_model, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    with pytest.raises(ValueError, match='stale'):
+        CompiledForest.load_mmap(mmap_model_dir(saved_model), source=saved_model)
+    # Without a source to check against, the export still maps
+    CompiledForest.load_mmap(mmap_model_dir(saved_model))
+
+
+def test_missing_and_unknown_exports(saved_model, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        CompiledForest.load_mmap(str(tmp_path / 'nowhere.mmap'))
+    manifest_path = os.path.join(mmap_model_dir(saved_model), 'manifest.json')
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    manifest['format'] = -1
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f)
+    with pytest.raises(ValueError):
+        CompiledForest.load_mmap(mmap_model_dir(saved_model))
+
+
+def test_server_maps_fresh_export_and_unpickles_stale_one(saved_model, ml_detector, ml_readings):
+    assert isinstance(app.load_ml_detector('ml'), CompiledForest)
+
+    ml_detector.save_model(saved_model)
+    stat = os.stat(saved_model)
+    os.utime(saved_model, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    loaded = app.load_ml_detector('ml')
+    assert isinstance(loaded, MLAccidentDetector)
+    np.testing.assert_array_equal(loaded.predict_batch(ml_readings)[1], ml_detector.predict_batch(ml_readings)[1])
+
+
+def test_models_load_on_first_use(saved_model, monkeypatch):
+    monkeypatch.setattr(app, 'ml_detectors', {})
+    assert app.ml_model_available('ml')
+    assert 'ml' not in app.ml_detectors
+    forest = app.get_ml_detector('ml')
+    assert app.get_ml_detector('ml') is forest
+    assert app.get_ml_detector('nonsense') is None
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from model_search import candidates, recommend, run_search, summarize
+from sensor_features import build_feature_matrix
+from working_accident_system import WorkingAccidentDetector
+
+TINY_SPACE = {
+    'random_forest': {'n_estimators': [5], 'max_depth': [3, 8]},
+    'hist_gradient_boosting': {'max_iter': [10]},
+}
+
+
+def test_candidates_cover_the_grid():
+    assert candidates(TINY_SPACE) == [
+        ('random_forest', {'n_estimators': 5, 'max_depth': 3}),
+        ('random_forest', {'n_estimators': 5, 'max_depth': 8}),
+        ('hist_gradient_boosting', {'max_iter': 10}),
+    ]
+
+
+def test_summarize_and_recommend():
+    def fold(backend, recall, single_ms, false_alarm_rate=0.01):
+        return {'backend': backend, 'params': {}, 'recall': recall, 'false_alarm_rate': false_alarm_rate,
+                'accuracy': 0.9, 'single_ms': single_ms, 'batch_us_per_reading': 1.0,
+                'fit_seconds': 1.0, 'model_kb': 10.0, 'train_peak_mb': 5.0}
+
+    summary = summarize([fold('random_forest', 0.9, 3.0), fold('random_forest', 0.8, 5.0),
+                         fold('hist_gradient_boosting', 0.8, 1.0)])
+    forest = next(row for row in summary if row['backend'] == 'random_forest')
+    assert forest['folds'] == 2
+    assert forest['recall'] == pytest.approx(0.85)
+    assert forest['single_ms'] == pytest.approx(4.0)
+
+    assert recommend(summary, latency_budget_ms=10)['backend'] == 'random_forest'
+    assert recommend(summary, latency_budget_ms=2)['backend'] == 'hist_gradient_boosting'
+    assert recommend(summary, latency_budget_ms=0.5) is None
+
+
+def test_run_search_needs_memory_mapped_arrays(ml_readings):
+    X = build_feature_matrix(ml_readings)
+    with pytest.raises(ValueError):
+        run_search(X, np.zeros(len(X)), TINY_SPACE)
+
+
+def test_run_search_on_memory_mapped_dataset(ml_readings, tmp_path):
+    np.save(tmp_path / 'X.npy', build_feature_matrix(ml_readings).astype(np.float32))
+    np.save(tmp_path / 'y.npy', WorkingAccidentDetector().detect_batch(ml_readings)[0].astype(np.uint8))
+    X = np.load(tmp_path / 'X.npy', mmap_mode='r')
+    y = np.load(tmp_path / 'y.npy', mmap_mode='r')
+
+    # Every task runs in a fresh worker process, so keep the grid to one candidate
+    summary = run_search(X, y, {'random_forest': {'n_estimators': [5]}}, n_folds=2, workers=2)
+    assert len(summary) == 1
+    row = summary[0]
+    assert row['folds'] == 2
+    assert 0.5 < row['recall'] <= 1.0
+    assert row['single_ms'] > 0 and row['model_kb'] > 0
+
+
+def test_peak_memory_without_getrusage(monkeypatch):
+    import model_search
+    assert model_search._peak_rss_mb() > 0
+    monkeypatch.setattr(model_search, 'resource', None)
+    assert np.isnan(model_search._peak_rss_mb())
+
+
+def test_one_task_per_worker_only_where_supported(monkeypatch):
+    import model_search
+    monkeypatch.setattr(model_search.sys, 'version_info', (3, 10, 12))
+    assert model_search._pool_options() == {}
+    monkeypatch.setattr(model_search.sys, 'version_info', (3, 11, 0))
+    assert model_search._pool_options() == {'max_tasks_per_child': 1}
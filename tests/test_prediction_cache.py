@@ -0,0 +1,87 @@
+"""PredictionCache: exact keys, LRU eviction and TTL."""
+
+import time
+
+import pytest
+
+from prediction_cache import PredictionCache
+
+READING = dict(acc_x=15.0, acc_y=0.0, acc_z=0.0, gyro_x=0.0, gyro_y=0.0, gyro_z=0.0, speed=0.0)
+
+
+def test_keys_are_exact():
+    cache = PredictionCache()
+    key = cache.key(READING, 'v1')
+    assert cache.key(dict(READING), 'v1') == key
+    assert cache.key(dict(READING, acc_x=15.0004), 'v1') != key
+    assert cache.key(dict(READING, acc_x=15.000000000000002), 'v1') != key
+    assert cache.key(READING, 'v2') != key
+
+
+def test_speed_defaults_and_signed_zero():
+    cache = PredictionCache()
+    without_speed = {k: v for k, v in READING.items() if k != 'speed'}
+    assert cache.key(without_speed, 'v') == cache.key(READING, 'v')
+    assert cache.key(dict(READING, acc_y=-0.0), 'v') == cache.key(READING, 'v')
+
+
+def test_get_put_and_lru_eviction():
+    cache = PredictionCache(max_size=2, ttl=None)
+    keys = [cache.key(dict(READING, acc_x=float(i)), 'v') for i in range(3)]
+    cache.put(keys[0], 'a')
+    cache.put(keys[1], 'b')
+    assert cache.get(keys[0]) == 'a'  # keys[1] is now least recently used
+    cache.put(keys[2], 'c')
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == 'a' and cache.get(keys[2]) == 'c'
+    stats = cache.stats()
+    assert stats['evictions'] == 1 and stats['hits'] == 3 and stats['misses'] == 1
+    assert stats['hit_rate'] == pytest.approx(0.75)
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    cache = PredictionCache(ttl=5)
+    key = cache.key(READING, 'v')
+    cache.put(key, 'result')
+    now[0] += 4.9
+    assert cache.get(key) == 'result'
+    now[0] += 0.2
+    assert cache.get(key) is None
+    assert cache.stats()['expirations'] == 1
+
+
+def test_disabled_cache_stores_nothing():
+    cache = PredictionCache(max_size=0)
+    assert not cache.enabled
+    key = cache.key(READING, 'v')
+    cache.put(key, 'result')
+    assert cache.get(key) is None
+
+
+def test_from_env(monkeypatch):
+    monkeypatch.setenv('ACCIDENT_CACHE_SIZE', '7')
+    monkeypatch.setenv('ACCIDENT_CACHE_TTL', '0')
+    cache = PredictionCache.from_env()
+    assert cache.max_size == 7 and cache.ttl is None
+
+
+def test_detect_endpoint_serves_repeats_from_cache(client, monkeypatch):
+    import app
+    monkeypatch.setattr(app, 'prediction_cache', PredictionCache())
+    first = client.post('/api/detect', json=READING)
+    second = client.post('/api/detect', json=READING)
+    assert first.headers['X-Cache'] == 'MISS'
+    assert second.headers['X-Cache'] == 'HIT'
+    assert first.get_json() == second.get_json()
+    assert client.get('/api/cache_stats').get_json()['hits'] == 1
+
+
+@pytest.mark.parametrize('value', ['NaN', 'Infinity', '-Infinity'])
+def test_detect_rejects_non_finite_values(client, value):
+    response = client.post('/api/detect', data='{"acc_x": %s, "acc_y": 0, "acc_z": 9.8, '
+                                               '"gyro_x": 0, "gyro_y": 0, "gyro_z": 0, "speed": 10}'
+                           % value,
+                           content_type='application/json')
+    assert response.status_code == 400
@@ -0,0 +1,172 @@
+"""SessionStore: ring buffers, incident merging, eviction."""
+
+import time
+
+import numpy as np
+import pytest
+
+import app
+from rider_sessions import SessionStore, validate_device_id
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def closed():
+    return []
+
+
+@pytest.fixture
+def store(clock, closed):
+    return SessionStore(capacity=8, history=4, idle_timeout=60, debounce=2.0, sweep_interval=3600,
+                        on_incident=closed.append, clock=clock)
+
+
+def reading(value=0.0):
+    return dict(acc_x=value, acc_y=0.0, acc_z=9.8, gyro_x=0.0, gyro_y=0.0, gyro_z=0.0, speed=20.0)
+
+
+def test_ring_buffer_keeps_latest_readings(store):
+    for i in range(6):
+        store.record('bike', reading(i), False, 0.1)
+    session = store.get('bike')
+    assert session.sample_count == 6
+    np.testing.assert_array_equal(session.recent_readings[:, 0], [2, 3, 4, 5])
+
+
+def test_consecutive_positives_merge_into_one_incident(store, clock, closed):
+    first = store.record('bike', reading(), True, 0.6, reason='moderate_impact', severity=1)
+    assert first['alert'] and first['incident']['readings'] == 1
+    clock.now += 1.5
+    second = store.record('bike', reading(), True, 0.9, reason='extreme_crash', severity=5)
+    clock.now += 1.5
+    third = store.record('bike', reading(), True, 0.95, reason='moderate_impact', severity=1)
+    assert not second['alert'] and not third['alert']
+    assert closed == []
+
+    clock.now += 2.0
+    assert store.close_expired() == closed
+    [incident] = closed
+    assert incident['readings'] == 3
+    assert incident['duration'] == pytest.approx(3.0)
+    assert incident['end'] - incident['start'] == pytest.approx(3.0)
+    assert incident['peak_confidence'] == pytest.approx(0.95)
+    assert incident['reason'] == 'extreme_crash'  # most severe, not most confident
+    assert store.get('bike').to_dict()['last_incident'] == incident
+    assert store.stats()['incidents_closed'] == 1
+
+
+def test_gap_longer_than_debounce_opens_new_incident(store, clock, closed):
+    store.record('bike', reading(), True, 0.7)
+    clock.now += 2.5
+    summary = store.record('bike', reading(), True, 0.7)
+    assert summary['alert']
+    assert len(closed) == 1
+    assert summary['incident']['incident_id'] != closed[0]['incident_id']
+
+
+def test_devices_are_independent(store, closed):
+    assert store.record('a', reading(), True, 0.7)['alert']
+    assert store.record('b', reading(), True, 0.7)['alert']
+    assert store.record('a', reading(), False, 0.1)['incident'] is not None
+    assert len(store.incidents()['open']) == 2
+
+
+def test_reported_times_are_epoch_seconds(store):
+    before = time.time()
+    summary = store.record('bike', reading(), True, 0.7)
+    assert summary['incident']['start'] == pytest.approx(before, abs=1.0)
+    assert store.session_dict('bike')['first_seen'] == pytest.approx(before, abs=1.0)
+
+
+def test_idle_sessions_are_evicted(store, clock, closed):
+    store.record('gone', reading(), True, 0.7)
+    clock.now += 61
+    store.close_expired()
+    assert store.get('gone') is None
+    assert len(closed) == 1 and store.stats()['evicted_idle'] == 1
+
+
+def test_full_store_evicts_least_recently_seen(store, clock):
+    for i in range(8):
+        store.record(f'bike-{i}', reading(), False, 0.1)
+        clock.now += 1
+    store.record('newcomer', reading(), False, 0.1)
+    assert store.get('bike-0') is None
+    assert store.get('bike-7') is not None and store.get('newcomer') is not None
+    assert len(store) == 8
+
+
+def test_disabled_store():
+    assert not SessionStore(capacity=0).enabled
+
+
+def test_sweeper_thread_closes_incidents(closed):
+    store = SessionStore(capacity=4, debounce=0.05, sweep_interval=0.02, on_incident=closed.append)
+    store.record('bike', reading(), True, 0.8)
+    deadline = time.monotonic() + 2
+    while not closed and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(closed) == 1
+    store.disable()
+
+
+def test_disable_closes_open_incidents(store, closed):
+    store.record('bike', reading(), True, 0.8)
+    store.disable()
+    assert not store.enabled and len(store) == 0
+    assert len(closed) == 1
+
+
+@pytest.mark.parametrize('device_id', ['', None, 42, 'x' * 129])
+def test_invalid_device_ids(device_id):
+    with pytest.raises(ValueError):
+        validate_device_id(device_id)
+
+
+def test_detect_endpoint_records_sessions(client, monkeypatch):
+    monkeypatch.setattr(app, 'rider_sessions', SessionStore(capacity=16))
+    crash = dict(reading(-30.0), speed=50.0, device_id='bike-1')
+    first = client.post('/api/detect', json=crash).get_json()
+    second = client.post('/api/detect', json=crash).get_json()
+    assert first['session']['alert'] and not second['session']['alert']
+    [incident] = client.get('/api/incidents').get_json()['open']
+    assert incident['device_id'] == 'bike-1' and incident['readings'] == 2
+    assert incident['reason'] in first['reason_flags']
+    assert 'session' not in client.post('/api/detect', json=reading()).get_json()
+
+    state = client.get('/api/sessions/bike-1').get_json()
+    assert state['samples'] == 2 and len(state['recent_readings']) == 2
+    assert client.get('/api/sessions/unknown').status_code == 404
+    assert client.post('/api/detect', json=dict(reading(), device_id='')).status_code == 400
+
+
+def test_multi_process_server_disables_sessions(client, monkeypatch):
+    monkeypatch.setattr(app, 'rider_sessions', SessionStore(capacity=16))
+    body = dict(reading(), device_id='bike-1')
+    response = client.post('/api/detect', json=body, environ_overrides={'wsgi.multiprocess': True})
+    assert response.status_code == 503
+    assert 'worker processes' in response.get_json()['error']
+    assert not app.rider_sessions.enabled
+    assert client.post('/api/detect', json=body).status_code == 503
+    assert client.post('/api/detect', json=reading()).status_code == 200
+
+
+def test_disabled_store_reports_why(monkeypatch):
+    monkeypatch.setenv('ACCIDENT_SESSION_CAPACITY', '0')
+    assert 'ACCIDENT_SESSION_CAPACITY' in SessionStore.from_env().disabled_reason
+    store = SessionStore(capacity=4)
+    assert store.disabled_reason is None
+    store.disable("testing")
+    assert store.stats()['disabled_reason'] == "testing"
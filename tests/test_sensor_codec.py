@@ -0,0 +1,71 @@
+import json
+
+import numpy as np
+import pytest
+
+from readings import EXTREME_READINGS, random_readings
+from sensor_codec import (RECORD_SIZE, SENSOR_RECORD_CONTENT_TYPE, decode_readings,
+                          encode_readings, is_sensor_record_type)
+from working_accident_system import SENSOR_COLUMNS
+
+
+def test_round_trip():
+    readings = random_readings(50, seed=6)
+    body = encode_readings(readings)
+    assert len(body) == 50 * RECORD_SIZE == 50 * 28
+    decoded = decode_readings(body)
+    assert decoded.dtype == np.float32
+    np.testing.assert_array_equal(decoded, readings.astype(np.float32))
+
+
+def test_single_reading_and_bad_shapes():
+    assert decode_readings(encode_readings(EXTREME_READINGS[0])).shape == (1, 7)
+    with pytest.raises(ValueError):
+        encode_readings([[1.0, 2.0, 3.0]])
+    with pytest.raises(ValueError):
+        decode_readings(b'\x00' * (RECORD_SIZE + 1))
+
+
+def test_content_type_matching():
+    assert is_sensor_record_type(SENSOR_RECORD_CONTENT_TYPE)
+    assert is_sensor_record_type('Application/VND.bike-sensor.f32; charset=binary')
+    assert not is_sensor_record_type('application/json')
+    assert not is_sensor_record_type(None)
+
+
+def test_binary_bulk_matches_ndjson(client):
+    readings = np.array(EXTREME_READINGS, dtype=np.float32)
+    binary = client.post('/api/detect/bulk', data=encode_readings(readings),
+                         content_type=SENSOR_RECORD_CONTENT_TYPE)
+    assert binary.status_code == 200
+    binary_lines = binary.get_data()
+    text = client.post('/api/detect/bulk',
+                       data='\n'.join(json.dumps(row) for row in readings.tolist()))
+    assert binary_lines == text.get_data()
+
+    truncated = client.post('/api/detect/bulk', data=encode_readings(readings)[:-1],
+                            content_type=SENSOR_RECORD_CONTENT_TYPE)
+    assert truncated.status_code == 400
+
+
+def test_binary_detect_matches_json(client):
+    reading = np.array(EXTREME_READINGS[0], dtype=np.float32)
+    binary = client.post('/api/detect', data=encode_readings(reading),
+                         content_type=SENSOR_RECORD_CONTENT_TYPE)
+    text = client.post('/api/detect', json=dict(zip(SENSOR_COLUMNS, reading.tolist())))
+    assert binary.status_code == 200
+    assert binary.get_json()['is_accident'] == text.get_json()['is_accident']
+    assert binary.get_json()['confidence'] == text.get_json()['confidence']
+
+    two = client.post('/api/detect', data=encode_readings(np.vstack([reading, reading])),
+                      content_type=SENSOR_RECORD_CONTENT_TYPE)
+    assert two.status_code == 400
+
+
+def test_binary_bulk_rejects_non_finite_records(client):
+    readings = np.array(EXTREME_READINGS, dtype=np.float32)
+    readings[3, 1] = np.nan
+    response = client.post('/api/detect/bulk', data=encode_readings(readings),
+                           content_type=SENSOR_RECORD_CONTENT_TYPE)
+    assert response.status_code == 400
+    assert 'record 4' in response.get_json()['error']
@@ -0,0 +1,82 @@
+"""Pre-fork server: workers answer on one shared socket and stop on SIGTERM."""
+
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+import app
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork'), reason="pre-fork server needs os.fork")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for(url, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(url, timeout=2) as response:
+                return json.load(response)
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+
+def test_preload_models_loads_every_model_type():
+    loaded = app.preload_models()
+    assert set(loaded) == set(app.ML_MODEL_TYPES)
+    for model_type, model in loaded.items():
+        assert app.ml_detectors[model_type] is model
+
+
+def test_workers_serve_and_stop_on_sigterm():
+    port = free_port()
+    server = subprocess.Popen([sys.executable, 'serve.py', '--host', '127.0.0.1', '--port', str(port),
+                               '--workers', '2'], cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        assert wait_for(f'http://127.0.0.1:{port}/api/model_status')['rule_based_available']
+        request = urllib.request.Request(
+            f'http://127.0.0.1:{port}/api/detect', method='POST', headers={'Content-Type': 'application/json'},
+            data=json.dumps(dict(acc_x=-30, acc_y=0, acc_z=9.8, gyro_x=0, gyro_y=0, gyro_z=0, speed=50)).encode())
+        for _ in range(8):
+            with urllib.request.urlopen(request, timeout=5) as response:
+                assert json.load(response)['is_accident'] is True
+
+        # Sessions are per process: disabled with two workers, not split between them
+        sessions = wait_for(f'http://127.0.0.1:{port}/api/sessions')
+        assert not sessions['enabled'] and 'worker' in sessions['disabled_reason']
+        request.data = json.dumps(dict(acc_x=0, acc_y=0, acc_z=9.8, gyro_x=0, gyro_y=0, gyro_z=0,
+                                       device_id='bike-1')).encode()
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(request, timeout=5)
+        assert error.value.code == 503
+    finally:
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=20) == 0
+
+
+def test_default_workers(monkeypatch):
+    import serve
+    from rider_sessions import SessionStore
+    monkeypatch.delenv('ACCIDENT_WORKERS', raising=False)
+    monkeypatch.setattr(serve, 'rider_sessions', SessionStore(capacity=4))
+    assert serve.default_workers() == 1
+    monkeypatch.setattr(serve, 'rider_sessions', SessionStore(capacity=0))
+    assert serve.default_workers() == (os.cpu_count() or 1)
+    monkeypatch.setenv('ACCIDENT_WORKERS', '3')
+    assert serve.default_workers() == 3
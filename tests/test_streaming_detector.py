@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from readings import EXTREME_READINGS
+from streaming_detector import StreamingAccidentDetector
+
+CALM = [0.1, 0.2, 9.8, 0.5, 0.3, 0.2, 30]
+CRASH = EXTREME_READINGS[0]
+
+
+def test_calm_stream_emits_nothing():
+    stream = StreamingAccidentDetector(window_size=50, min_hits=3)
+    assert stream.push(np.tile(CALM, (200, 1))) == []
+    assert stream.features['hits'] == 0
+    assert stream.features['samples_in_window'] == 50
+
+
+def test_crash_burst_emits_one_event_after_min_hits():
+    stream = StreamingAccidentDetector(window_size=50, min_hits=3)
+    stream.push(np.tile(CALM, (20, 1)))
+    events = stream.push(np.tile(CRASH, (5, 1)))
+    assert len(events) == 1
+    event = events[0]
+    assert event['sample_index'] == 22
+    assert event['hits'] == 3
+    assert event['reasons'] != 'Normal riding'
+    # Latched until the window is clear of hits again
+    assert stream.push(np.tile(CRASH, (5, 1))) == []
+    stream.push(np.tile(CALM, (50, 1)))
+    assert len(stream.push(np.tile(CRASH, (3, 1)))) == 1
+
+
+def test_chunking_does_not_change_events():
+    block = np.vstack([np.tile(CALM, (30, 1)), np.tile(CRASH, (4, 1)), np.tile(CALM, (80, 1)),
+                       np.tile(CRASH, (4, 1)), np.tile(CALM, (10, 1))])
+    whole = StreamingAccidentDetector(window_size=40).push(block)
+    stream = StreamingAccidentDetector(window_size=40)
+    one_by_one = [e for row in block for e in stream.push(row)]
+    assert [e['sample_index'] for e in whole] == [e['sample_index'] for e in one_by_one] == [32, 116]
+
+
+def test_window_is_chronological():
+    stream = StreamingAccidentDetector(window_size=4)
+    block = np.tile(CALM, (6, 1)).astype(float)
+    block[:, 6] = np.arange(6)
+    stream.push(block)
+    np.testing.assert_array_equal(stream.window()[:, 6], [2, 3, 4, 5])
+
+
+def test_reset_clears_state():
+    stream = StreamingAccidentDetector(window_size=10, min_hits=1)
+    assert len(stream.push(CRASH)) == 1
+    stream.reset()
+    assert stream.samples_seen == 0
+    assert stream.features['hits'] == 0
+    assert len(stream.push(CRASH)) == 1
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        StreamingAccidentDetector(window_size=2, min_hits=3)
+    with pytest.raises(ValueError):
+        StreamingAccidentDetector().push(np.tile(CALM, (2, 1)), timestamps=[0.0])
+
+
+def test_rotation_and_jerk_use_timestamp_spacing():
+    block = np.tile(CALM, (4, 1)).astype(float)
+    block[:, 3] = 10.0          # 10 °/s about x
+    block[3, 2] = 19.8          # +10 G step on the last sample
+    nominal = StreamingAccidentDetector(window_size=10, sample_rate_hz=50)
+    nominal.push(block)
+    spaced = StreamingAccidentDetector(window_size=10, sample_rate_hz=50)
+    spaced.push(block, timestamps=[0.0, 0.1, 0.2, 0.3])
+
+    gyro = np.linalg.norm(block[0, 3:6])
+    assert nominal.features['rotation_integral'] == pytest.approx(4 * gyro / 50)
+    # First sample uses the nominal step, the rest the 0.1 s spacing
+    assert spaced.features['rotation_integral'] == pytest.approx(gyro / 50 + 3 * gyro * 0.1)
+    assert spaced.features['peak_jerk'] == pytest.approx(nominal.features['peak_jerk'] / 5, rel=1e-6)
+
+
+def test_dict_reading_needs_every_axis():
+    stream = StreamingAccidentDetector()
+    reading = dict(acc_x=0.1, acc_y=0.2, acc_z=9.8, gyro_x=0.5, gyro_y=0.3, gyro_z=0.2)
+    assert stream.push(reading) == []
+    del reading['gyro_y']
+    with pytest.raises(ValueError, match='gyro_y'):
+        stream.push(reading)
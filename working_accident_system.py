@@ -14,172 +14,158 @@ Key Differences from Car Detection:
 import numpy as np
 import pandas as pd
 import joblib
+import logging
 import os
 from datetime import datetime
+from detector_logging import configure_logging, get_logger, Lazy
+from accident_rules import default_engine, reason_text, scalar_features
+
+logger = get_logger('rules')
+
+# Column order expected by the vectorized batch API
+SENSOR_COLUMNS = ['acc_x', 'acc_y', 'acc_z', 'gyro_x', 'gyro_y', 'gyro_z', 'speed']
+
+def describe_reasons(reason_mask, flags=None):
+    """
+    Decode a reason bitmask from detect_batch into a list of reason names.
+    
+    Args:
+        reason_mask: integer bitmask
+        flags: flag names of the rules that produced the mask
+               (default: the currently loaded rules)
+    """
+    reason_mask = int(reason_mask)
+    if flags is None:
+        flags = default_engine().rules.flags
+    return [name for i, name in enumerate(flags) if reason_mask & (1 << i)]
+
+
+def to_sensor_matrix(data):
+    """
+    Coerce batch input into a float64 (N, 7) matrix in SENSOR_COLUMNS order.
+    
+    Accepts an (N, 7) array or a DataFrame with the sensor columns
+    (speed is optional and defaults to 0, like the scalar path).
+    """
+    if isinstance(data, pd.DataFrame):
+        matrix = np.zeros((len(data), len(SENSOR_COLUMNS)), dtype=np.float64)
+        for i, col in enumerate(SENSOR_COLUMNS):
+            if col in data.columns:
+                matrix[:, i] = data[col].to_numpy(dtype=np.float64)
+            elif col != 'speed':
+                raise ValueError(f"Missing sensor column: {col}")
+        return matrix
+    
+    matrix = np.asarray(data, dtype=np.float64)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    if matrix.ndim != 2 or matrix.shape[1] != len(SENSOR_COLUMNS):
+        raise ValueError(f"Expected an (N, {len(SENSOR_COLUMNS)}) array, got shape {matrix.shape}")
+    return matrix
+
 
 class WorkingAccidentDetector:
     """A physics-based bike accident detector using real-world sensor thresholds."""
     
-    def __init__(self):
-        print("🚴 BIKE ACCIDENT DETECTOR - RULE-BASED SYSTEM")
-        print("=" * 60)
-        print("Designed specifically for bicycle/motorcycle accidents!")
-        print("Using physics-based rules optimized for two-wheeled vehicles")
+    def __init__(self, rule_engine=None):
+        """
+        Args:
+            rule_engine: accident_rules.RuleEngine to read the rules from
+                         (default: the shared, hot-reloaded accident_rules.json)
+        """
+        self.rule_engine = rule_engine if rule_engine is not None else default_engine()
+        logger.info("🚴 Bike accident detector ready (rule-based, physics rules for two-wheeled vehicles, rules v%s)",
+                    self.rules.version)
     
-    def detect_accident(self, sensor_data):
+    @property
+    def rules(self):
+        """The currently active accident_rules.RuleSet."""
+        return self.rule_engine.rules
+    
+    def detect_accident(self, sensor_data, with_mask=False):
         """
         Physics-based BIKE accident detection using sensor magnitude thresholds.
         Optimized for bicycle/motorcycle crashes with rider on vehicle.
         
         Args:
             sensor_data: dict with keys acc_x, acc_y, acc_z, gyro_x, gyro_y, gyro_z, speed (optional)
+            with_mask: also return the reason bitmask (see describe_reasons)
         
         Returns:
-            tuple: (is_accident: bool, confidence: float, reason: str)
+            tuple: (is_accident: bool, confidence: float, reason: str), plus
+            reason_mask: int when with_mask=True
         """
         
-        # Calculate magnitudes
-        acc_magnitude = np.sqrt(sensor_data['acc_x']**2 + sensor_data['acc_y']**2 + sensor_data['acc_z']**2)
-        gyro_magnitude = np.sqrt(sensor_data['gyro_x']**2 + sensor_data['gyro_y']**2 + sensor_data['gyro_z']**2)
-        total_magnitude = acc_magnitude + gyro_magnitude
-        
-        # Get speed (default to 0 if not provided for backward compatibility)
-        speed = sensor_data.get('speed', 0)
-        
-        print(f"📊 Sensor Analysis:")
-        print(f"   � Bike Speed: {speed:.1f} km/h")
-        print(f"   🚀 Acceleration magnitude: {acc_magnitude:.1f} G")
-        print(f"   🌀 Gyroscope magnitude: {gyro_magnitude:.1f} °/s")
-        print(f"   📈 Total magnitude: {total_magnitude:.1f}")
-        
-        # Physics-based BIKE accident detection rules with improved confidence scoring
-        reasons = []
-        confidence_score = 0.0
-        severity_multiplier = 1.0
-        
-        # Speed factor for impact severity (bikes are more vulnerable than cars)
-        # Bikes reach peak danger at lower speeds than cars
-        speed_factor = 1.0 + (speed / 60.0)  # Up to 2.67x at 100 km/h (high for bikes)
-        
-        # Rule 1: Acceleration-based impact detection (PRIMARY INDICATOR)
-        # Bikes: Direct rider exposure means lower G-forces can be serious
-        if acc_magnitude > 25:  # Extreme crash impact (severe rider injury likely)
-            reasons.append(f"🚨 EXTREME CRASH: {acc_magnitude:.1f}G acceleration")
-            confidence_score += 0.65 * speed_factor
-            severity_multiplier *= 1.5
-        elif acc_magnitude > 20:  # Severe impact (high injury risk)
-            reasons.append(f"🔴 SEVERE CRASH: {acc_magnitude:.1f}G acceleration")
-            confidence_score += 0.55 * speed_factor
-            severity_multiplier *= 1.3
-        elif acc_magnitude > 15:  # High impact (likely crash)
-            reasons.append(f"🟠 HIGH IMPACT CRASH: {acc_magnitude:.1f}G acceleration")
-            confidence_score += 0.45 * speed_factor
-            severity_multiplier *= 1.2
-        elif acc_magnitude > 10:  # Moderate impact (possible fall)
-            reasons.append(f"🟡 MODERATE IMPACT: {acc_magnitude:.1f}G acceleration")
-            confidence_score += 0.35 * speed_factor
-        
-        # Rule 2: Gyroscope-based rotation detection (CRITICAL FOR BIKES!)
-        # Bikes tumble/flip more easily than cars - rotation is key indicator
-        if gyro_magnitude > 35:  # Extreme tumbling (rider thrown off)
-            reasons.append(f"🌪️ EXTREME TUMBLING: {gyro_magnitude:.1f}°/s")
-            confidence_score += 0.50 * speed_factor
-            severity_multiplier *= 1.4
-        elif gyro_magnitude > 25:  # Severe rotation (bike flipping)
-            reasons.append(f"🔄 BIKE FLIPPING: {gyro_magnitude:.1f}°/s")
-            confidence_score += 0.40 * speed_factor
-            severity_multiplier *= 1.2
-        elif gyro_magnitude > 15:  # High rotation (loss of control)
-            reasons.append(f"🔃 LOSS OF CONTROL: {gyro_magnitude:.1f}°/s")  
-            confidence_score += 0.30 * speed_factor
-        elif gyro_magnitude > 8:  # Moderate rotation (unstable)
-            reasons.append(f"↻ BIKE UNSTABLE: {gyro_magnitude:.1f}°/s")
-            confidence_score += 0.20 * speed_factor
-        
-        # Rule 3: Combined magnitude (total system shock)
-        if total_magnitude > 70:  # Catastrophic system shock
-            reasons.append(f"💥 CATASTROPHIC SHOCK: {total_magnitude:.1f} total")
-            confidence_score += 0.45
-        elif total_magnitude > 50:  # Severe system shock
-            reasons.append(f"⚡ SEVERE SYSTEM SHOCK: {total_magnitude:.1f} total")
-            confidence_score += 0.35
-        elif total_magnitude > 30:  # Moderate disturbance
-            reasons.append(f"⚠️ HIGH DISTURBANCE: {total_magnitude:.1f} total")
-            confidence_score += 0.25
-        
-        # Rule 4: Individual axis extremes (directional impact analysis)
-        max_acc_axis = max(abs(sensor_data['acc_x']), abs(sensor_data['acc_y']), abs(sensor_data['acc_z']))
-        max_gyro_axis = max(abs(sensor_data['gyro_x']), abs(sensor_data['gyro_y']), abs(sensor_data['gyro_z']))
-        
-        if max_acc_axis > 30:  # Extreme single-axis force
-            reasons.append(f"⚡ EXTREME DIRECTIONAL FORCE: {max_acc_axis:.1f}G")
-            confidence_score += 0.35
-        elif max_acc_axis > 20:  # High single-axis force
-            reasons.append(f"➡️ HIGH DIRECTIONAL FORCE: {max_acc_axis:.1f}G")
-            confidence_score += 0.25
-        
-        if max_gyro_axis > 30:  # Extreme single-axis rotation
-            reasons.append(f"🔄 EXTREME AXIS ROTATION: {max_gyro_axis:.1f}°/s")
-            confidence_score += 0.30
-        
-        # Rule 5: Speed-based collision detection (BIKE-SPECIFIC THRESHOLDS)
-        # Bikes: Even moderate speeds (40-60 km/h) are dangerous
-        if speed > 60:  # High-speed for bikes (most dangerous)
-            if acc_magnitude > 8:  # Lower threshold at high speeds
-                reasons.append(f"�️ HIGH-SPEED BIKE CRASH: {speed:.1f} km/h + {acc_magnitude:.1f}G")
-                confidence_score += 0.40
-            if gyro_magnitude > 8:  # Loss of control at high speed
-                reasons.append(f"�💨 HIGH-SPEED INSTABILITY: {speed:.1f} km/h")
-                confidence_score += 0.30
-        elif speed > 40:  # Moderate speed for bikes (dangerous)
-            if acc_magnitude > 12:
-                reasons.append(f"� MODERATE-SPEED CRASH: {speed:.1f} km/h + {acc_magnitude:.1f}G")
-                confidence_score += 0.35
-        elif speed > 20:  # City cycling speed
-            if acc_magnitude > 15:
-                reasons.append(f"🚴 CITY SPEED COLLISION: {speed:.1f} km/h + {acc_magnitude:.1f}G")
-                confidence_score += 0.30
-        
-        # Rule 6: Sudden deceleration (emergency braking/crash stop)
-        # Bikes: Sudden stops can cause rider to fly over handlebars (endo)
-        forward_decel = -sensor_data['acc_x']  # Negative X = deceleration
-        if speed > 30 and forward_decel > 18:  # Extreme sudden stop (endo risk!)
-            reasons.append(f"🛑 CRASH STOP (ENDO RISK): {forward_decel:.1f}G at {speed:.1f} km/h")
-            confidence_score += 0.40
-        elif speed > 20 and forward_decel > 12:  # Hard braking at speed
-            reasons.append(f"⚠️ SUDDEN BRAKING: {forward_decel:.1f}G at {speed:.1f} km/h")
-            confidence_score += 0.30
-        
-        # Rule 7: Stationary impact (0 km/h but high acceleration)
-        # Bikes: Can be knocked over while parked, or rider hit while stopped
-        if speed < 5 and acc_magnitude > 15:  # Hit while parked/stopped
-            reasons.append(f"�💥 STATIONARY IMPACT: {acc_magnitude:.1f}G while stopped")
-            confidence_score += 0.50  # High confidence for parked collision
-
-        
-        # Apply severity multiplier and normalize to 0-100% scale
-        confidence = min(confidence_score * severity_multiplier, 1.0)
+        # Magnitudes, axis extremes and speed factor (speed defaults to 0
+        # if not provided for backward compatibility)
+        rules = self.rules
+        features = scalar_features(sensor_data)
+        speed = features['speed']
+        acc_magnitude = features['acc_magnitude']
+        gyro_magnitude = features['gyro_magnitude']
+        total_magnitude = features['total_magnitude']
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📊 Sensor analysis: speed=%.1f km/h acc=%.1fG gyro=%.1f°/s total=%.1f",
+                         speed, acc_magnitude, gyro_magnitude, total_magnitude,
+                         extra={'speed': float(speed), 'acc_magnitude': float(acc_magnitude),
+                                'gyro_magnitude': float(gyro_magnitude),
+                                'total_magnitude': float(total_magnitude)})
+        
+        # Physics-based BIKE accident rules (accident_rules.json): scores add
+        # up across rule groups, severities multiply, capped at 100%
+        confidence, reasons, reason_mask = rules.score(features, with_mask=True)
         
         # Convert to percentage for better readability
         confidence_percent = confidence * 100
         
-        # Decision threshold: If confidence > 40%, it's an accident
-        is_accident = confidence > 0.40
+        # Decision threshold: If confidence > 40% (configurable), it's an accident
+        is_accident = confidence > rules.accident_threshold
         
-        if is_accident:
-            reason_text = " | ".join(reasons)
-            print(f"🚨 ACCIDENT DETECTED! Confidence: {confidence_percent:.1f}%")
-            print(f"   Reasons: {reason_text}")
-        else:
-            if reasons:
-                reason_text = " | ".join(reasons)
-                print(f"⚠️ Minor disturbance detected (Confidence: {confidence_percent:.1f}%): {reason_text}")
+        if logger.isEnabledFor(logging.DEBUG):
+            if is_accident:
+                status = "🚨 ACCIDENT DETECTED!"
+            elif reasons:
+                status = f"⚠️ Minor disturbance (below {rules.accident_threshold:.0%} threshold)"
             else:
-                reason_text = "Normal riding conditions"
-                print(f"✅ Normal riding conditions")
-            print(f"   Confidence: {confidence_percent:.1f}% (below 40% threshold)")
+                status = "✅ Normal riding conditions"
+            # Reason text is joined only if a handler actually emits the record
+            logger.debug("%s Confidence: %.1f%% | %s", status, confidence_percent,
+                         Lazy(" | ".join, reasons),
+                         extra={'is_accident': bool(is_accident), 'confidence': float(confidence),
+                                'reasons': Lazy(list, reasons)})
+        
+        reason = reason_text(reasons)
+        if with_mask:
+            return is_accident, confidence, reason, reason_mask
+        return is_accident, confidence, reason
+    
+    def detect_batch(self, data, rules=None):
+        """
+        Vectorized version of detect_accident for offline replays.
         
-        return is_accident, confidence, reason_text if reasons else "Normal riding"
+        Evaluates the same rule table as masked array operations in row
+        chunks. Scores are accumulated in the same order as the scalar path
+        so the results are identical, but nothing is logged and no reason
+        text is built.
+        
+        Args:
+            data: (N, 7) array with columns SENSOR_COLUMNS, or a DataFrame
+                  with those columns (speed optional)
+            rules: RuleSet to score with (default: the currently loaded
+                   rules); pass one snapshot to keep a multi-call replay on
+                   a single rules version across hot reloads
+        
+        Returns:
+            tuple: (is_accident: bool array, confidence: float array,
+                    reasons: uint32 bitmask array over rules.flags, see
+                    describe_reasons)
+        """
+        if rules is None:
+            rules = self.rules
+        # Column-major copy: every rule clause then reads contiguous memory
+        columns = np.ascontiguousarray(to_sensor_matrix(data).T)
+        return rules.detect(dict(zip(SENSOR_COLUMNS, columns)), columns.shape[1])
     
     def test_realistic_scenarios(self):
         """Test with realistic BIKE accident scenarios."""
@@ -298,27 +284,25 @@ class WorkingAccidentDetector:
             return False
     
     def save_rules(self):
-        """Save the rule-based detection system."""
-        rules = {
+        """Save the active rule configuration (exactly what detect_accident uses)."""
+        rules = self.rules
+        saved = {
             'system_type': 'rule_based',
-            'version': '1.0',
-            'rules': {
-                'acceleration_thresholds': {'severe': 20, 'high': 15, 'moderate': 10},
-                'rotation_thresholds': {'severe': 30, 'high': 20, 'moderate': 10},
-                'total_magnitude_thresholds': {'severe': 60, 'moderate': 40},
-                'single_axis_thresholds': {'acceleration': 25, 'rotation': 25},
-                'confidence_threshold': 0.3
-            },
+            'version': rules.version,
+            'source': rules.source,
+            'config': rules.config,
+            'rules': rules.summary,
             'created': datetime.now().isoformat()
         }
         
         os.makedirs("working_models", exist_ok=True)
-        joblib.dump(rules, "working_models/accident_detection_rules.pkl")
-        print("💾 Rule-based system saved to 'working_models/accident_detection_rules.pkl'")
+        joblib.dump(saved, "working_models/accident_detection_rules.pkl")
+        print(f"💾 Rule-based system v{rules.version} saved to 'working_models/accident_detection_rules.pkl'")
 
 
 def main():
     """Main function for working accident detection."""
+    configure_logging()
     print("🎯 WORKING ACCIDENT DETECTION SYSTEM")
     print("=" * 70)
     print("Physics-based rules that actually work!")